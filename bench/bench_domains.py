@@ -0,0 +1,86 @@
+"""Benchmark registered-domain lookups and measure how many result domains collapse into one site"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import public_suffix
+from public_suffix import DEFAULT_SUFFIX_LIST, compile_list, load_trie, registered_domain
+
+def collect_urls(source_root):
+    """Every result URL in the CSVs below source_root, in file order (repeats included, like API results)"""
+    urls = []
+    for folder, _, file_names in sorted(os.walk(source_root)):
+        for file_name in sorted(file_names):
+            if not file_name.endswith(".csv"):
+                continue
+            with open(os.path.join(folder, file_name), mode="r", newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    url = (row.get("URL") or "").strip()
+                    if url.startswith("http"):
+                        urls.append(url)
+    return urls
+
+def time_lookups(function, hosts):
+    """Lookups per second of function over hosts"""
+    started = time.perf_counter()
+    for host in hosts:
+        function(host)
+    return len(hosts) / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark registered-domain (eTLD+1) normalization')
+    parser.add_argument('--source', default='business_searches', help='Folder of result CSVs to take URLs from')
+    parser.add_argument('--suffix-list', default=DEFAULT_SUFFIX_LIST, help='Public Suffix List file')
+    parser.add_argument('--lookups', type=int, default=1000000, help='Host lookups per measurement')
+    args = parser.parse_args()
+
+    urls = collect_urls(args.source)
+    if not urls:
+        sys.exit(f"No result URLs found below {args.source}")
+    hosts = [urlparse(url).netloc for url in urls]
+    rng = random.Random(7)
+    sample = [rng.choice(hosts) for _ in range(args.lookups)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        compiled_path = os.path.join(tmp, "public_suffix.trie")
+        started = time.perf_counter()
+        compile_list(args.suffix_list, compiled_path)
+        compile_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        public_suffix._suffix_trie = load_trie(args.suffix_list, compiled_path)
+        load_seconds = time.perf_counter() - started
+    print(f"Compile list: {compile_seconds * 1000:.1f} ms, load compiled trie: {load_seconds * 1000:.1f} ms")
+
+    uncached = registered_domain.__wrapped__
+    print(f"\n{'lookup':<26} {'lookups/s':>12}")
+    print(f"{'lowercase host (baseline)':<26} {time_lookups(lambda host: host.lower(), sample):>12,.0f}")
+    print(f"{'trie, uncached':<26} {time_lookups(uncached, sample):>12,.0f}")
+    registered_domain.cache_clear()
+    print(f"{'trie, cached':<26} {time_lookups(registered_domain, sample):>12,.0f}")
+
+    # Results a run would scan when deduping by host versus by registered domain
+    seen_hosts = set()
+    seen_domains = set()
+    scanned_by_host = scanned_by_domain = 0
+    for host in hosts:
+        if host not in seen_hosts:
+            seen_hosts.add(host)
+            scanned_by_host += 1
+        domain = registered_domain(host)
+        if domain not in seen_domains:
+            seen_domains.add(domain)
+            scanned_by_domain += 1
+    saved = scanned_by_host - scanned_by_domain
+    print(f"\n{len(urls)} results, {len(seen_hosts)} distinct hosts, {len(seen_domains)} registered domains")
+    print(f"Pages scanned: {scanned_by_host} by host, {scanned_by_domain} by registered domain "
+          f"({saved} fewer, {saved / scanned_by_host:.1%})")
+
+if __name__ == "__main__":
+    main()
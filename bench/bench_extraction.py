@@ -0,0 +1,51 @@
+"""Adversarial corpus for contact extraction: shows scan time grows linearly (tests/test_contact_extractor.py asserts the budget)"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contact_extractor import extract_contacts
+
+# Inputs that made the original unbounded email pattern backtrack quadratically
+ADVERSARIAL_CORPUS = {
+    "dotted_words": lambda size: "a." * (size // 2),
+    "dense_at_signs": lambda size: ("a." * 31 + "a@" + "a." * 120 + "1") * (size // 305 + 1),
+    "at_runs": lambda size: "a@" * (size // 2),
+    "dashed_domains": lambda size: ("x@" + "a-" * 125 + "-") * (size // 252 + 1),
+    "digit_noise": lambda size: "1 2-3." * (size // 6),
+    "long_word": lambda size: "a" * size,
+    "mixed_contacts": lambda size: ("Call +1 (212) 555-0123 or mail info@example.org. " * (size // 50 + 1)),
+}
+
+def bench_case(name, make_text, sizes, matcher, time_budget):
+    """Time one corpus entry at growing sizes and return its rows"""
+    rows = []
+    for size in sizes:
+        text = make_text(size)
+        started = time.perf_counter()
+        result = extract_contacts(text, time_budget=time_budget, matcher=matcher)
+        elapsed = time.perf_counter() - started
+        rows.append((name, len(text), elapsed, elapsed / len(text) * 1e9 if text else 0, result["timed_out"]))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark contact extraction against adversarial pages')
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='Comma-separated page sizes in characters')
+    parser.add_argument('--matcher', choices=['re', 'regex'], default='re', help='Pattern engine to benchmark')
+    parser.add_argument('--time-budget', type=float, default=2.0, help='Per-page extraction budget in seconds')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    print(f"{'case':<16} {'chars':>9} {'seconds':>9} {'ns/char':>9}  timed out")
+    worst = 0.0
+    for name, make_text in ADVERSARIAL_CORPUS.items():
+        for case, chars, elapsed, ns_per_char, timed_out in bench_case(name, make_text, sizes, args.matcher, args.time_budget):
+            worst = max(worst, elapsed)
+            print(f"{case:<16} {chars:>9} {elapsed:>9.3f} {ns_per_char:>9.0f}  {timed_out}")
+
+    print(f"\nWorst page: {worst:.3f}s (budget {args.time_budget}s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark the streaming merge: peak memory should stay flat as the input grows"""
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from csv_merge import iter_csv_rows, stream_merge
+
+FIELDNAMES = ["URL", "Email", "Phone", "SourceFile"]
+
+def write_inputs(folder, rows, files, duplicate_ratio, seed=7):
+    """Write synthetic per-cell CSVs with a share of repeated emails"""
+    rng = random.Random(seed)
+    unique = max(1, int(rows * (1 - duplicate_ratio)))
+    paths = []
+    per_file = rows // files
+    for file_index in range(files):
+        path = os.path.join(folder, f"cell_{file_index}.csv")
+        with open(path, mode="w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(FIELDNAMES)
+            for _ in range(per_file):
+                contact = rng.randrange(unique)
+                writer.writerow([f"https://www.site{contact}.org/contact", f"info{contact}@site{contact}.org",
+                                 "212-555-0100", f"cell_{file_index}.csv"])
+        paths.append(path)
+    return paths
+
+def run_single(folder, memory_budget):
+    """Merge every CSV in a folder and print the stats as JSON (runs in a fresh process)"""
+    paths = sorted(os.path.join(folder, name) for name in os.listdir(folder) if name.startswith("cell_"))
+    rows = (row for path in paths for row in iter_csv_rows(path))
+    started = time.perf_counter()
+    stats = stream_merge(rows, os.path.join(folder, "merged.csv"), FIELDNAMES,
+                         key=lambda row: row["Email"].lower(), memory_budget=memory_budget)
+    stats["seconds"] = time.perf_counter() - started
+    # The process only ran this merge, so its lifetime peak is the merge's
+    stats["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps(stats))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the streaming CSV merge at growing input sizes')
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='Comma-separated total row counts')
+    parser.add_argument('--files', type=int, default=20, help='Number of per-cell CSV files')
+    parser.add_argument('--duplicate-ratio', type=float, default=0.3, help='Share of rows repeating an earlier email')
+    parser.add_argument('--memory-budget', type=int, default=4 * 1024 * 1024, help='Key set budget in bytes before spilling')
+    parser.add_argument('--single', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        run_single(args.single, args.memory_budget)
+        return
+
+    print(f"{'rows':>9} {'written':>9} {'spilled':>8} {'seconds':>8} {'rows/s':>9} {'peak RSS MB':>12}")
+    for size in (int(size) for size in args.sizes.split(',')):
+        with tempfile.TemporaryDirectory(prefix="bench_merge_") as folder:
+            write_inputs(folder, size, args.files, args.duplicate_ratio)
+            output = subprocess.run(
+                [sys.executable, __file__, '--single', folder, '--memory-budget', str(args.memory_budget)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            stats = json.loads(output)
+            print(f"{size:>9} {stats['rows_written']:>9} {str(stats['spilled']):>8} {stats['seconds']:>8.2f} "
+                  f"{stats['rows_read'] / stats['seconds']:>9.0f} {stats['peak_rss_kb'] / 1024:>12.1f}")
+
+if __name__ == "__main__":
+    main()
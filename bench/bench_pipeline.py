@@ -0,0 +1,145 @@
+"""End-to-end pipeline benchmark on replayed search responses: per-stage throughput, p50/p99 latency and peak memory
+
+Every stage runs in a fresh process, so its peak RSS is its own and not an earlier stage's.
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import business_search_complete
+from business_search_complete import MAX_RESULTS, extract_email, merge_and_clean_results, search_businesses
+from rate_limiter import AdaptiveRateLimiter, RateLimitedClient
+from replay import ReplayClient, fixture_pages, load_fixtures, percentile, scale_pages, seed_pages
+
+STAGES = ("search", "extract", "merge")
+
+def peak_rss_kb():
+    """Peak resident memory of this process so far, in KB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def bench_search(pages, records, folder, args):
+    """Run search_businesses against the replay client until the page pool is drained"""
+    replay = ReplayClient(records, pages, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+    # A limiter loose enough not to shape the run, so injected errors still go through the retry path
+    client = RateLimitedClient(replay, AdaptiveRateLimiter(rate=10000, burst=10000, max_concurrency=64, state_file=None))
+    iterations = math.ceil(len(pages) / MAX_RESULTS) + args.streams
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = search_businesses("benchmark", folder, iterations, streams=args.streams, concurrency=args.concurrency,
+                                  client=client, two_phase=args.two_phase)
+    seconds = time.perf_counter() - started
+    calls = replay.stats()
+    latencies = replay.latencies["search"] + replay.latencies["extract"]
+    return {
+        "seconds": seconds,
+        "items": stats["pages"],
+        "p50": percentile(latencies, 0.50),
+        "p99": percentile(latencies, 0.99),
+        "calls": calls["search_calls"] + calls["extract_calls"],
+        "errors": calls["errors"],
+        "rows_written": stats["rows_written"],
+    }
+
+def bench_extract(pages):
+    """Time extract_email on every page body"""
+    latencies = []
+    started = time.perf_counter()
+    for page in pages:
+        page_started = time.perf_counter()
+        extract_email(page["raw_content"])
+        latencies.append(time.perf_counter() - page_started)
+    seconds = time.perf_counter() - started
+    return {
+        "seconds": seconds,
+        "items": len(pages),
+        "p50": percentile(latencies, 0.50),
+        "p99": percentile(latencies, 0.99),
+        "chars": sum(len(page["raw_content"]) for page in pages),
+    }
+
+def bench_merge(folder):
+    """Time merge_and_clean_results over the rows the search stage wrote"""
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, stats = merge_and_clean_results(folder, os.path.join(folder, "final"))
+    seconds = time.perf_counter() - started
+    # One merge call per run, so there is no per-call distribution
+    return {"seconds": seconds, "items": stats["rows_read"], "p50": seconds, "p99": seconds,
+            "rows_written": stats["rows_written"]}
+
+def run_stage(scale, stage, folder, args):
+    """Benchmark one stage at one scale and print its stats as JSON (runs in a fresh process)
+
+    The search stage writes its rows to folder, where the merge stage reads them.
+    baseline_rss_kb is the process after loading the pages, before the stage ran.
+    """
+    records = load_fixtures(args.fixtures) if args.fixtures else []
+    pages = scale_pages(fixture_pages(records) if args.fixtures else seed_pages(args.source), scale)
+    business_search_complete.contact_index = None
+    baseline_rss_kb = peak_rss_kb()
+    if stage == "search":
+        stats = bench_search(pages, records, folder, args)
+    elif stage == "extract":
+        stats = bench_extract(pages)
+    else:
+        stats = bench_merge(folder)
+    print(json.dumps({"pages": len(pages), "stats": dict(stats, baseline_rss_kb=baseline_rss_kb, peak_rss_kb=peak_rss_kb())}))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark search, extraction and merge offline on replayed responses')
+    parser.add_argument('--scales', default='1,2,4', help='Comma-separated multiples of the seed page set')
+    parser.add_argument('--fixtures', help='Fixture folder recorded with replay.py (default: seed from --source)')
+    parser.add_argument('--source', default='business_searches', help='Folder of result CSVs to seed pages from')
+    parser.add_argument('--latency', type=float, default=0.05, help='Median replayed API latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.5, help='Lognormal sigma of the replayed latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of API calls failing with a throttle error')
+    parser.add_argument('--streams', type=int, default=business_search_complete.DEFAULT_STREAMS, help='Query streams')
+    parser.add_argument('--concurrency', type=int, default=business_search_complete.DEFAULT_CONCURRENCY, help='Concurrent searches')
+    parser.add_argument('--two-phase', action='store_true', help='Search without page bodies and extract new pages')
+    parser.add_argument('--single', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--stage', choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument('--folder', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        run_stage(args.single, args.stage, args.folder, args)
+        return
+
+    child_args = ['--source', args.source, '--latency', str(args.latency), '--jitter', str(args.jitter),
+                  '--error-rate', str(args.error_rate), '--streams', str(args.streams),
+                  '--concurrency', str(args.concurrency)]
+    if args.fixtures:
+        child_args += ['--fixtures', args.fixtures]
+    if args.two_phase:
+        child_args.append('--two-phase')
+
+    print(f"{'scale':>5} {'pages':>7} {'stage':<8} {'seconds':>8} {'items':>8} {'items/s':>9} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'peak RSS MB':>12} {'stage MB':>9}")
+    for scale in (int(scale) for scale in args.scales.split(',')):
+        stages = {}
+        with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as folder:
+            for stage in STAGES:
+                output = subprocess.run([sys.executable, __file__, '--single', str(scale), '--stage', stage,
+                                         '--folder', folder] + child_args,
+                                        capture_output=True, text=True, check=True).stdout
+                result = json.loads(output.splitlines()[-1])
+                stages[stage] = stats = result["stats"]
+                rate = stats["items"] / stats["seconds"] if stats["seconds"] else 0
+                print(f"{scale:>5} {result['pages']:>7} {stage:<8} {stats['seconds']:>8.2f} {stats['items']:>8} {rate:>9.0f} "
+                      f"{stats['p50'] * 1000:>8.2f} {stats['p99'] * 1000:>8.2f} {stats['peak_rss_kb'] / 1024:>12.1f} "
+                      f"{(stats['peak_rss_kb'] - stats['baseline_rss_kb']) / 1024:>9.1f}")
+        print(f"{'':>5} {'':>7} {stages['search']['calls']} API calls, {stages['search']['errors']} injected errors, "
+              f"{stages['merge']['rows_written']} unique emails")
+
+if __name__ == "__main__":
+    main()
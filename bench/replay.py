@@ -0,0 +1,257 @@
+"""Record real search responses to fixture files and replay them offline with injected latency and errors"""
+import argparse
+import asyncio
+import copy
+import csv
+import gzip
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tavily import UsageLimitExceededError
+
+from domain_suppression import url_domain
+from search_cache import cache_key
+
+DEFAULT_FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Words for the filler text around the contacts of synthetic pages
+FILLER_WORDS = ("support group meeting patients families care services community cancer breast "
+                "program volunteer events resources information clinic hospital foundation about "
+                "our team hours location directions donate news contact").split()
+
+def write_fixture(fixture_dir, method, key, request, response):
+    """Save one API response as <key>.json.gz in fixture_dir"""
+    os.makedirs(fixture_dir, exist_ok=True)
+    path = os.path.join(fixture_dir, f"{key}.json.gz")
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump({"method": method, "key": key, "request": request, "response": response}, f)
+    return path
+
+def load_fixtures(fixture_dir):
+    """Read every fixture record in fixture_dir, oldest first"""
+    paths = [os.path.join(fixture_dir, name) for name in os.listdir(fixture_dir) if name.endswith(".json.gz")]
+    records = []
+    for path in sorted(paths, key=lambda path: (os.path.getmtime(path), path)):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            records.append(json.load(f))
+    return records
+
+def extract_key(urls, **kwargs):
+    """Fixture key of an extract request"""
+    return hashlib.sha256(json.dumps({"urls": list(urls), "options": kwargs}, sort_keys=True).encode("utf-8")).hexdigest()
+
+class RecordingClient:
+    """Async Tavily client wrapper that saves every search and extract response as a fixture"""
+
+    def __init__(self, client, fixture_dir=DEFAULT_FIXTURE_DIR):
+        self.client = client
+        self.fixture_dir = fixture_dir
+        self.recorded = 0
+
+    async def search(self, query, **kwargs):
+        response = await self.client.search(query, **kwargs)
+        write_fixture(self.fixture_dir, "search", cache_key(query, **kwargs), dict(kwargs, query=query), response)
+        self.recorded += 1
+        return response
+
+    async def extract(self, urls, **kwargs):
+        response = await self.client.extract(urls, **kwargs)
+        write_fixture(self.fixture_dir, "extract", extract_key(urls, **kwargs), dict(kwargs, urls=list(urls)), response)
+        self.recorded += 1
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+def fixture_pages(records):
+    """Every distinct page (url, title, raw_content) found in fixture records, in recording order"""
+    pages = {}
+    for record in records:
+        for result in record["response"].get("results", []):
+            url = result.get("url")
+            if url and (url not in pages or not pages[url].get("raw_content")):
+                pages[url] = {"url": url, "title": result.get("title", ""), "raw_content": result.get("raw_content") or ""}
+    return list(pages.values())
+
+def seed_pages(source_root, page_words=600, seed=7):
+    """Build synthetic pages from the URL/Email/Phone rows of every CSV below source_root
+
+    Each distinct URL becomes one page of filler text with its emails and phones
+    scattered through it, so extraction finds the same contacts the real runs did.
+    """
+    contacts = {}
+    for folder, _, file_names in sorted(os.walk(source_root)):
+        for file_name in sorted(file_names):
+            if not file_name.endswith(".csv"):
+                continue
+            with open(os.path.join(folder, file_name), mode="r", newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    url = (row.get("URL") or "").strip()
+                    if not url.startswith("http"):
+                        continue
+                    page = contacts.setdefault(url, {"emails": set(), "phones": set()})
+                    email = (row.get("Email") or "").strip()
+                    if "@" in email:
+                        page["emails"].add(email)
+                    for phone in (row.get("Phone") or "").split(";"):
+                        phone = phone.strip()
+                        if phone and phone != "No phone found":
+                            page["phones"].add(phone)
+
+    rng = random.Random(seed)
+    pages = []
+    for url, page in contacts.items():
+        words = [rng.choice(FILLER_WORDS) for _ in range(page_words)]
+        for contact in sorted(page["emails"]) + sorted(page["phones"]):
+            words.insert(rng.randrange(len(words) + 1), f" {contact} ")
+        pages.append({"url": url, "title": url_domain(url), "raw_content": " ".join(words)})
+    return pages
+
+def scale_pages(pages, scale):
+    """Repeat pages scale times under distinct registered domains (copyN-<domain>), contacts included"""
+    scaled = list(pages)
+    for copy_number in range(1, scale):
+        for page in pages:
+            domain = url_domain(page["url"])
+            if not domain:
+                continue
+            prefix = f"copy{copy_number}-"
+            scaled.append({
+                "url": page["url"].replace(domain, prefix + domain, 1),
+                "title": page["title"],
+                "raw_content": page["raw_content"].replace("@", "@" + prefix),
+            })
+    return scaled
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers (0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+class ReplayClient:
+    """Offline stand-in for AsyncTavilyClient that answers from fixture records
+
+    A search recorded with the same parameters gets its recorded response.
+    Any other search gets the next max_results pages of the page pool whose
+    domain is not excluded, until the pool runs dry. Every call sleeps for a
+    lognormal latency around `latency` seconds and fails with a throttle
+    error at error_rate.
+    """
+
+    def __init__(self, records=(), pages=None, latency=0.3, jitter=0.5, error_rate=0.0, seed=7):
+        self.responses = {record["key"]: record["response"] for record in records if record.get("key")}
+        self.pages = pages if pages is not None else fixture_pages(records)
+        self.pages_by_url = {page["url"]: page for page in self.pages}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._cursor = 0
+        self.latencies = {"search": [], "extract": []}
+        self.response_bytes = 0
+        self.errors = 0
+
+    async def _respond(self, method, make_response):
+        started = time.perf_counter()
+        if self.latency > 0:
+            await asyncio.sleep(self.latency * self._rng.lognormvariate(0, self.jitter))
+        if self._rng.random() < self.error_rate:
+            self.errors += 1
+            self.latencies[method].append(time.perf_counter() - started)
+            raise UsageLimitExceededError("Replayed throttle error")
+        response = make_response()
+        self.response_bytes += sum(len(result.get("raw_content") or "") for result in response.get("results", []))
+        self.latencies[method].append(time.perf_counter() - started)
+        return response
+
+    def _next_pages(self, max_results, exclude_domains):
+        excluded = {domain.strip().lower() for domain in exclude_domains or []}
+        results = []
+        while self._cursor < len(self.pages) and len(results) < max_results:
+            page = self.pages[self._cursor]
+            self._cursor += 1
+            if url_domain(page["url"]) not in excluded:
+                results.append(dict(page, score=1.0 - len(results) / max_results))
+        return results
+
+    async def search(self, query, max_results=20, include_raw_content=False, exclude_domains=None, **kwargs):
+        def make_response():
+            key = cache_key(query, max_results=max_results, include_raw_content=include_raw_content,
+                            exclude_domains=exclude_domains, **kwargs)
+            if key in self.responses:
+                return copy.deepcopy(self.responses[key])
+            results = self._next_pages(max_results, exclude_domains)
+            if not include_raw_content:
+                results = [dict(result, raw_content=None) for result in results]
+            return {"query": query, "results": results, "response_time": self.latency}
+        return await self._respond("search", make_response)
+
+    async def extract(self, urls, **kwargs):
+        def make_response():
+            key = extract_key(urls, **kwargs)
+            if key in self.responses:
+                return copy.deepcopy(self.responses[key])
+            found = [self.pages_by_url[url] for url in urls if url in self.pages_by_url]
+            return {
+                "results": [{"url": page["url"], "raw_content": page["raw_content"]} for page in found],
+                "failed_results": [{"url": url, "error": "not in fixtures"} for url in urls if url not in self.pages_by_url],
+            }
+        return await self._respond("extract", make_response)
+
+    def stats(self):
+        """Call counts and latency percentiles per method"""
+        stats = {"errors": self.errors, "response_bytes": self.response_bytes, "pages_served": self._cursor}
+        for method, latencies in self.latencies.items():
+            stats[f"{method}_calls"] = len(latencies)
+            stats[f"{method}_p50"] = percentile(latencies, 0.50)
+            stats[f"{method}_p99"] = percentile(latencies, 0.99)
+        return stats
+
+def record(search_term, iterations, fixture_dir, **search_options):
+    """Run a real search and save every API response it receives as a fixture"""
+    import business_search_complete
+
+    recorder = RecordingClient(business_search_complete.init_tavily(use_cache=False), fixture_dir)
+    with tempfile.TemporaryDirectory(prefix="record_") as output_folder:
+        business_search_complete.search_businesses(search_term, output_folder, iterations, client=recorder,
+                                                   **search_options)
+    return recorder.recorded
+
+def main():
+    """Record fixtures from the live API, or build them from existing results"""
+    parser = argparse.ArgumentParser(description='Record search fixtures for offline replay')
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURE_DIR, help=f'Fixture folder (default: {DEFAULT_FIXTURE_DIR})')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = subparsers.add_parser('record', help='Run a real search and save its API responses (spends credits)')
+    record_parser.add_argument('search_term', help='Search term')
+    record_parser.add_argument('--iterations', type=int, default=3, help='Number of search iterations (default: 3)')
+    record_parser.add_argument('--two-phase', action='store_true', help='Record search listings plus extract calls')
+
+    seed_parser = subparsers.add_parser('seed', help='Build search fixtures from the result CSVs of earlier runs')
+    seed_parser.add_argument('--source', default='business_searches', help='Folder holding result CSVs (default: business_searches)')
+    seed_parser.add_argument('--scale', type=int, default=1, help='Repeat the pages under this many domain copies')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        count = record(args.search_term, args.iterations, args.fixtures, two_phase=args.two_phase)
+        print(f"📼 Recorded {count} responses to {args.fixtures}")
+    elif args.command == 'seed':
+        pages = scale_pages(seed_pages(args.source), args.scale)
+        for start in range(0, len(pages), 20):
+            results = pages[start:start + 20]
+            request = {"query": f"seed {start // 20}", "max_results": 20, "include_raw_content": True}
+            write_fixture(args.fixtures, "search", f"seed_{start // 20:06d}", request, {"query": request["query"], "results": results})
+        print(f"🌱 Wrote {len(pages)} pages from {args.source} to {args.fixtures}")
+
+if __name__ == "__main__":
+    main()
@@ -1,108 +1,281 @@
-from tavily import TavilyClient
+from tavily import TavilyClient, AsyncTavilyClient
+import asyncio
 import os
 import re
-import csv
-from urllib.parse import urlparse
 import time
 import argparse
+from contextlib import nullcontext
 from datetime import datetime
 import pytz
 
+from search_cache import SearchCache, CachedSearchClient
+from contact_extractor import extract_contacts, extract_contacts_batch_async
+from contact_index import ContactIndex, DEFAULT_INDEX_PATH
+from seen_filter import SeenFilter, DEFAULT_FILTER_PATH, DEFAULT_GLOBAL_SUPPRESSION, domain_key, email_key
+from csv_merge import stream_merge
+from rate_limiter import RateLimitedClient, RateLimitedSyncClient, get_rate_limiter
+from http_transport import use_shared_transport, get_transport, DEFAULT_SHARED_TRANSPORT
+from run_registry import RunRegistry, DEFAULT_REGISTRY_PATH, write_manifest
+from domain_suppression import DomainSuppressor, DEFAULT_EXCLUDE_BUDGET, EXCLUDE_POLICIES, url_domain
+from content_archive import ContentArchiveWriter, ARCHIVE_FOLDER, DEFAULT_ARCHIVE
+from early_stopping import YieldTracker, DEFAULT_PATIENCE, DEFAULT_MIN_NEW_EMAILS
+from metrics import OUTPUT_WRITE_SECONDS, track_run
+from cancellation import SearchCancelled, run_cancellable
+from output_sink import (open_sink, sink_path, iter_sink_rows, is_sink_file, page_rows, ProgressSummary,
+                         DEFAULT_OUTPUT_FORMAT, DEFAULT_DURABILITY, OUTPUT_FORMATS, DURABILITY_LEVELS)
+
+# Shared Tavily clients, created by init_tavily()
+tavily = None
+async_tavily = None
+
+# Global contact index shared by every run, created by init_contact_index()
+contact_index = None
+
+# Registry of run manifests, created by init_run_registry()
+run_registry = None
+
+# Filter of every domain and email collected by any run, created by init_seen_filter()
+seen_filter = None
+
+# Query phrasings run as independent streams within one search cell
+QUERY_VARIANTS = ["{term}", "{term} contact us", "{term} email address", "{term} directory"]
+DEFAULT_STREAMS = 3
+DEFAULT_CONCURRENCY = 3
+MAX_RESULTS = 20
+
+# Two-phase search: list results without page bodies, then extract only the new ones
+DEFAULT_TWO_PHASE = os.getenv("SEARCH_TWO_PHASE", "0") == "1"
+EXTRACT_BATCH_SIZE = 20  # URLs per extract call (the API maximum)
+DEFAULT_EXTRACT_CONCURRENCY = int(os.getenv("EXTRACT_CONCURRENCY", "2"))
+
+# Print every result row instead of a periodic summary
+DEFAULT_LOG_ROWS = os.getenv("SEARCH_LOG_ROWS", "0") == "1"
+
 def extract_email(text):
     """Extract first email found in a string"""
-    if not text:
-        return None
-    
-    # Find all potential email matches
-    pattern = r'\b[a-zA-Z0-9]([a-zA-Z0-9._%-]*[a-zA-Z0-9])?@[a-zA-Z0-9]([a-zA-Z0-9.-]*[a-zA-Z0-9])?\.[a-zA-Z]{2,}\b'
-    matches = re.findall(pattern, text)
-    
-    if not matches:
-        return None
-    
-    # Reconstruct full matches and validate them
-    full_matches = re.finditer(pattern, text)
-    for match in full_matches:
-        email = match.group(0)
-        
-        # Filter out common false positives
-        if (
-            # Skip image files and other file extensions
-            email.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.bmp')) or
-            # Skip if it contains file-like patterns
-            '@2x.' in email.lower() or
-            '@3x.' in email.lower() or
-            # Skip if domain part looks like a file extension
-            email.split('@')[1].split('.')[0].isdigit() or
-            # Skip very short domains (less than 2 chars before TLD)
-            len(email.split('@')[1].split('.')[0]) < 2
-        ):
-            continue
-            
-        # Return the first valid email found
-        return email
-    
-    return None
-
+    emails = extract_contacts(text)["emails"]
+    return emails[0] if emails else None
 
+def emit_progress(progress, event_type, **fields):
+    """Send a structured progress event to an optional callback"""
+    if progress is not None:
+        progress({"type": event_type, "time": time.time(), **fields})
 
 def sanitize_filename(term):
     """Clean a filename from a search term"""
     return re.sub(r'[^\w\s-]', '', term).replace(' ', '_').lower()
 
-def search_businesses(search_term, output_folder, iterations=10):
-    """Search for businesses and save results to CSV"""
-    print(f"\n🔍 Running search for: {search_term} ({iterations} iterations)")
-    
-    filename = os.path.join(output_folder, f"{sanitize_filename(search_term)}.csv")
+def query_streams(search_term, streams):
+    """Build disjoint query phrasings for a search term, one per stream"""
+    streams = max(1, min(streams, len(QUERY_VARIANTS)))
+    return [variant.format(term=search_term) for variant in QUERY_VARIANTS[:streams]]
+
+async def fetch_raw_content(client, results, semaphore, batch_size=EXTRACT_BATCH_SIZE):
+    """Fill in raw_content for search results with batched extract calls
+
+    Batches run concurrently, bounded by semaphore. URLs that fail to extract
+    keep an empty raw_content, so they are still written as pages without
+    contacts.
+    """
+    urls = [result["url"] for result in results if result.get("url")]
+
+    async def extract_batch(batch):
+        async with semaphore:
+            try:
+                response = await client.extract(batch)
+            except Exception as e:
+                print(f"    ⚠️ Extract failed for {len(batch)} URLs: {e}")
+                return {}
+        return {item.get("url"): item.get("raw_content") or "" for item in response.get("results", [])}
+
+    contents = {}
+    for batch_contents in await asyncio.gather(*(
+        extract_batch(urls[start:start + batch_size]) for start in range(0, len(urls), batch_size)
+    )):
+        contents.update(batch_contents)
+    for result in results:
+        result["raw_content"] = contents.get(result.get("url"), "")
+    return results
+
+def load_seen_domains(filename):
+    """Load the domains already present in a results file"""
     seen_domains = set()
+    for row in iter_sink_rows(filename):
+        domain = url_domain(row.get("URL"))
+        if domain:
+            seen_domains.add(domain)
+    return seen_domains
+
+async def async_search_businesses(search_term, output_folder, iterations=10, streams=DEFAULT_STREAMS,
+                                  concurrency=DEFAULT_CONCURRENCY, client=None, location=None,
+                                  exclude_budget=DEFAULT_EXCLUDE_BUDGET, exclude_policy="recent", progress=None,
+                                  early_stop=False, patience=DEFAULT_PATIENCE, min_new_emails=DEFAULT_MIN_NEW_EMAILS,
+                                  two_phase=DEFAULT_TWO_PHASE, extract_concurrency=DEFAULT_EXTRACT_CONCURRENCY,
+                                  archive_folder=None, output_format=DEFAULT_OUTPUT_FORMAT, durability=DEFAULT_DURABILITY,
+                                  log_rows=DEFAULT_LOG_ROWS, cancel=None):
+    """Search for businesses with concurrent query streams and save results through an output sink
+
+    The iteration budget is split across the query streams. Streams run in rounds;
+    each round excludes the top seen domains and filters the rest out locally.
+    With early_stop, a stream stops once `patience` consecutive iterations found
+    (almost) no new domains or emails. With two_phase, searches skip page bodies
+    and only results from new domains are fetched, with batched extract calls.
+    With archive_folder, every scanned page is archived for offline re-extraction.
+    Once init_seen_filter() has run, results from domains harvested by any
+    other run (earlier or concurrent) are filtered like this run's, emails collected before are
+    left out of the output (their pages keep their phone numbers), and what this run writes is
+    added to the filter.
+    Results go to one buffered sink (CSV, gzip JSONL or SQLite, see output_sink)
+    flushed after each iteration according to durability. Rows are printed only
+    with log_rows; otherwise a summary is printed every few seconds.
+    Once the optional cancel token is cancelled, in-flight requests are
+    aborted and the search stops, keeping the rows written so far
+    (the returned stats then have cancelled=True).
+    Progress events go to the optional progress callback. Returns the domain suppression metrics, the pages
+    scanned, rows written and emails found, and the per-stream yield curves.
+    """
+    client = client or async_tavily
+    queries = query_streams(search_term, min(streams, iterations) if iterations else 1)
+    print(f"\n🔍 Running search for: {search_term} ({iterations} iterations, {len(queries)} streams)")
+    
+    filename = sink_path(output_folder, sanitize_filename(search_term), output_format)
 
     # Load existing URLs to avoid duplicates
-    if os.path.exists(filename):
-        with open(filename, mode="r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                url = row.get("URL")
-                if url:
-                    parsed = urlparse(url)
-                    if parsed.netloc:
-                        seen_domains.add(parsed.netloc)
-
-    for i in range(iterations):
-        print(f"  ▶ Run {i + 1}/{iterations}", flush=True)
-
-        # Perform the Tavily search
-        search_response = tavily.search(
-            search_term,
-            max_results=20,
-            include_raw_content=True,
-            exclude_domains=list(seen_domains)
-        )
-
-        # Write results to CSV
-        with open(filename, mode="a", newline="", encoding="utf-8") as csv_file:
-            writer = csv.writer(csv_file)
-            if csv_file.tell() == 0:
-                writer.writerow(["URL", "Email"])  # Header
-
-            for result in search_response.get("results", []):
-                url = result.get("url")
-                raw_content = result.get("raw_content")
-                email = extract_email(raw_content)
-
-                if url:
-                    parsed = urlparse(url)
-                    if parsed.netloc:
-                        seen_domains.add(parsed.netloc)
-
-                writer.writerow([url, email if email else "No email found"])
-                print(f"    ✔ {url}, {email if email else 'No email found'}")
-
-        # Optional delay to avoid rate limiting
-        # time.sleep(2)
+    suppressor = DomainSuppressor(exclude_budget, exclude_policy, seen_filter)
+    suppressor.seed(load_seen_domains(filename))
+
+    # Split the iteration budget across the streams
+    budgets = [iterations // len(queries) + (1 if i < iterations % len(queries) else 0) for i in range(len(queries))]
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    extract_semaphore = asyncio.Semaphore(max(1, extract_concurrency))
+    completed = 0
+    counts = {"pages": 0, "rows_written": 0, "emails_found": 0, "emails_already_collected": 0}
+    tracker = YieldTracker(MAX_RESULTS, early_stop, patience, min_new_emails)
+
+    summary = ProgressSummary(search_term)
+
+    # The archive is closed (gzip trailer and index written) however the search ends
+    with ContentArchiveWriter(archive_folder) if archive_folder else nullcontext() as archive, \
+            open_sink(filename, output_format, durability) as sink:
+        async def run_query(query, exclude_domains):
+            nonlocal completed
+            # Perform the Tavily search
+            async with semaphore:
+                search_response = await client.search(
+                    query,
+                    max_results=MAX_RESULTS,
+                    include_raw_content=not two_phase,
+                    exclude_domains=exclude_domains
+                )
+
+            completed += 1
+            iteration = completed
+            print(f"  ▶ Run {iteration}/{iterations} ({query})", flush=True)
+
+            # Drop results from domains we already have before scanning (or fetching) them;
+            # the filter claims the new domains so concurrent streams do not fetch them again
+            results = search_response.get("results", [])
+            del search_response
+            fresh_results = suppressor.filter_results(results)
+            if two_phase and fresh_results:
+                await fetch_raw_content(client, fresh_results, extract_semaphore)
+
+            if archive is not None:
+                for result in fresh_results:
+                    archive.append(result.get("url"), query, result.get("raw_content"))
+
+            # Write every page (one row per email in the CSV format) as results arrive
+            new_emails = []
+            page_contacts = await extract_contacts_batch_async(fresh_results)
+            # Page bodies are not needed once scanned
+            for result in results:
+                result.pop("raw_content", None)
+            pages = []
+            for result, contacts in zip(fresh_results, page_contacts):
+                url = contacts["url"]
+                counts["pages"] += 1
+                counts["emails_found"] += len(contacts["emails"])
+
+                if contact_index is not None:
+                    contact_index.add_page(url, contacts["emails"], contacts["phones"], search_term, location, output_folder)
+
+                # Emails collected by earlier runs are not written again; a page whose emails were all
+                # collected before is still written for its phone numbers
+                emails = contacts["emails"]
+                if seen_filter is not None and emails:
+                    emails = [email for email in emails if email_key(email) not in seen_filter]
+                    counts["emails_already_collected"] += len(contacts["emails"]) - len(emails)
+                    if not emails and not contacts["phones"]:
+                        continue
+                new_emails.extend(emails)
+
+                page = {"url": url, "title": result.get("title"), "score": result.get("score"), "query": query,
+                        "search_term": search_term, "location": location, "emails": emails,
+                        "phones": contacts["phones"], "found_at": time.time()}
+                pages.append(page)
+                if log_rows:
+                    for row in page_rows(page):
+                        print(f"    ✔ {', '.join(row)}")
+            with OUTPUT_WRITE_SECONDS.time(format=output_format):
+                counts["rows_written"] += sink.write_pages(pages)
+            # Added once written, so later runs (in any process) skip these domains and emails
+            if seen_filter is not None:
+                seen_filter.add_many([domain_key(domain) for domain in (url_domain(result.get("url")) for result in fresh_results) if domain]
+                                     + [email_key(email) for page in pages for email in page["emails"]])
+            if not log_rows:
+                summary.update(counts)
+
+            emit_progress(progress, "iteration_done", search_term=search_term, location=location, query=query,
+                          iteration=iteration, iterations=iterations, results=len(results),
+                          new_domains=len(fresh_results), new_emails=new_emails)
+            return {
+                "domains": [url_domain(result.get("url")) for result in results],
+                "results": len(results),
+                "new_domains": len(fresh_results),
+                "emails": new_emails,
+            }
+
+        # Every stream in a round excludes the same snapshot of seen domains, so
+        # reruns send identical requests and can be answered from the cache
+        cancelled = False
+        try:
+            for round_index in range(max(budgets)):
+                if cancel is not None:
+                    cancel.raise_if_cancelled()
+                active_queries = [query for query, budget in zip(queries, budgets)
+                                  if budget > round_index and not tracker.is_stopped(query)]
+                if not active_queries:
+                    break
+                exclude_domains = suppressor.exclude_list()
+                outcomes = await run_cancellable(asyncio.gather(*(run_query(query, exclude_domains) for query in active_queries)), cancel)
+                # Rank domains and measure yield in stream order so reruns build the same exclude lists and stop at the same point
+                for query, outcome in zip(active_queries, outcomes):
+                    suppressor.observe(outcome["domains"])
+                    if tracker.record(query, outcome["results"], outcome["new_domains"], outcome["emails"]):
+                        print(f"  ⏹  Stopping stream '{query}' after {round_index + 1} iterations: yield dropped for {patience} in a row")
+                        emit_progress(progress, "stream_stopped", search_term=search_term, location=location, query=query,
+                                      iteration=round_index + 1, budget=budgets[queries.index(query)])
+        except SearchCancelled:
+            cancelled = True
+            print(f"  🛑 Search cancelled after {counts['pages']} pages")
+
+    if archive is not None:
+        counts["archived_pages"] = archive.records
+    if not log_rows:
+        summary.update(counts, force=True)
+
+    stats = suppressor.stats()
+    print(f"🧮 Sent {stats['avg_excluded_sent']:.0f} excluded domains per request; "
+          f"{stats['results_wasted']}/{stats['results_total']} results were from already-seen domains "
+          f"({stats['results_seen_by_other_runs']} harvested by other runs, earlier or concurrent)")
+    return dict(stats, **counts, **tracker.stats(), cancelled=cancelled)
+
+def search_businesses(search_term, output_folder, iterations=10, **search_options):
+    """Search for businesses and save results to CSV"""
+    return asyncio.run(async_search_businesses(search_term, output_folder, iterations, **search_options))
 
 def merge_and_clean_results(input_folder, output_folder):
-    """Merge and clean all CSV results into a single file"""
+    """Merge and clean all result files (any output format) into a single CSV and return its path and the merge stats"""
     print(f"\n🧹 Merging and cleaning results from {input_folder}")
     
     # Create output folder
@@ -114,51 +287,169 @@ def merge_and_clean_results(input_folder, output_folder):
     # Email validation regex
     email_regex = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
     
-    # Track unique contacts (by email or URL if no email)
-    seen_contacts = set()
-    cleaned_rows = []
-    
-    # Process each CSV file in the input folder
-    for file_name in os.listdir(input_folder):
-        if file_name.endswith(".csv"):
-            file_path = os.path.join(input_folder, file_name)
-            with open(file_path, mode="r", encoding="utf-8") as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    email = row.get("Email", "").strip()
-                    url = row.get("URL", "").strip()
-
-                    # Clean up "No email found" entries
+    def cleaned_rows():
+        # Stream each result file in the input folder
+        for file_name in os.listdir(input_folder):
+            if is_sink_file(file_name):
+                for row in iter_sink_rows(os.path.join(input_folder, file_name)):
+                    email = (row.get("Email") or "").strip()
+                    url = (row.get("URL") or "").strip()
+                    phone = (row.get("Phone") or "").strip()
+
+                    # Clean up "No email found" / "No phone found" entries
                     if email == "No email found":
                         email = ""
-
-                    # Validate email
-                    valid_email = email and email_regex.match(email)
+                    if phone == "No phone found":
+                        phone = ""
 
                     # Skip if no valid email
-                    if not valid_email:
+                    if not (email and email_regex.match(email)):
                         continue
 
-                    # Use email as primary key for deduplication
-                    contact_key = email.lower()
-                    if contact_key in seen_contacts:
-                        continue  # Skip duplicate contacts
-
-                    seen_contacts.add(contact_key)
-                    cleaned_rows.append({
+                    yield {
                         "URL": url,
                         "Email": email,
+                        "Phone": phone,
+                        "Organization": url_domain(url),  # Registered domain, for grouping contacts by site
                         "SourceFile": file_name  # Add source file name
-                    })
+                    }
 
-    # Write the final merged and cleaned CSV
-    with open(output_file, mode="w", newline="", encoding="utf-8") as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=["URL", "Email", "SourceFile"])
-        writer.writeheader()
-        writer.writerows(cleaned_rows)
+    # Use email as primary key for deduplication
+    stats = stream_merge(cleaned_rows(), output_file, ["URL", "Email", "Phone", "Organization", "SourceFile"],
+                         key=lambda row: row["Email"].lower())
+
+    print(f"✅ Cleaned CSV saved to: {output_file} ({stats['rows_written']} unique emails)")
+    return output_file, stats
+
+def init_tavily(api_key=None, use_cache=True, shared_transport=DEFAULT_SHARED_TRANSPORT):
+    """Create the shared Tavily clients used by search_businesses"""
+    global tavily, async_tavily
+    api_key = api_key or os.getenv("TAVILY_API_KEY")
+    # Every outgoing call goes through the process-wide rate limiter
+    tavily = RateLimitedSyncClient(TavilyClient(api_key))
+    client = AsyncTavilyClient(api_key)
+    if shared_transport:
+        # Reuse keep-alive connections across calls, runs and cells instead of connecting per call
+        client = use_shared_transport(client)
+    async_tavily = RateLimitedClient(client)
+    if use_cache:
+        # Answer repeated searches from the on-disk response cache
+        async_tavily = CachedSearchClient(async_tavily, SearchCache())
+    return async_tavily
+
+def init_contact_index(path=DEFAULT_INDEX_PATH):
+    """Open the global contact index that search_businesses writes into"""
+    global contact_index
+    contact_index = ContactIndex(path)
+    return contact_index
+
+def init_seen_filter(path=DEFAULT_FILTER_PATH):
+    """Open the global filter of collected domains and emails that search_businesses suppresses with"""
+    global seen_filter
+    seen_filter = SeenFilter(path)
+    return seen_filter
+
+def init_run_registry(path=DEFAULT_REGISTRY_PATH):
+    """Open the run registry that run_search records manifests in"""
+    global run_registry
+    run_registry = RunRegistry(path)
+    return run_registry
+
+def create_run_folder(parent_folder, sanitized_term, timestamp):
+    """Create a new run folder and return its id and path, never reusing a concurrent run's folder"""
+    run_id = f"{sanitized_term}_{timestamp}"
+    for attempt in range(2, 100):
+        run_folder = os.path.join(parent_folder, run_id)
+        try:
+            os.makedirs(run_folder)
+            return run_id, run_folder
+        except FileExistsError:
+            run_id = f"{sanitized_term}_{timestamp}_{attempt}"
+    raise FileExistsError(f"Could not create a run folder for {sanitized_term} in {parent_folder}")
+
+def run_search(search_term, iterations=10, skip_merge=False, parent_folder="business_searches", archive=DEFAULT_ARCHIVE,
+               **search_options):
+    """Run the complete search and clean workflow for one search term and return the run manifest
+
+    The manifest (run id, query, paths, counts, timings and a summary of the
+    metrics recorded during the run) is written to the
+    run folder and recorded in the run registry; manifest["result_path"] is the
+    merged CSV, or the search folder when the merge is skipped. A search
+    stopped through search_options["cancel"] ends with status "cancelled" and
+    its partial results merged. With archive,
+    scanned pages are kept in the run's archive folder for content_archive.py
+    reextract.
+    """
+    # Setup unique folders based on search term and timestamp
+    israel_tz = pytz.timezone('Asia/Jerusalem')
+    timestamp = datetime.now(israel_tz).strftime('%Y%m%d_%H%M%S')
+    sanitized_term = sanitize_filename(search_term)
+    
+    # Create nested folder structure
+    os.makedirs(parent_folder, exist_ok=True)
+    run_id, run_folder = create_run_folder(parent_folder, sanitized_term, timestamp)
+    
+    search_results_folder = os.path.join(run_folder, "search")
+    final_results_folder = os.path.join(run_folder, "final")
+    os.makedirs(search_results_folder, exist_ok=True)
 
-    print(f"✅ Cleaned CSV saved to: {output_file} ({len(cleaned_rows)} unique emails)")
-    return output_file
+    manifest = {
+        "run_id": run_id,
+        "query": search_term,
+        "location": search_options.get("location"),
+        "iterations": iterations,
+        "run_folder": run_folder,
+        "search_csv": sink_path(search_results_folder, sanitized_term, search_options.get("output_format", DEFAULT_OUTPUT_FORMAT)),
+        "result_path": None,
+        "archive_folder": os.path.join(run_folder, ARCHIVE_FOLDER) if archive else None,
+        # Suppressed runs hold only what no earlier run collected, so they are never reused as a full result
+        "global_suppression": seen_filter is not None,
+        # The global suppression filter the run wrote through, if any (re-extraction applies it too)
+        "seen_filter": seen_filter.path if seen_filter is not None else None,
+        "status": "running",
+        "started_at": time.time(),
+        "finished_at": None,
+        "timings": {},
+        "counts": {},
+    }
+    try:
+        with track_run() as run_metrics:
+            # Step 1: Search for businesses
+            search_stats = search_businesses(search_term, search_results_folder, iterations,
+                                             archive_folder=manifest["archive_folder"], **search_options)
+            manifest["timings"]["search_seconds"] = time.time() - manifest["started_at"]
+            manifest["counts"] = {key: search_stats[key] for key in ("pages", "rows_written", "emails_found")}
+            manifest["counts"]["iterations_run"] = search_stats["iterations_run"]
+            if archive:
+                manifest["counts"]["archived_pages"] = search_stats["archived_pages"]
+            manifest["suppression"] = {key: search_stats[key] for key in ("known_domains", "results_total", "results_wasted",
+                                                                          "results_seen_by_other_runs", "emails_already_collected")}
+            manifest["early_stop"] = {key: search_stats[key] for key in ("early_stop", "stopped_streams")}
+            manifest["yield_curves"] = search_stats["yield_curves"]
+            manifest["cancelled"] = search_stats["cancelled"]
+        
+            # Step 2: Merge and clean results (unless skipped); a cancelled search merges what it found
+            if skip_merge:
+                manifest["result_path"] = search_results_folder
+                manifest["counts"]["result_count"] = search_stats["rows_written"]
+            else:
+                merge_started = time.time()
+                manifest["result_path"], merge_stats = merge_and_clean_results(search_results_folder, final_results_folder)
+                manifest["timings"]["merge_seconds"] = time.time() - merge_started
+                manifest["counts"]["result_count"] = merge_stats["rows_written"]
+                manifest["counts"]["duplicates"] = merge_stats["duplicates"]
+            manifest["status"] = "cancelled" if search_stats["cancelled"] else "completed"
+    except BaseException as e:
+        manifest["status"] = "failed"
+        manifest["error"] = str(e) or type(e).__name__
+        raise
+    finally:
+        manifest["finished_at"] = time.time()
+        manifest["metrics"] = run_metrics.summary()
+        write_manifest(manifest)
+        if run_registry is not None:
+            run_registry.record(manifest)
+    return manifest
 
 def main():
     """Main function to run the complete business search and cleaning workflow"""
@@ -166,7 +457,25 @@ def main():
     parser = argparse.ArgumentParser(description='Search for business contact information and clean results')
     parser.add_argument('search_term', help='The search term to look for (e.g., "restaurants New York City", "law firms Boston")')
     parser.add_argument('--iterations', type=int, default=10, help='Number of search iterations (default: 10)')
+    parser.add_argument('--streams', type=int, default=DEFAULT_STREAMS, help=f'Number of query phrasings searched concurrently (default: {DEFAULT_STREAMS})')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help=f'Maximum search requests in flight (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--exclude-budget', type=int, default=DEFAULT_EXCLUDE_BUDGET, help=f'Maximum domains sent as exclude_domains per request (default: {DEFAULT_EXCLUDE_BUDGET})')
+    parser.add_argument('--exclude-policy', choices=EXCLUDE_POLICIES, default='recent', help='Which seen domains to send when over budget (default: recent)')
+    parser.add_argument('--early-stop', action='store_true', help='Stop query streams once they stop finding new domains and emails')
+    parser.add_argument('--patience', type=int, default=DEFAULT_PATIENCE, help=f'Low-yield iterations in a row before a stream stops (default: {DEFAULT_PATIENCE})')
+    parser.add_argument('--min-new-emails', type=int, default=DEFAULT_MIN_NEW_EMAILS, help=f'New emails an iteration needs to count as productive (default: {DEFAULT_MIN_NEW_EMAILS})')
+    parser.add_argument('--two-phase', action='store_true', default=DEFAULT_TWO_PHASE, help='Search without page bodies and extract only results from new domains')
+    parser.add_argument('--extract-concurrency', type=int, default=DEFAULT_EXTRACT_CONCURRENCY, help=f'Maximum extract calls in flight with --two-phase (default: {DEFAULT_EXTRACT_CONCURRENCY})')
+    parser.add_argument('--archive', action='store_true', default=DEFAULT_ARCHIVE, help='Keep scanned pages in a compressed archive for offline re-extraction')
+    parser.add_argument('--output-format', choices=OUTPUT_FORMATS, default=DEFAULT_OUTPUT_FORMAT, help=f'Search results file format; jsonl and sqlite keep full result metadata (default: {DEFAULT_OUTPUT_FORMAT})')
+    parser.add_argument('--durability', choices=DURABILITY_LEVELS, default=DEFAULT_DURABILITY, help=f'When results are flushed: at close, after each iteration, or fsynced after each iteration (default: {DEFAULT_DURABILITY})')
+    parser.add_argument('--log-rows', action='store_true', default=DEFAULT_LOG_ROWS, help='Print every result row instead of periodic summaries')
     parser.add_argument('--skip-merge', action='store_true', help='Skip the merge and clean step')
+    parser.add_argument('--no-cache', action='store_true', help='Always call the search API instead of reusing cached responses')
+    parser.add_argument('--no-shared-transport', action='store_true', default=not DEFAULT_SHARED_TRANSPORT, help='Open a new connection per API call instead of the shared keep-alive pool')
+    parser.add_argument('--no-index', action='store_true', help='Do not record results in the global contact index')
+    parser.add_argument('--no-registry', action='store_true', help='Do not record the run in the run registry')
+    parser.add_argument('--global-suppression', action='store_true', default=DEFAULT_GLOBAL_SUPPRESSION, help='Skip domains and emails collected by earlier runs, writing only what is new')
     args = parser.parse_args()
 
     # Init Tavily
@@ -175,32 +484,37 @@ def main():
         print("❌ Error: TAVILY_API_KEY environment variable not set")
         return
     
-    global tavily
-    tavily = TavilyClient(api_key)
+    init_tavily(api_key, use_cache=not args.no_cache, shared_transport=not args.no_shared_transport)
+    if not args.no_index:
+        init_contact_index()
+    if not args.no_registry:
+        init_run_registry()
+    if args.global_suppression:
+        init_seen_filter()
 
-    # Setup unique folders based on search term and timestamp
-    israel_tz = pytz.timezone('Asia/Jerusalem')
-    timestamp = datetime.now(israel_tz).strftime('%Y%m%d_%H%M%S')
-    sanitized_term = sanitize_filename(args.search_term)
-    
-    # Create nested folder structure
-    parent_folder = "business_searches"
-    run_folder = os.path.join(parent_folder, f"{sanitized_term}_{timestamp}")
-    os.makedirs(run_folder, exist_ok=True)
+    manifest = run_search(args.search_term, args.iterations, skip_merge=args.skip_merge, archive=args.archive,
+                             streams=args.streams, concurrency=args.concurrency,
+                             exclude_budget=args.exclude_budget, exclude_policy=args.exclude_policy,
+                             early_stop=args.early_stop, patience=args.patience, min_new_emails=args.min_new_emails,
+                             two_phase=args.two_phase, extract_concurrency=args.extract_concurrency,
+                             output_format=args.output_format, durability=args.durability, log_rows=args.log_rows)
     
-    search_results_folder = os.path.join(run_folder, "search")
-    final_results_folder = os.path.join(run_folder, "final")
-    os.makedirs(search_results_folder, exist_ok=True)
-
-    # Step 1: Search for businesses
-    search_businesses(args.search_term, search_results_folder, args.iterations)
+    if isinstance(async_tavily, CachedSearchClient):
+        stats = async_tavily.cache.stats()
+        print(f"💾 Search cache: {stats['hits']} hits, {stats['misses']} misses")
+    limits = get_rate_limiter().stats()
+    print(f"🚦 Rate limiter: {limits['successes']} calls, {limits['throttled']} throttled, concurrency limit {limits['concurrency_limit']}")
+    if not args.no_shared_transport:
+        transport = get_transport().stats()
+        print(f"🔌 Connections: {transport['reused_connections']}/{transport['requests']} requests reused one, "
+              f"{transport['hedge_wins']}/{transport['hedges']} hedged requests won")
     
-    # Step 2: Merge and clean results (unless skipped)
     if not args.skip_merge:
-        final_file = merge_and_clean_results(search_results_folder, final_results_folder)
-        print(f"\n🎉 Complete workflow finished! Final results in: {final_file}")
+        print(f"\n🎉 Complete workflow finished! Final results in: {manifest['result_path']}")
     else:
-        print(f"\n✅ Search completed. Raw results in: {search_results_folder}")
+        print(f"\n✅ Search completed. Raw results in: {manifest['result_path']}")
+    print(f"🗂  Run {manifest['run_id']}: {manifest['counts']['result_count']} results from "
+          f"{manifest['counts']['iterations_run']}/{args.iterations} iterations in {manifest['finished_at'] - manifest['started_at']:.1f}s")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,59 @@
+import asyncio
+import threading
+import time
+
+# How often a token re-runs its check (e.g. a job store lookup) and how often waiting code polls it
+DEFAULT_POLL_INTERVAL = 0.5
+
+class SearchCancelled(Exception):
+    """Raised inside a search once its cancellation token is cancelled"""
+
+class CancellationToken:
+    """Cooperative cancellation flag for one job, shared by its threads and event loops
+
+    cancel() sets it in this process. An optional check callable (e.g. "was
+    cancellation requested in the job store?") lets another process cancel it;
+    it is called at most once per poll_interval.
+    """
+
+    def __init__(self, check=None, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.check = check
+        self.poll_interval = poll_interval
+        self._event = threading.Event()
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        if self._event.is_set():
+            return True
+        if self.check is not None:
+            with self._lock:
+                now = time.monotonic()
+                if now - self._last_check >= self.poll_interval:
+                    self._last_check = now
+                    if self.check():
+                        self._event.set()
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise SearchCancelled()
+
+async def run_cancellable(awaitable, token):
+    """Await awaitable, cancelling it (and the API requests it is waiting on) as soon as token is cancelled"""
+    if token is None:
+        return await awaitable
+    task = asyncio.ensure_future(awaitable)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=token.poll_interval)
+        if done:
+            return task.result()
+        if token.cancelled:
+            task.cancel()
+            # Let the cancelled work unwind (close files, release rate limiter slots) before returning
+            await asyncio.gather(task, return_exceptions=True)
+            raise SearchCancelled()
@@ -0,0 +1,184 @@
+import asyncio
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from metrics import EXTRACTION_SECONDS
+
+try:
+    import regex
+except ImportError:  # regex is optional, re is used when it's missing
+    regex = None
+
+# One compiled pattern scans a page for every contact field in a single pass.
+# Every quantifier is bounded (RFC 5321 length limits) so a scan is linear in the page size.
+EMAIL_PATTERN = r'[a-zA-Z0-9](?:[a-zA-Z0-9._%-]{0,62}[a-zA-Z0-9])?@[a-zA-Z0-9](?:[a-zA-Z0-9.-]{0,251}[a-zA-Z0-9])?\.[a-zA-Z]{2,63}'
+# A country code without '+' (1 800 555 1234) is tried first so the full number wins over a shorter prefix
+PHONE_PATTERN = (r'\d{1,3}[\s.-](?:\(\d{3}\)[\s.-]?|\d{3}[\s.-])\d{3}[\s.-]\d{4}'
+                 r'|(?:\+\d{1,3}[\s.-]?)?(?:\(\d{1,4}\)[\s.-]?|\d{1,4}[\s.-])?\d{3,4}[\s.-]?\d{3,5}')
+# Phones never start or end inside a longer run of digit groups (ISBNs such as 978-0-306-40615-7)
+CONTACT_PATTERN = rf'\b(?P<email>{EMAIL_PATTERN})\b|(?<![\w+])(?<!\d[.-])(?P<phone>{PHONE_PATTERN})(?![\w@])(?![.-]\d)'
+CONTACT_REGEX = re.compile(CONTACT_PATTERN)
+CONTACT_REGEX_TIMEOUT = regex.compile(CONTACT_PATTERN) if regex else None
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.bmp')
+PHONE_SEPARATORS = frozenset('+-.() ')
+
+# Pages are scanned in chunks that overlap by more than the longest possible match. The re
+# matcher cannot be interrupted inside a chunk, so the chunk size bounds how far a scan can
+# overrun its time budget (a few milliseconds even on adversarial text)
+CHUNK_SIZE = 16 * 1024
+CHUNK_OVERLAP = 512
+# Matches scanned between deadline checks inside a chunk
+DEADLINE_CHECK_MATCHES = 256
+
+# Matcher backend, per-page time budget (seconds), pool size, and the page size scanned
+# inline instead of in the pool
+CONTACT_MATCHER = os.getenv("CONTACT_MATCHER", "re")
+EXTRACTION_TIME_BUDGET = float(os.getenv("EXTRACTION_TIME_BUDGET", "2.0"))
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(os.cpu_count() or 2)))
+INLINE_MAX_CHARS = int(os.getenv("EXTRACTION_INLINE_MAX_CHARS", str(20 * 1024)))
+
+_extraction_pool = None
+_extraction_pool_lock = threading.Lock()
+
+def is_valid_email(email):
+    """Filter out common email false positives (image names, retina assets, numeric domains)"""
+    lowered = email.lower()
+    if lowered.endswith(IMAGE_EXTENSIONS) or '@2x.' in lowered or '@3x.' in lowered:
+        return False
+    domain_label = lowered.partition('@')[2].partition('.')[0]
+    # Skip domains that look like file extensions or are too short
+    return not domain_label.isdigit() and len(domain_label) >= 2
+
+def is_valid_phone(phone):
+    """Filter out phone false positives (bare ID-like digit runs, too short or too long numbers)"""
+    digits = sum(char.isdigit() for char in phone)
+    if digits < 9 or digits > 15:
+        return False
+    # Unformatted digit runs are usually IDs, timestamps or prices
+    return any(char in PHONE_SEPARATORS for char in phone)
+
+def _scan_chunk(text, start, end, deadline, matcher):
+    """Iterate the contact matches of text[start:end] without copying the page"""
+    if matcher == "regex" and CONTACT_REGEX_TIMEOUT is not None:
+        return CONTACT_REGEX_TIMEOUT.finditer(text, start, end, timeout=max(deadline - time.monotonic(), 0.001))
+    return CONTACT_REGEX.finditer(text, start, end)
+
+def extract_contacts(text, time_budget=None, matcher=None):
+    """Extract every email and phone number found in a string in one scan
+
+    Scanning stops once time_budget seconds have passed and the result is
+    marked timed_out; whatever was found up to that point is still returned.
+    A scan overruns the budget by at most one chunk.
+    """
+    emails = {}
+    phones = {}
+    timed_out = False
+    if not text:
+        return {"emails": [], "phones": [], "timed_out": False}
+
+    matcher = matcher or CONTACT_MATCHER
+    deadline = time.monotonic() + (time_budget if time_budget is not None else EXTRACTION_TIME_BUDGET)
+
+    for chunk_start in range(0, len(text), CHUNK_SIZE):
+        if time.monotonic() > deadline:
+            timed_out = True
+            break
+        # Matches belong to the chunk they start in; the overlap only completes them
+        chunk_end = chunk_start + CHUNK_SIZE
+        try:
+            matches = _scan_chunk(text, chunk_start, min(chunk_end + CHUNK_OVERLAP, len(text)), deadline, matcher)
+            for count, match in enumerate(matches, 1):
+                if match.start() >= chunk_end:
+                    break
+                if count % DEADLINE_CHECK_MATCHES == 0 and time.monotonic() > deadline:
+                    timed_out = True
+                    break
+
+                email = match.group('email')
+                if email is not None:
+                    key = email.lower()
+                    if key not in emails and is_valid_email(email):
+                        emails[key] = email
+                    continue
+
+                phone = match.group('phone').strip()
+                key = ''.join(char for char in phone if char.isdigit())
+                if key not in phones and is_valid_phone(phone):
+                    phones[key] = phone
+        except TimeoutError:
+            timed_out = True
+        if timed_out:
+            break
+
+    # A scan that finished its last chunk past the deadline still ran over budget
+    timed_out = timed_out or time.monotonic() > deadline
+    return {"emails": list(emails.values()), "phones": list(phones.values()), "timed_out": timed_out}
+
+def extract_page(url, raw_content, time_budget=None):
+    """Extract contacts from one search result page"""
+    return {"url": url, **extract_contacts(raw_content, time_budget)}
+
+def extract_contacts_batch(results):
+    """Extract contacts from every result of a search response"""
+    return [extract_page(result.get("url"), result.get("raw_content")) for result in results]
+
+def get_extraction_pool():
+    """Return the shared process pool used for large pages
+
+    Search threads share one pool; its workers come from a forkserver so they
+    never inherit the locks of this multithreaded process.
+    """
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is None:
+            _extraction_pool = ProcessPoolExecutor(max_workers=max(1, EXTRACTION_WORKERS),
+                                                   mp_context=multiprocessing.get_context("forkserver"))
+        return _extraction_pool
+
+def _discard_extraction_pool(pool):
+    """Shut down a broken pool so the next large page starts a fresh one"""
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is pool:
+            _extraction_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+async def _extract_page_in_pool(url, raw_content, time_budget):
+    """Scan one page on the process pool, falling back to inline if the pool died"""
+    loop = asyncio.get_running_loop()
+    pool = get_extraction_pool()
+    with EXTRACTION_SECONDS.time(mode="pool"):
+        try:
+            return await loop.run_in_executor(pool, extract_page, url, raw_content, time_budget)
+        except BrokenProcessPool:
+            _discard_extraction_pool(pool)
+            return extract_page(url, raw_content, time_budget)
+
+def _extract_page_inline(url, raw_content, time_budget):
+    with EXTRACTION_SECONDS.time(mode="inline"):
+        return extract_page(url, raw_content, time_budget)
+
+async def extract_contacts_batch_async(results, time_budget=None):
+    """Extract contacts from every result, scanning large pages on the process pool"""
+    pages = [None] * len(results)
+    pooled = {}
+    for position, result in enumerate(results):
+        raw_content = result.get("raw_content")
+        if raw_content and len(raw_content) > INLINE_MAX_CHARS:
+            pooled[position] = asyncio.ensure_future(_extract_page_in_pool(result.get("url"), raw_content, time_budget))
+    if pooled:
+        # Let the large pages reach the pool before the small ones are scanned here
+        await asyncio.sleep(0)
+    for position, result in enumerate(results):
+        if position not in pooled:
+            # Small pages are cheaper to scan than to send to another process
+            pages[position] = _extract_page_inline(result.get("url"), result.get("raw_content"), time_budget)
+    for position, page in zip(pooled, await asyncio.gather(*pooled.values())):
+        pages[position] = page
+    return pages
@@ -0,0 +1,292 @@
+import argparse
+import csv
+import os
+import re
+import time
+
+from public_suffix import registered_domain
+from settings import data_path
+from sqlite_store import SQLiteStore
+
+# SQLite database of every email and domain collected, shared by all runs
+DEFAULT_INDEX_PATH = os.getenv("CONTACT_INDEX_PATH", data_path("contact_index.db"))
+
+EMAIL_REGEX = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+
+# Bumped when stored domains are normalized differently; older indexes are renormalized on open
+DOMAIN_KEY_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    email TEXT PRIMARY KEY,
+    display_email TEXT NOT NULL,
+    domain TEXT,
+    url TEXT,
+    phone TEXT,
+    query TEXT,
+    location TEXT,
+    run_folder TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    times_seen INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS contacts_domain ON contacts(domain);
+
+CREATE TABLE IF NOT EXISTS domains (
+    domain TEXT PRIMARY KEY,
+    url TEXT,
+    query TEXT,
+    location TEXT,
+    run_folder TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    times_seen INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS contact_sources (
+    email TEXT NOT NULL,
+    query TEXT NOT NULL DEFAULT '',
+    location TEXT NOT NULL DEFAULT '',
+    run_folder TEXT NOT NULL DEFAULT '',
+    url TEXT,
+    seen_at REAL NOT NULL,
+    UNIQUE (email, query, location, run_folder)
+);
+CREATE INDEX IF NOT EXISTS contact_sources_query ON contact_sources(query, location);
+"""
+
+def normalize_email(email):
+    """Normalize an email for deduplication"""
+    return (email or "").strip().lower()
+
+def normalize_domain(url_or_host):
+    """Normalize a URL or host name to its registered domain, so subdomains of a site share one entry"""
+    return registered_domain(url_or_host or "")
+
+class ContactIndex(SQLiteStore):
+    """SQLite (WAL mode) index of every email and domain collected across runs"""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        super().__init__(path)
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+            if conn.execute("PRAGMA user_version").fetchone()[0] < DOMAIN_KEY_VERSION:
+                self._renormalize_domains(conn)
+                conn.execute(f"PRAGMA user_version = {DOMAIN_KEY_VERSION}")
+
+    def _renormalize_domains(self, conn):
+        """Rekey domains stored as host names by registered domain, merging hosts of the same site"""
+        merged = {}
+        for row in conn.execute("SELECT * FROM domains ORDER BY first_seen").fetchall():
+            domain = normalize_domain(row["domain"])
+            if domain not in merged:
+                merged[domain] = dict(row, domain=domain)
+            else:
+                merged[domain]["last_seen"] = max(merged[domain]["last_seen"], row["last_seen"])
+                merged[domain]["times_seen"] += row["times_seen"]
+        conn.execute("DELETE FROM domains")
+        conn.executemany(
+            """INSERT INTO domains (domain, url, query, location, run_folder, first_seen, last_seen, times_seen)
+               VALUES (:domain, :url, :query, :location, :run_folder, :first_seen, :last_seen, :times_seen)""",
+            merged.values()
+        )
+        for row in conn.execute("SELECT DISTINCT domain FROM contacts WHERE domain IS NOT NULL").fetchall():
+            domain = normalize_domain(row["domain"])
+            if domain != row["domain"]:
+                conn.execute("UPDATE contacts SET domain = ? WHERE domain = ?", (domain, row["domain"]))
+
+    def add_page(self, url, emails, phones=(), query=None, location=None, run_folder=None):
+        """Record one result page and the contacts found on it"""
+        now = time.time()
+        domain = normalize_domain(url)
+        phone = "; ".join(phones) or None
+        with self._connection() as conn:
+            if domain:
+                conn.execute(
+                    """INSERT INTO domains (domain, url, query, location, run_folder, first_seen, last_seen)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT(domain) DO UPDATE SET last_seen = excluded.last_seen, times_seen = times_seen + 1""",
+                    (domain, url, query, location, run_folder, now, now)
+                )
+            for email in emails:
+                key = normalize_email(email)
+                if not EMAIL_REGEX.match(key):
+                    continue
+                conn.execute(
+                    """INSERT INTO contacts (email, display_email, domain, url, phone, query, location, run_folder, first_seen, last_seen)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT(email) DO UPDATE SET
+                           last_seen = excluded.last_seen,
+                           times_seen = times_seen + 1,
+                           phone = COALESCE(contacts.phone, excluded.phone)""",
+                    (key, email.strip(), domain, url, phone, query, location, run_folder, now, now)
+                )
+                conn.execute(
+                    """INSERT OR IGNORE INTO contact_sources (email, query, location, run_folder, url, seen_at)
+                       VALUES (?, ?, ?, ?, ?, ?)""",
+                    (key, query or "", location or "", run_folder or "", url, now)
+                )
+
+    def has_email(self, email):
+        """Check whether an email was ever collected"""
+        row = self._connection().execute("SELECT 1 FROM contacts WHERE email = ?", (normalize_email(email),)).fetchone()
+        return row is not None
+
+    def has_domain(self, url_or_host):
+        """Check whether a domain was ever returned by a search"""
+        row = self._connection().execute("SELECT 1 FROM domains WHERE domain = ?", (normalize_domain(url_or_host),)).fetchone()
+        return row is not None
+
+    def lookup(self, value):
+        """Return the contacts matching an email or a domain, with the queries they came from"""
+        conn = self._connection()
+        if "@" in value:
+            rows = conn.execute("SELECT * FROM contacts WHERE email = ?", (normalize_email(value),)).fetchall()
+        else:
+            rows = conn.execute("SELECT * FROM contacts WHERE domain = ? ORDER BY first_seen", (normalize_domain(value),)).fetchall()
+        contacts = []
+        for row in rows:
+            contact = dict(row)
+            contact["sources"] = [
+                dict(source) for source in conn.execute(
+                    "SELECT query, location, run_folder, url, seen_at FROM contact_sources WHERE email = ? ORDER BY seen_at",
+                    (row["email"],)
+                )
+            ]
+            contacts.append(contact)
+        return contacts
+
+    def iter_contacts(self, query=None, location=None, domain=None):
+        """Iterate indexed contacts, optionally filtered by the query, location or domain they were found with"""
+        clauses = []
+        params = []
+        source_clauses = []
+        for column, value in (("query", query), ("location", location)):
+            if value:
+                source_clauses.append(f"{column} = ?")
+                params.append(value)
+        if source_clauses:
+            clauses.append(f"email IN (SELECT email FROM contact_sources WHERE {' AND '.join(source_clauses)})")
+        if domain:
+            clauses.append("domain = ?")
+            params.append(normalize_domain(domain))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        yield from self._connection().execute(f"SELECT * FROM contacts{where} ORDER BY first_seen", params)
+
+    def iter_domains(self):
+        """Iterate indexed domains, oldest first"""
+        yield from self._connection().execute("SELECT * FROM domains ORDER BY first_seen")
+
+    def iter_found(self, sources, since=None):
+        """Iterate contacts found by any of the (query, location) pairs since a time, each once, oldest find first
+
+        Rows carry the URL, query and location of the contact's first find among those sources.
+        """
+        if not sources:
+            return
+        pairs = " OR ".join("(s.query = ? AND s.location = ?)" for _ in sources)
+        params = [value or "" for source in sources for value in source]
+        since_clause = ""
+        if since is not None:
+            since_clause = " AND s.seen_at >= ?"
+            params.append(since)
+        yield from self._connection().execute(
+            f"""SELECT c.display_email, c.phone, c.domain, s.url, s.query, s.location, MIN(s.seen_at) AS seen_at
+                FROM contact_sources s JOIN contacts c ON c.email = s.email
+                WHERE ({pairs}){since_clause}
+                GROUP BY s.email ORDER BY seen_at""",
+            params
+        )
+
+    def export_csv(self, output_file, query=None, location=None, domain=None):
+        """Write indexed contacts to a CSV and return the number of rows"""
+        count = 0
+        with open(output_file, mode="w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["URL", "Email", "Phone", "Domain", "SearchTerm", "Location", "RunFolder"])
+            for row in self.iter_contacts(query, location, domain):
+                writer.writerow([row["url"], row["display_email"], row["phone"] or "", row["domain"],
+                                 row["query"] or "", row["location"] or "", row["run_folder"] or ""])
+                count += 1
+        return count
+
+    def import_csv(self, file_path, query=None, run_folder=None):
+        """Backfill the index from a results CSV and return the number of rows read"""
+        query = query or os.path.splitext(os.path.basename(file_path))[0]
+        count = 0
+        with open(file_path, mode="r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                email = (row.get("Email") or "").strip()
+                phone = (row.get("Phone") or "").strip()
+                emails = [email] if email and email != "No email found" else []
+                phones = [phone] if phone and phone != "No phone found" else []
+                # Merged files name the search each row came from
+                source_file = (row.get("SourceFile") or "").strip()
+                row_query = row.get("SearchTerm") or (os.path.splitext(source_file)[0] if source_file else query)
+                self.add_page((row.get("URL") or "").strip(), emails, phones, row_query, row.get("Location"), run_folder)
+                count += 1
+        return count
+
+    def import_tree(self, root):
+        """Backfill the index from every CSV below a folder"""
+        count = 0
+        for dir_path, _, file_names in os.walk(root):
+            for file_name in sorted(file_names):
+                if file_name.endswith(".csv"):
+                    count += self.import_csv(os.path.join(dir_path, file_name), run_folder=dir_path)
+        return count
+
+    def stats(self):
+        """Return the number of indexed contacts and domains"""
+        conn = self._connection()
+        return {
+            "contacts": conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0],
+            "domains": conn.execute("SELECT COUNT(*) FROM domains").fetchone()[0],
+        }
+
+def main():
+    """Command line access to the global contact index"""
+    parser = argparse.ArgumentParser(description='Look up and export contacts collected across all search runs')
+    parser.add_argument('--db', default=DEFAULT_INDEX_PATH, help=f'Index database path (default: {DEFAULT_INDEX_PATH})')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='Backfill the index from existing result folders')
+    import_parser.add_argument('folders', nargs='+', help='Folders to scan for CSV files (e.g. business_searches)')
+
+    lookup_parser = subparsers.add_parser('lookup', help='Look up an email or domain')
+    lookup_parser.add_argument('value', help='Email address, domain or URL')
+
+    export_parser = subparsers.add_parser('export', help='Export indexed contacts to CSV')
+    export_parser.add_argument('output_file', help='CSV file to write')
+    export_parser.add_argument('--query', help='Only export contacts found by this search term')
+    export_parser.add_argument('--location', help='Only export contacts found in this location')
+    export_parser.add_argument('--domain', help='Only export contacts on this domain')
+
+    subparsers.add_parser('stats', help='Show index size')
+    args = parser.parse_args()
+
+    index = ContactIndex(args.db)
+    if args.command == 'import':
+        for folder in args.folders:
+            count = index.import_tree(folder)
+            print(f"📥 Imported {count} rows from {folder}")
+        stats = index.stats()
+        print(f"✅ Index now holds {stats['contacts']} contacts across {stats['domains']} domains")
+    elif args.command == 'lookup':
+        contacts = index.lookup(args.value)
+        if not contacts:
+            seen = "seen" if index.has_domain(args.value) else "not seen"
+            print(f"❌ No contacts found for {args.value} (domain {seen} before)")
+        for contact in contacts:
+            print(f"✔ {contact['display_email']} ({contact['url']})")
+            for source in contact['sources']:
+                print(f"    ↳ {source['query']} {source['location']} {source['run_folder']}".rstrip())
+    elif args.command == 'export':
+        count = index.export_csv(args.output_file, args.query, args.location, args.domain)
+        print(f"✅ Exported {count} contacts to {args.output_file}")
+    elif args.command == 'stats':
+        stats = index.stats()
+        print(f"📊 {stats['contacts']} contacts across {stats['domains']} domains")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import argparse
+import csv
+import gzip
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from contact_extractor import extract_contacts
+from output_sink import sink_basename, iter_sink_rows
+from run_registry import RunRegistry, DEFAULT_REGISTRY_PATH, read_manifest, write_manifest
+from seen_filter import SeenFilter, email_key
+
+# Whether runs archive scanned pages, and the size after which a new archive chunk is started
+DEFAULT_ARCHIVE = os.getenv("SEARCH_ARCHIVE", "0") == "1"
+DEFAULT_CHUNK_BYTES = int(os.getenv("ARCHIVE_CHUNK_BYTES", str(64 * 1024 * 1024)))
+
+# Inside a run folder
+ARCHIVE_FOLDER = "archive"
+INDEX_FILE = "index.jsonl"
+
+class ContentArchiveWriter:
+    """Appends scanned pages to gzip-compressed JSONL chunks in a run's archive folder
+
+    Each record holds the URL, query, timestamp and raw content. A chunk is
+    closed once it holds chunk_bytes of uncompressed records, and index.jsonl
+    maps every URL to its chunk and record number.
+    """
+
+    def __init__(self, archive_folder, chunk_bytes=DEFAULT_CHUNK_BYTES):
+        self.archive_folder = archive_folder
+        self.chunk_bytes = chunk_bytes
+        os.makedirs(archive_folder, exist_ok=True)
+        self.records = 0
+        self.bytes_written = 0
+        self._chunk_number = -1
+        self._chunk = None
+        self._chunk_size = 0
+        self._chunk_records = 0
+        self._index = open(os.path.join(archive_folder, INDEX_FILE), "a", encoding="utf-8")
+
+    def _chunk_name(self):
+        return f"chunk_{self._chunk_number:05d}.jsonl.gz"
+
+    def _next_chunk(self):
+        if self._chunk is not None:
+            self._chunk.close()
+        self._chunk_number += 1
+        self._chunk = gzip.open(os.path.join(self.archive_folder, self._chunk_name()), "wt", encoding="utf-8")
+        self._chunk_size = 0
+        self._chunk_records = 0
+
+    def append(self, url, query, raw_content, timestamp=None):
+        """Archive one page"""
+        if self._chunk is None or self._chunk_size >= self.chunk_bytes:
+            self._next_chunk()
+        line = json.dumps({"url": url, "query": query, "timestamp": timestamp or time.time(),
+                           "raw_content": raw_content or ""}) + "\n"
+        self._chunk.write(line)
+        self._index.write(json.dumps({"url": url, "chunk": self._chunk_name(), "record": self._chunk_records}) + "\n")
+        self._chunk_size += len(line)
+        self._chunk_records += 1
+        self.records += 1
+        self.bytes_written += len(line)
+
+    def close(self):
+        if self._chunk is not None:
+            self._chunk.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def iter_archive(archive_folder):
+    """Stream every archived record of a run, in the order it was written"""
+    for chunk_name in sorted(name for name in os.listdir(archive_folder) if name.endswith(".jsonl.gz")):
+        with gzip.open(os.path.join(archive_folder, chunk_name), "rt", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+def lookup(archive_folder, url):
+    """Return the archived records of a URL, using the index to read only their chunks"""
+    locations = []
+    with open(os.path.join(archive_folder, INDEX_FILE), "r", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry["url"] == url:
+                locations.append((entry["chunk"], entry["record"]))
+    records = []
+    for chunk_name in sorted({chunk for chunk, _ in locations}):
+        wanted = {record for chunk, record in locations if chunk == chunk_name}
+        with gzip.open(os.path.join(archive_folder, chunk_name), "rt", encoding="utf-8") as f:
+            for record_number, line in enumerate(f):
+                if record_number in wanted:
+                    records.append(json.loads(line))
+                if record_number >= max(wanted):
+                    break
+    return records
+
+def find_archived_runs(folders):
+    """Run folders with an archive, given run folders or folders holding run folders"""
+    run_folders = []
+    for folder in folders:
+        if os.path.isdir(os.path.join(folder, ARCHIVE_FOLDER)):
+            run_folders.append(folder)
+            continue
+        for name in sorted(os.listdir(folder)):
+            if os.path.isdir(os.path.join(folder, name, ARCHIVE_FOLDER)):
+                run_folders.append(os.path.join(folder, name))
+    return run_folders
+
+def reextract_run(run_folder):
+    """Re-run contact extraction over a run's archive and regenerate final/merged_cleaned_results.csv
+
+    Runs without network access. Returns the run folder, the number of unique
+    emails in the regenerated file and the updated manifest (empty if the run
+    has none). Runs that wrote through the global seen filter get the same
+    email suppression as the live pipeline: emails the run wrote itself are
+    kept, and other emails already in the filter are left out.
+    """
+    # Imported here: business_search_complete imports this module for the archive writer
+    from business_search_complete import merge_and_clean_results
+
+    manifest = read_manifest(run_folder) or {}
+    seen_filter = None
+    if manifest.get("seen_filter") and os.path.isdir(manifest["seen_filter"]):
+        seen_filter = SeenFilter(manifest["seen_filter"], writable=False)
+        # The filter also holds this run's own emails (added as they were written); those stay
+        own_emails = set()
+        for row in iter_sink_rows(manifest.get("search_csv") or ""):
+            email = (row.get("Email") or "").strip().lower()
+            if "@" in email:
+                own_emails.add(email)
+    rows_folder = os.path.join(run_folder, "reextract")
+    os.makedirs(rows_folder, exist_ok=True)
+    try:
+        # Named like the original search output so merged rows keep their SourceFile
+        rows_file = sink_basename(manifest.get("search_csv") or "archive") + ".csv"
+        with open(os.path.join(rows_folder, rows_file), mode="w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["URL", "Email", "Phone"])
+            for record in iter_archive(os.path.join(run_folder, ARCHIVE_FOLDER)):
+                contacts = extract_contacts(record["raw_content"])
+                emails = contacts["emails"]
+                if seen_filter is not None and emails:
+                    emails = [email for email in emails
+                              if email.strip().lower() in own_emails or email_key(email) not in seen_filter]
+                    if not emails and not contacts["phones"]:
+                        continue  # Like the live pipeline, pages with only collected emails and no phones write nothing
+                phone = "; ".join(contacts["phones"]) or "No phone found"
+                for email in emails or ["No email found"]:
+                    writer.writerow([record["url"], email, phone])
+        result_path, stats = merge_and_clean_results(rows_folder, os.path.join(run_folder, "final"))
+    finally:
+        shutil.rmtree(rows_folder, ignore_errors=True)
+
+    if manifest:
+        manifest["result_path"] = result_path
+        manifest.setdefault("counts", {})["result_count"] = stats["rows_written"]
+        manifest["reextracted_at"] = time.time()
+        write_manifest(manifest)
+    return run_folder, stats["rows_written"], manifest
+
+def reextract(folders, workers=None, registry_path=DEFAULT_REGISTRY_PATH):
+    """Re-extract every archived run below folders in parallel, updating the run registry"""
+    run_folders = find_archived_runs(folders)
+    registry = RunRegistry(registry_path) if registry_path else None
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for run_folder, result_count, manifest in executor.map(reextract_run, run_folders):
+            print(f"♻️  {run_folder}: {result_count} unique emails")
+            if registry is not None and manifest:
+                registry.record(manifest)
+    return len(run_folders)
+
+def main():
+    """Command line access to archived page content"""
+    parser = argparse.ArgumentParser(description='Re-extract contacts from archived search results without network calls')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    reextract_parser = subparsers.add_parser('reextract', help='Regenerate final/merged_cleaned_results.csv from archived pages')
+    reextract_parser.add_argument('folders', nargs='+', help='Run folders, or folders holding run folders (e.g. business_searches)')
+    reextract_parser.add_argument('--workers', type=int, default=None, help='Runs re-extracted at the same time (default: CPU count)')
+    reextract_parser.add_argument('--db', default=DEFAULT_REGISTRY_PATH, help=f'Run registry to update (default: {DEFAULT_REGISTRY_PATH})')
+
+    lookup_parser = subparsers.add_parser('lookup', help='Print the archived records of a URL')
+    lookup_parser.add_argument('run_folder', help='Run folder holding the archive')
+    lookup_parser.add_argument('url', help='Page URL')
+    args = parser.parse_args()
+
+    if args.command == 'reextract':
+        count = reextract(args.folders, args.workers, args.db)
+        print(f"✅ Re-extracted {count} archived runs")
+    elif args.command == 'lookup':
+        records = lookup(os.path.join(args.run_folder, ARCHIVE_FOLDER), args.url)
+        if not records:
+            print(f"❌ {args.url} is not archived in {args.run_folder}")
+        for record in records:
+            print(f"📄 {record['url']} ({record['query']}, {len(record['raw_content'])} chars)")
+            print(record['raw_content'])
+
+if __name__ == "__main__":
+    main()
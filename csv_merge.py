@@ -0,0 +1,99 @@
+import csv
+import hashlib
+import os
+import shutil
+import tempfile
+
+# Memory the dedupe key set may use before the merge spills to disk
+DEFAULT_MEMORY_BUDGET = int(os.getenv("MERGE_MEMORY_BUDGET", str(64 * 1024 * 1024)))
+# Rough cost of one key in the in-memory set (int digest + set slot)
+BYTES_PER_KEY = 100
+SPILL_PARTITIONS = 16
+
+def iter_csv_rows(file_path, **extra_fields):
+    """Stream the rows of a CSV file as dicts, adding extra fields to each row"""
+    if not os.path.exists(file_path):
+        return
+    with open(file_path, mode="r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            row.update(extra_fields)
+            yield row
+
+def key_digest(key):
+    """Compact 64-bit digest used in place of the full dedupe key"""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+def stream_merge(rows, output_file, fieldnames, key, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Deduplicate a stream of rows into a CSV, keeping the first row for each key
+
+    Rows are written as they are read. key(row) returns the dedupe key, or None
+    to drop the row. When the key set outgrows memory_budget, the remaining rows
+    are hash-partitioned to temporary files and each partition is deduplicated
+    on its own, so memory stays bounded by one partition.
+    """
+    max_keys = max(1, memory_budget // BYTES_PER_KEY)
+    stats = {"rows_read": 0, "rows_written": 0, "duplicates": 0, "spilled": False, "partitions": 0}
+    seen = set()
+    spill_dir = None
+    spill_files = []
+    spill_writers = []
+
+    with open(output_file, mode="w", newline="", encoding="utf-8") as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+
+        try:
+            for row in rows:
+                stats["rows_read"] += 1
+                row_key = key(row)
+                if row_key is None:
+                    continue
+                digest = key_digest(row_key)
+
+                if spill_dir is None:
+                    if digest in seen:
+                        stats["duplicates"] += 1
+                        continue
+                    seen.add(digest)
+                    writer.writerow(row)
+                    stats["rows_written"] += 1
+                    if len(seen) >= max_keys:
+                        # Spill: move the known keys to disk and partition the rest of the input
+                        spill_dir = tempfile.mkdtemp(prefix="merge_spill_", dir=os.path.dirname(os.path.abspath(output_file)))
+                        for partition in range(SPILL_PARTITIONS):
+                            spill_file = open(os.path.join(spill_dir, f"rows_{partition}.csv"), mode="w", newline="", encoding="utf-8")
+                            spill_files.append(spill_file)
+                            spill_writers.append(csv.writer(spill_file))
+                        for seen_digest in seen:
+                            spill_writers[seen_digest % SPILL_PARTITIONS].writerow([seen_digest, ""])
+                        seen.clear()
+                        stats["spilled"] = True
+                        stats["partitions"] = SPILL_PARTITIONS
+                    continue
+
+                # Spilled rows keep their digest and a "pending" marker so the partition pass can tell them apart
+                spill_writers[digest % SPILL_PARTITIONS].writerow([digest, "pending"] + [row.get(field) or "" for field in fieldnames])
+
+            if spill_dir is not None:
+                for spill_file in spill_files:
+                    spill_file.close()
+                for partition in range(SPILL_PARTITIONS):
+                    partition_seen = set()
+                    with open(os.path.join(spill_dir, f"rows_{partition}.csv"), mode="r", newline="", encoding="utf-8") as f:
+                        for digest, marker, *values in csv.reader(f):
+                            digest = int(digest)
+                            if digest in partition_seen:
+                                if marker:
+                                    stats["duplicates"] += 1
+                                continue
+                            partition_seen.add(digest)
+                            if marker:
+                                writer.writerow(dict(zip(fieldnames, values)))
+                                stats["rows_written"] += 1
+        finally:
+            if spill_dir is not None:
+                for spill_file in spill_files:
+                    spill_file.close()
+                shutil.rmtree(spill_dir, ignore_errors=True)
+
+    return stats
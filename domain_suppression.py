@@ -0,0 +1,107 @@
+import os
+from collections import Counter, OrderedDict
+
+from public_suffix import url_registered_domain
+from seen_filter import domain_key
+
+# How many domains are sent as exclude_domains per request; the rest are filtered locally
+DEFAULT_EXCLUDE_BUDGET = int(os.getenv("EXCLUDE_DOMAINS_BUDGET", "150"))
+EXCLUDE_POLICIES = ("recent", "frequent")
+
+def url_domain(url):
+    """Domain used for suppression: the registered domain, so www., locations. and other subdomains of one site count once"""
+    return url_registered_domain(url)
+
+class DomainSuppressor:
+    """Tracks seen domains, caps the exclude list sent to the API and filters the rest locally
+
+    Every known domain is filtered out of responses locally. Only the top
+    `budget` domains (most recently or most frequently returned) are sent to the
+    API, so request payloads stop growing with the run's history. With a
+    seen_filter, domains harvested by any other run (earlier, or running
+    alongside, such as sibling cells of a job) are filtered too and
+    become known, so they compete for the exclude list like this run's.
+    """
+
+    def __init__(self, budget=DEFAULT_EXCLUDE_BUDGET, policy="recent", seen_filter=None):
+        if policy not in EXCLUDE_POLICIES:
+            raise ValueError(f"Unknown exclude policy: {policy}")
+        self.budget = budget
+        self.policy = policy
+        self.seen_filter = seen_filter
+        self.known = set()
+        self._recency = OrderedDict()  # domain -> None, least recently returned first
+        self._frequency = Counter()
+        self.exclude_lists = 0
+        self.excluded_sent = 0
+        self.results_total = 0
+        self.results_wasted = 0
+        self.results_seen_by_other_runs = 0
+
+    def seed(self, domains):
+        """Add domains known before the run (e.g. from an existing CSV)"""
+        for domain in domains:
+            self.known.add(domain)
+            self._recency[domain] = None
+
+    def exclude_list(self):
+        """Return the capped, sorted exclude list for the next request"""
+        if self.policy == "frequent":
+            ranked = [domain for domain, _ in self._frequency.most_common(self.budget)]
+            if len(ranked) < self.budget:
+                # Seeded domains without a count fill the remaining slots, newest first
+                ranked_set = set(ranked)
+                ranked += [domain for domain in reversed(self._recency) if domain not in ranked_set][:self.budget - len(ranked)]
+        else:
+            ranked = list(reversed(self._recency))[:self.budget]
+        self.exclude_lists += 1
+        self.excluded_sent += len(ranked)
+        # Sorted so identical state always produces identical (cacheable) requests
+        return sorted(ranked)
+
+    def filter_results(self, results):
+        """Drop results from domains that were already seen, or repeated within results, and return the new ones
+
+        The domains of the returned results are marked as seen, so concurrent
+        streams do not fetch them again.
+        """
+        fresh = []
+        for result in results:
+            self.results_total += 1
+            domain = url_domain(result.get("url"))
+            if domain in self.known:
+                self.results_wasted += 1
+                continue
+            if domain and self.seen_filter is not None and domain_key(domain) in self.seen_filter:
+                self.results_wasted += 1
+                self.results_seen_by_other_runs += 1
+                self.add(domain)
+                continue
+            self.add(domain)
+            fresh.append(result)
+        return fresh
+
+    def add(self, domain):
+        """Mark a domain as seen so later results from it are filtered"""
+        if domain:
+            self.known.add(domain)
+
+    def observe(self, domains):
+        """Update the ranking with the domains one response returned, in response order"""
+        for domain in domains:
+            if domain:
+                self._frequency[domain] += 1
+                self._recency[domain] = None
+                self._recency.move_to_end(domain)
+
+    def stats(self):
+        """Return suppression metrics"""
+        return {
+            "known_domains": len(self.known),
+            "exclude_lists": self.exclude_lists,
+            "avg_excluded_sent": self.excluded_sent / self.exclude_lists if self.exclude_lists else 0,
+            "results_total": self.results_total,
+            "results_wasted": self.results_wasted,
+            "results_seen_by_other_runs": self.results_seen_by_other_runs,
+            "wasted_ratio": self.results_wasted / self.results_total if self.results_total else 0,
+        }
@@ -0,0 +1,64 @@
+import os
+
+# Thresholds below which an iteration is low-yield, and how many in a row stop a stream
+DEFAULT_PATIENCE = int(os.getenv("EARLY_STOP_PATIENCE", "2"))
+DEFAULT_MIN_NEW_EMAILS = int(os.getenv("EARLY_STOP_MIN_NEW_EMAILS", "1"))
+DEFAULT_MIN_NEW_DOMAIN_RATIO = float(os.getenv("EARLY_STOP_MIN_NEW_DOMAIN_RATIO", "0.1"))
+
+class YieldTracker:
+    """Records the marginal yield of every iteration of each query stream and decides when a stream is exhausted
+
+    An iteration is low-yield when it found fewer than min_new_emails new
+    emails and fewer than min_new_domain_ratio * max_results new domains.
+    With early stopping enabled, a stream stops after `patience` consecutive
+    low-yield iterations. Yield curves are recorded either way.
+    """
+
+    def __init__(self, max_results, early_stop=False, patience=DEFAULT_PATIENCE,
+                 min_new_emails=DEFAULT_MIN_NEW_EMAILS, min_new_domain_ratio=DEFAULT_MIN_NEW_DOMAIN_RATIO):
+        self.max_results = max_results
+        self.early_stop = early_stop
+        self.patience = max(1, patience)
+        self.min_new_emails = min_new_emails
+        self.min_new_domains = min_new_domain_ratio * max_results
+        self.curves = {}
+        self.stopped_streams = {}
+        self._low_streak = {}
+        self._seen_emails = set()
+
+    def record(self, stream, results, new_domains, emails):
+        """Record one iteration of a stream and return True if the stream should stop"""
+        new_emails = 0
+        for email in emails:
+            key = email.lower()
+            if key not in self._seen_emails:
+                self._seen_emails.add(key)
+                new_emails += 1
+
+        curve = self.curves.setdefault(stream, [])
+        curve.append({
+            "iteration": len(curve) + 1,
+            "results": results,
+            "fill_ratio": results / self.max_results if self.max_results else 0,
+            "new_domains": new_domains,
+            "new_emails": new_emails,
+        })
+
+        low_yield = new_emails < self.min_new_emails and new_domains < self.min_new_domains
+        self._low_streak[stream] = self._low_streak.get(stream, 0) + 1 if low_yield else 0
+        if self.early_stop and self._low_streak[stream] >= self.patience:
+            self.stopped_streams[stream] = len(curve)
+            return True
+        return False
+
+    def is_stopped(self, stream):
+        return stream in self.stopped_streams
+
+    def stats(self):
+        """Return the yield curves and where each stopped stream stopped"""
+        return {
+            "early_stop": self.early_stop,
+            "iterations_run": sum(len(curve) for curve in self.curves.values()),
+            "stopped_streams": dict(self.stopped_streams),
+            "yield_curves": {stream: list(curve) for stream, curve in self.curves.items()},
+        }
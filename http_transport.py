@@ -0,0 +1,210 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+
+import httpx
+
+try:
+    import h2
+except ImportError:  # h2 is optional, HTTP/1.1 keep-alive is used when it's missing
+    h2 = None
+
+from metrics import HTTP_CONNECTIONS, HTTP_HEDGES
+
+# Connection pool shared by every search call (SEARCH_SHARED_TRANSPORT=0 opens one per call)
+DEFAULT_SHARED_TRANSPORT = os.getenv("SEARCH_SHARED_TRANSPORT", "1") == "1"
+DEFAULT_HTTP2 = os.getenv("SEARCH_HTTP2", "0") == "1"
+DEFAULT_MAX_CONNECTIONS = int(os.getenv("SEARCH_MAX_CONNECTIONS", "32"))
+DEFAULT_KEEPALIVE_EXPIRY = float(os.getenv("SEARCH_KEEPALIVE_EXPIRY", "60"))
+DEFAULT_CONNECT_TIMEOUT = float(os.getenv("SEARCH_CONNECT_TIMEOUT", "5"))
+# Hedging sends a second copy of a slow request, which the API bills like any other call
+DEFAULT_HEDGE = os.getenv("SEARCH_HEDGE", "0") == "1"
+DEFAULT_HEDGE_QUANTILE = float(os.getenv("SEARCH_HEDGE_QUANTILE", "0.95"))
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+_shared_transport = None
+_shared_transport_lock = threading.Lock()
+
+class HttpTransport:
+    """One keep-alive httpx connection pool shared by every API call in the process
+
+    httpx pools are bound to the event loop that created them, and every search
+    cell runs its own asyncio.run, so the pool lives on a dedicated event loop
+    thread and calls are handed to it. With hedge, a request still running
+    after the observed hedge_quantile latency of its endpoint gets a duplicate;
+    the first response wins and the other is cancelled.
+    """
+
+    def __init__(self, http2=DEFAULT_HTTP2, max_connections=DEFAULT_MAX_CONNECTIONS,
+                 keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 hedge=DEFAULT_HEDGE, hedge_quantile=DEFAULT_HEDGE_QUANTILE):
+        if http2 and h2 is None:
+            print("⚠️ HTTP/2 needs the h2 package (pip install httpx[http2]); using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections,
+                                   keepalive_expiry=keepalive_expiry)
+        self.connect_timeout = connect_timeout
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.requests = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._latencies = {}  # path -> recent latencies of successful requests
+        self._lock = threading.Lock()
+        self._loop = None
+        self._client = None
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                ready = threading.Event()
+                thread = threading.Thread(target=self._run_loop, args=(ready,), name="http-transport", daemon=True)
+                thread.start()
+                ready.wait()
+            return self._loop
+
+    def _run_loop(self, ready):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._client = httpx.AsyncClient(http2=self.http2, limits=self.limits)
+        ready.set()
+        loop.run_forever()
+
+    def hedge_delay(self, path):
+        """Seconds after which a request to path gets a duplicate, or None"""
+        if not self.hedge:
+            return None
+        with self._lock:
+            latencies = sorted(self._latencies.get(path, ()))
+        if len(latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        return latencies[min(len(latencies) - 1, int(self.hedge_quantile * len(latencies)))]
+
+    async def _send(self, url, content, headers, timeout):
+        """Send one request on the pool and return the response and whether it opened a new connection"""
+        connected = False
+
+        async def trace(event_name, info):
+            nonlocal connected
+            if event_name.startswith("connection.connect_tcp."):
+                connected = True
+
+        response = await self._client.post(url, content=content, headers=headers, timeout=timeout,
+                                           extensions={"trace": trace})
+        with self._lock:
+            self.requests += 1
+            if connected:
+                self.new_connections += 1
+            else:
+                self.reused_connections += 1
+        return response, connected
+
+    async def _post(self, url, content, headers, timeout):
+        path = httpx.URL(url).path
+        started = time.perf_counter()
+        first = asyncio.ensure_future(self._send(url, content, headers, timeout))
+        tasks = {first}
+        hedged = False
+        delay = self.hedge_delay(path)
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    hedged = True
+                    with self._lock:
+                        self.hedges += 1
+                    tasks.add(asyncio.ensure_future(self._send(url, content, headers, timeout)))
+            while True:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                winner = done.pop()
+                # A failed copy only loses if the other copy is still running
+                if winner.exception() is None or not tasks:
+                    break
+            response, connected = winner.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+        hedge_won = hedged and winner is not first
+        if hedge_won:
+            with self._lock:
+                self.hedge_wins += 1
+        if response.status_code == 200:
+            with self._lock:
+                self._latencies.setdefault(path, deque(maxlen=LATENCY_WINDOW)).append(time.perf_counter() - started)
+        return response, {"new_connection": connected, "hedged": hedged, "hedge_won": hedge_won}
+
+    async def post(self, url, content=None, headers=None, timeout=60):
+        """POST from any event loop through the shared pool; cancelling the caller cancels the request"""
+        loop = self._ensure_loop()
+        timeout = httpx.Timeout(timeout, connect=min(timeout, self.connect_timeout))
+        future = asyncio.run_coroutine_threadsafe(self._post(url, content, headers, timeout), loop)
+        response, info = await asyncio.wrap_future(future)
+        # Counted here, in the caller's context, so the calls are attributed to the caller's run
+        HTTP_CONNECTIONS.inc(reused="false" if info["new_connection"] else "true")
+        if info["hedged"]:
+            HTTP_HEDGES.inc(outcome="won" if info["hedge_won"] else "lost")
+        return response
+
+    def stats(self):
+        with self._lock:
+            return {
+                "http2": self.http2,
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused_connections": self.reused_connections,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+            }
+
+class SharedClientHandle:
+    """Stands in for the httpx.AsyncClient a Tavily client opens per call, sending through the shared transport"""
+
+    def __init__(self, transport, base_url, headers):
+        self.transport = transport
+        self.base_url = base_url
+        self.headers = headers
+
+    async def post(self, url, content=None, timeout=60, **kwargs):
+        return await self.transport.post(f"{self.base_url}{url}", content=content, headers=self.headers, timeout=timeout)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        # The pooled connection stays open for the next call
+        return False
+
+def get_transport():
+    """Return the process-wide HTTP transport"""
+    global _shared_transport
+    with _shared_transport_lock:
+        if _shared_transport is None:
+            _shared_transport = HttpTransport()
+        return _shared_transport
+
+def use_shared_transport(client, transport=None):
+    """Make an AsyncTavilyClient send its requests through the shared transport instead of a new connection per call
+
+    This replaces the client's private per-call client factory (tavily-python is
+    pinned in requirements.txt for it). A client without that factory is
+    returned unchanged and keeps opening a connection per call.
+    """
+    if not callable(getattr(client, "_client_creator", None)):
+        print("⚠️ This tavily-python version has no per-call client factory; using a connection per call")
+        return client
+    transport = transport or get_transport()
+    # The client builds a fresh httpx.AsyncClient per call; take its base URL and headers (API key included) once
+    template = client._client_creator()
+    base_url = str(template.base_url).rstrip("/")
+    headers = dict(template.headers)
+    # Closed on the transport's loop, which works whether or not the caller runs an event loop
+    asyncio.run_coroutine_threadsafe(template.aclose(), transport._ensure_loop()).result()
+    client._client_creator = lambda: SharedClientHandle(transport, base_url, headers)
+    return client
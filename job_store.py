@@ -0,0 +1,197 @@
+import json
+import os
+import shutil
+import time
+
+from settings import data_path
+from sqlite_store import SQLiteStore
+
+# SQLite database of web job state, shared by every worker process
+DEFAULT_JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", data_path("jobs.db"))
+# How long finished jobs, their logs and merged results are kept
+DEFAULT_JOB_TTL = int(os.getenv("JOB_TTL", str(7 * 24 * 3600)))
+# Events kept per job; older ones are only in the job's full log file
+JOB_EVENT_BUFFER = int(os.getenv("JOB_EVENT_BUFFER", "200"))
+# A running job not updated for this long lost its worker and is marked failed
+DEFAULT_STALE_AFTER = int(os.getenv("JOB_STALE_AFTER", str(3600)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs(finished_at);
+CREATE INDEX IF NOT EXISTS jobs_status_updated_at ON jobs(status, updated_at);
+
+CREATE TABLE IF NOT EXISTS job_events (
+    job_id TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (job_id, id)
+);
+"""
+
+class JobStore(SQLiteStore):
+    """SQLite (WAL mode) store for web search jobs and their event logs, shared by every worker process
+
+    Job fields are kept as a JSON object and changed with single UPDATE
+    statements, so concurrent writers never lose each other's fields. Each job
+    keeps its last event_buffer events; the full log goes to a file. With
+    files_dir, each job's folder there (its full log and merged results) is
+    removed when the job expires.
+    """
+
+    def __init__(self, path=DEFAULT_JOB_STORE_PATH, ttl=DEFAULT_JOB_TTL, event_buffer=JOB_EVENT_BUFFER,
+                 stale_after=DEFAULT_STALE_AFTER, files_dir=None):
+        super().__init__(path)
+        self.files_dir = files_dir
+        self.ttl = ttl
+        self.event_buffer = event_buffer
+        self.stale_after = stale_after
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def create(self, job_id, **fields):
+        """Add a running job"""
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, data, created_at, updated_at) VALUES (?, 'running', ?, ?, ?)",
+                (job_id, json.dumps(dict(fields, status="running")), now, now)
+            )
+
+    def get(self, job_id):
+        """Return a job's fields, or None if it does not exist"""
+        row = self._connection().execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def exists(self, job_id):
+        return self._connection().execute("SELECT 1 FROM jobs WHERE id = ?", (job_id,)).fetchone() is not None
+
+    def update(self, job_id, **fields):
+        """Set some fields of a job"""
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET data = json_patch(data, ?), updated_at = ? WHERE id = ?",
+                (json.dumps(fields), time.time(), job_id)
+            )
+
+    def increment(self, job_id, field, amount=1):
+        """Atomically add to a numeric job field"""
+        path = f"$.{field}"
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET data = json_set(data, ?, COALESCE(json_extract(data, ?), 0) + ?), updated_at = ? WHERE id = ?",
+                (path, path, amount, time.time(), job_id)
+            )
+
+    def append(self, job_id, field, value):
+        """Atomically append a value to a list job field"""
+        path = f"$.{field}"
+        with self._connection() as conn:
+            conn.execute(
+                """UPDATE jobs SET data = json_insert(json_set(data, ?, json(COALESCE(json_extract(data, ?), '[]'))), ?, ?),
+                       updated_at = ? WHERE id = ?""",
+                (path, path, f"{path}[#]", value, time.time(), job_id)
+            )
+
+    def finish(self, job_id, status, **fields):
+        """Move a running job to a final status; returns False if it had already finished (e.g. was cancelled)"""
+        now = time.time()
+        with self._connection() as conn:
+            cursor = conn.execute(
+                """UPDATE jobs SET status = ?, data = json_patch(data, ?), updated_at = ?, finished_at = ?
+                   WHERE id = ? AND status = 'running'""",
+                (status, json.dumps(dict(fields, status=status)), now, now, job_id)
+            )
+        return cursor.rowcount == 1
+
+    def request_cancel(self, job_id):
+        """Flag a running job for cancellation; returns False if it is not running"""
+        with self._connection() as conn:
+            cursor = conn.execute(
+                """UPDATE jobs SET data = json_set(data, '$.cancel_requested', json('true')), updated_at = ?
+                   WHERE id = ? AND status = 'running'""",
+                (time.time(), job_id)
+            )
+        return cursor.rowcount == 1
+
+    def cancel_requested(self, job_id):
+        """Whether cancellation of a job was requested (by any worker process)"""
+        row = self._connection().execute(
+            "SELECT json_extract(data, '$.cancel_requested') FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return bool(row and row[0])
+
+    def count(self, status=None):
+        """Number of jobs, optionally only those with a given status"""
+        if status is None:
+            return self._connection().execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        return self._connection().execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def add_event(self, job_id, event, log_file=None):
+        """Append an event to a job's log, numbering it atomically, and return it with its id
+
+        Only the job's last event_buffer events are kept. With log_file, the
+        event is also appended there (the job's full log) while the store is
+        locked, so the file stays in id order across workers.
+        """
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            event_id = conn.execute(
+                "SELECT COALESCE(MAX(id), -1) + 1 FROM job_events WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+            event = dict(event, id=event_id)
+            conn.execute("INSERT INTO job_events (job_id, id, data) VALUES (?, ?, ?)", (job_id, event_id, json.dumps(event)))
+            conn.execute("DELETE FROM job_events WHERE job_id = ? AND id <= ?", (job_id, event_id - self.event_buffer))
+            # Events are progress too: a job logging events is not stale
+            conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+            if log_file is not None:
+                os.makedirs(os.path.dirname(log_file), exist_ok=True)
+                with open(log_file, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(event) + "\n")
+        return event
+
+    def events(self, job_id, after=-1, limit=None):
+        """Return a job's events with an id above after, oldest first"""
+        rows = self._connection().execute(
+            "SELECT data FROM job_events WHERE job_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (job_id, after, -1 if limit is None else limit)
+        )
+        return [json.loads(row["data"]) for row in rows]
+
+    def last_event_id(self, job_id):
+        """Id of a job's newest event, or -1"""
+        return self._connection().execute(
+            "SELECT COALESCE(MAX(id), -1) FROM job_events WHERE job_id = ?", (job_id,)
+        ).fetchone()[0]
+
+    def fail_stale(self):
+        """Mark running jobs not updated for stale_after seconds (their worker died) as errors, so they can expire
+
+        Returns the ids of the jobs marked.
+        """
+        now = time.time()
+        fields = {"status": "error", "error": "Search stopped responding (its worker exited)"}
+        with self._connection() as conn:
+            rows = conn.execute(
+                """UPDATE jobs SET status = 'error', data = json_patch(data, ?), updated_at = ?, finished_at = ?
+                   WHERE status = 'running' AND updated_at < ? RETURNING id""",
+                (json.dumps(fields), now, now, now - self.stale_after)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def evict_expired(self):
+        """Delete jobs (with their events and folders) that finished more than ttl seconds ago and return their ids"""
+        cutoff = time.time() - self.ttl
+        with self._connection() as conn:
+            conn.execute("DELETE FROM job_events WHERE job_id IN (SELECT id FROM jobs WHERE finished_at < ?)", (cutoff,))
+            job_ids = [row["id"] for row in conn.execute("DELETE FROM jobs WHERE finished_at < ? RETURNING id", (cutoff,))]
+        if self.files_dir is not None:
+            for job_id in job_ids:
+                shutil.rmtree(os.path.join(self.files_dir, job_id), ignore_errors=True)
+        return job_ids
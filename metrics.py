@@ -0,0 +1,228 @@
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram buckets: seconds, bytes and results per call
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 2.5e5, 1e6, 2.5e6, 1e7, 5e7)
+RESULTS_BUCKETS = (0, 1, 5, 10, 15, 20)
+
+# Metrics recorded while a run is tracked also go into that run's RunMetrics
+_current_run = contextvars.ContextVar("current_run", default=None)
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}"
+
+def format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    """A named metric with one value per label combination"""
+
+    kind = None
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple((name, str(labels.get(name, ""))) for name in self.label_names)
+
+    def samples(self):
+        """(suffix, labels, value) of every exported sample"""
+        with self._lock:
+            return [("", key, value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{format_labels(labels)} {format_value(value)}")
+        return lines
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        run = _current_run.get()
+        if run is not None:
+            run.inc(self.name, key, amount)
+
+class Gauge(Metric):
+    """A value that goes up and down; set_function makes it read a callback at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name, description, labels=()):
+        super().__init__(name, description, labels)
+        self._function = None
+        if not self.label_names:
+            self._values[()] = 0
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        self._function = function
+
+    def samples(self):
+        if self._function is not None:
+            return [("", (), self._function())]
+        return super().samples()
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, description, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {"buckets": [0] * len(self.buckets), "count": 0, "sum": 0.0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["buckets"][index] += 1
+                    break
+            entry["count"] += 1
+            entry["sum"] += value
+        run = _current_run.get()
+        if run is not None:
+            run.observe(self.name, key, value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, entry in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, entry["buckets"]):
+                    cumulative += count
+                    samples.append(("_bucket", key + (("le", format_value(bound)),), cumulative))
+                samples.append(("_count", key, entry["count"]))
+                samples.append(("_sum", key, entry["sum"]))
+        return samples
+
+class Registry:
+    """The metrics of this process, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name, *args, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = metric_class(name, *args, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name, description, labels=()):
+        return self._register(Counter, name, description, labels)
+
+    def gauge(self, name, description, labels=()):
+        return self._register(Gauge, name, description, labels)
+
+    def histogram(self, name, description, labels=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram, name, description, labels, buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+REGISTRY = Registry()
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    return values[min(len(values) - 1, max(0, math.ceil(fraction * len(values)) - 1))]
+
+class RunMetrics:
+    """Every observation made while one run was tracked, summarized as JSON for its manifest"""
+
+    def __init__(self):
+        self._observations = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, labels, value):
+        with self._lock:
+            self._observations.setdefault((name, labels), []).append(value)
+
+    def inc(self, name, labels, amount):
+        with self._lock:
+            self._counters[(name, labels)] = self._counters.get((name, labels), 0) + amount
+
+    def summary(self):
+        """{metric name: [{labels, count, sum, p50, p99, max} or {labels, value}, ...]}"""
+        summary = {}
+        with self._lock:
+            for (name, labels), values in sorted(self._observations.items()):
+                values = sorted(values)
+                summary.setdefault(name, []).append({
+                    "labels": dict(labels), "count": len(values), "sum": sum(values),
+                    "p50": percentile(values, 0.50), "p99": percentile(values, 0.99), "max": values[-1],
+                })
+            for (name, labels), value in sorted(self._counters.items()):
+                summary.setdefault(name, []).append({"labels": dict(labels), "value": value})
+        return summary
+
+@contextmanager
+def track_run():
+    """Collect the metrics recorded in this context (and tasks and runs started from it) into a RunMetrics"""
+    run = RunMetrics()
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+
+# Hot-path metrics of the search pipeline
+API_CALL_SECONDS = REGISTRY.histogram("search_api_call_seconds", "Latency of Tavily API calls", ("method", "outcome"))
+API_RESPONSE_BYTES = REGISTRY.histogram("search_api_response_bytes", "Page content bytes per Tavily API response",
+                                        ("method",), BYTES_BUCKETS)
+API_RESULTS = REGISTRY.histogram("search_api_results_per_call", "Results per Tavily API response", ("method",),
+                                 RESULTS_BUCKETS)
+HTTP_CONNECTIONS = REGISTRY.counter("search_http_requests_total", "API requests sent on the shared pool, by whether they reused a connection",
+                                    ("reused",))
+HTTP_HEDGES = REGISTRY.counter("search_http_hedges_total", "Duplicate requests sent for slow API calls, by whether the duplicate answered first",
+                               ("outcome",))
+CACHE_REQUESTS = REGISTRY.counter("search_cache_requests_total", "Search cache lookups", ("result",))
+EXTRACTION_SECONDS = REGISTRY.histogram("extraction_page_seconds", "Contact extraction time per page", ("mode",))
+OUTPUT_WRITE_SECONDS = REGISTRY.histogram("output_write_seconds", "Time writing one iteration's results to the output sink", ("format",))
+CELLS_QUEUED = REGISTRY.gauge("search_cells_queued", "Search cells waiting for a worker")
+CELLS_ACTIVE = REGISTRY.gauge("search_cells_active", "Search cells running on a worker")
+
+def response_size(response):
+    """Bytes of page content in an API response (its bulk; counting the JSON exactly would cost a re-encode)"""
+    return sum(len(result.get("raw_content") or result.get("content") or "") for result in response.get("results", []))
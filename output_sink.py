@@ -0,0 +1,185 @@
+import csv
+import gzip
+import json
+import os
+import sqlite3
+import time
+
+# Results format, flush policy and write buffer size (see OUTPUT_FORMATS and DURABILITY_LEVELS)
+DEFAULT_OUTPUT_FORMAT = os.getenv("SEARCH_OUTPUT_FORMAT", "csv")
+DEFAULT_DURABILITY = os.getenv("SEARCH_OUTPUT_DURABILITY", "batch")
+DEFAULT_BUFFER_BYTES = int(os.getenv("SEARCH_OUTPUT_BUFFER_BYTES", str(1024 * 1024)))
+
+OUTPUT_FORMATS = ("csv", "jsonl", "sqlite")
+# close: rows reach the OS when the buffer fills and at close
+# batch: every batch (one search iteration) is flushed to the OS
+# fsync: every batch is flushed and fsynced to disk
+DURABILITY_LEVELS = ("close", "batch", "fsync")
+SINK_EXTENSIONS = {"csv": ".csv", "jsonl": ".jsonl.gz", "sqlite": ".db"}
+
+CSV_FIELDS = ["URL", "Email", "Phone"]
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    url TEXT NOT NULL,
+    email TEXT,
+    phone TEXT,
+    title TEXT,
+    score REAL,
+    query TEXT,
+    search_term TEXT,
+    location TEXT,
+    found_at REAL NOT NULL
+);
+"""
+
+def page_rows(page):
+    """The URL/Email/Phone rows of a page: one per email, or a single 'No email found' row"""
+    phone = "; ".join(page["phones"]) or "No phone found"
+    return [[page["url"], email, phone] for email in page["emails"] or ["No email found"]]
+
+class CsvSink:
+    """Long-lived buffered CSV writer with the URL/Email/Phone columns the merge reads"""
+
+    def __init__(self, path, durability=DEFAULT_DURABILITY, buffer_bytes=DEFAULT_BUFFER_BYTES):
+        self.path = path
+        self.durability = durability
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, mode="a", newline="", encoding="utf-8", buffering=buffer_bytes)
+        self._writer = csv.writer(self._file)
+        if new_file:
+            self._writer.writerow(CSV_FIELDS)
+
+    def write_pages(self, pages):
+        """Write one batch of pages and return the number of rows written"""
+        rows = [row for page in pages for row in page_rows(page)]
+        self._writer.writerows(rows)
+        self._end_batch()
+        return len(rows)
+
+    def _end_batch(self):
+        if self.durability != "close":
+            self._file.flush()
+        if self.durability == "fsync":
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class JsonlSink(CsvSink):
+    """Gzip-compressed JSONL writer keeping every page's full metadata (one record per page)"""
+
+    def __init__(self, path, durability=DEFAULT_DURABILITY, buffer_bytes=DEFAULT_BUFFER_BYTES):
+        self.path = path
+        self.durability = durability
+        self._raw = open(path, mode="ab", buffering=buffer_bytes)
+        # Appending to an existing file adds a gzip member, which readers see as one stream
+        self._file = gzip.open(self._raw, mode="wt", encoding="utf-8")
+
+    def write_pages(self, pages):
+        self._file.write("".join(json.dumps(page) + "\n" for page in pages))
+        self._end_batch()
+        return sum(len(page["emails"]) or 1 for page in pages)
+
+    def _end_batch(self):
+        if self.durability != "close":
+            self._file.flush()
+            self._raw.flush()
+        if self.durability == "fsync":
+            os.fsync(self._raw.fileno())
+
+    def close(self):
+        self._file.close()
+        self._raw.close()
+
+class SqliteSink(CsvSink):
+    """SQLite writer keeping full metadata, one row per email, one transaction per batch"""
+
+    def __init__(self, path, durability=DEFAULT_DURABILITY, buffer_bytes=DEFAULT_BUFFER_BYTES):
+        self.path = path
+        self.durability = durability
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={'FULL' if durability == 'fsync' else 'NORMAL'}")
+        self._conn.executescript(SQLITE_SCHEMA)
+
+    def write_pages(self, pages):
+        rows = [
+            (page["url"], email, "; ".join(page["phones"]) or None, page.get("title"), page.get("score"),
+             page.get("query"), page.get("search_term"), page.get("location"), page["found_at"])
+            for page in pages for email in page["emails"] or [None]
+        ]
+        self._conn.executemany("INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        if self.durability != "close":
+            self._conn.commit()
+        return len(rows)
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+
+SINK_CLASSES = {"csv": CsvSink, "jsonl": JsonlSink, "sqlite": SqliteSink}
+
+def sink_path(folder, basename, output_format=DEFAULT_OUTPUT_FORMAT):
+    """Path of a search's output file in a given format"""
+    return os.path.join(folder, basename + SINK_EXTENSIONS[output_format])
+
+def open_sink(path, output_format=DEFAULT_OUTPUT_FORMAT, durability=DEFAULT_DURABILITY, buffer_bytes=DEFAULT_BUFFER_BYTES):
+    """Open the output sink of a search, appending to an existing file"""
+    if output_format not in SINK_CLASSES:
+        raise ValueError(f"Unknown output format {output_format!r} (expected one of {', '.join(OUTPUT_FORMATS)})")
+    if durability not in DURABILITY_LEVELS:
+        raise ValueError(f"Unknown durability {durability!r} (expected one of {', '.join(DURABILITY_LEVELS)})")
+    return SINK_CLASSES[output_format](path, durability, buffer_bytes)
+
+def is_sink_file(file_name):
+    return file_name.endswith(tuple(SINK_EXTENSIONS.values()))
+
+def sink_basename(path):
+    """File name of a sink without its format extension"""
+    file_name = os.path.basename(path)
+    for extension in SINK_EXTENSIONS.values():
+        if file_name.endswith(extension):
+            return file_name[:-len(extension)]
+    return file_name
+
+def iter_sink_rows(path):
+    """Stream the rows of any sink file as URL/Email/Phone dicts, like the CSV format stores them"""
+    if not os.path.exists(path):
+        return
+    if path.endswith(SINK_EXTENSIONS["jsonl"]):
+        with gzip.open(path, mode="rt", encoding="utf-8") as f:
+            for line in f:
+                for url, email, phone in page_rows(json.loads(line)):
+                    yield {"URL": url, "Email": email, "Phone": phone}
+    elif path.endswith(SINK_EXTENSIONS["sqlite"]):
+        conn = sqlite3.connect(path)
+        try:
+            for url, email, phone in conn.execute("SELECT url, email, phone FROM results ORDER BY rowid"):
+                yield {"URL": url, "Email": email or "No email found", "Phone": phone or "No phone found"}
+        finally:
+            conn.close()
+    else:
+        with open(path, mode="r", newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+
+class ProgressSummary:
+    """Prints running totals at most every interval seconds, in place of one line per row"""
+
+    def __init__(self, label, interval=5.0):
+        self.label = label
+        self.interval = interval
+        self._last = time.monotonic()
+
+    def update(self, counts, force=False):
+        now = time.monotonic()
+        if force or now - self._last >= self.interval:
+            self._last = now
+            print(f"  📊 {self.label}: {counts['pages']} pages, {counts['rows_written']} rows, "
+                  f"{counts['emails_found']} emails so far", flush=True)
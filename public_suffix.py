@@ -0,0 +1,185 @@
+import argparse
+import marshal
+import os
+import threading
+import time
+from functools import lru_cache
+from urllib.parse import urlparse
+
+# Public Suffix List source and its compiled trie. The list is read offline (e.g. the
+# distribution's publicsuffix package); the trie is rebuilt when it changes
+DEFAULT_SUFFIX_LIST = os.getenv("PUBLIC_SUFFIX_LIST", "/usr/share/publicsuffix/public_suffix_list.dat")
+DEFAULT_COMPILED_PATH = os.getenv("PUBLIC_SUFFIX_COMPILED",
+                                  os.path.join(os.path.dirname(os.path.abspath(__file__)), "public_suffix.trie"))
+# Registered domains memoized per host; result pages repeat a small set of hosts
+LOOKUP_CACHE_SIZE = 65536
+COMPILED_FORMAT = 1
+
+# Trie node markers, stored under the empty label (no real label is empty)
+RULE = 1
+EXCEPTION = 2
+
+# Used when neither the list nor a compiled trie is available: the default "*" rule
+# plus the multi-label suffixes our searches hit most
+FALLBACK_RULES = (
+    "co.il", "org.il", "net.il", "ac.il", "gov.il", "muni.il", "k12.il",
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "ltd.uk", "plc.uk", "nhs.uk",
+    "com.au", "org.au", "net.au", "edu.au", "gov.au",
+    "co.nz", "org.nz", "co.za", "org.za", "co.jp", "or.jp", "ne.jp",
+    "com.br", "com.mx", "com.ar", "com.tr", "com.cn", "com.hk", "com.sg", "co.in", "org.in",
+    "github.io", "blogspot.com", "wixsite.com", "squarespace.com", "wordpress.com", "herokuapp.com",
+)
+
+_suffix_trie = None
+_suffix_trie_lock = threading.Lock()
+
+def parse_rules(lines, private=True):
+    """Yield the rules of a Public Suffix List, optionally without its private (e.g. github.io) section"""
+    for line in lines:
+        line = line.strip()
+        if line.startswith("// ===BEGIN PRIVATE DOMAINS===") and not private:
+            return
+        if line and not line.startswith("//"):
+            yield line.split()[0].lower()
+
+def rule_labels(rule):
+    """Labels of a rule right to left, in Unicode and (when they differ) in the ASCII form URLs carry"""
+    labels = rule.lstrip("!").split(".")[::-1]
+    forms = [labels]
+    try:
+        ascii_labels = [label if label == "*" else label.encode("idna").decode("ascii") for label in labels]
+    except UnicodeError:
+        return forms
+    if ascii_labels != labels:
+        forms.append(ascii_labels)
+    return forms
+
+def compile_rules(rules):
+    """Build the suffix trie: nested dicts keyed by label, right to left, '*' for wildcards"""
+    trie = {}
+    for rule in rules:
+        marker = EXCEPTION if rule.startswith("!") else RULE
+        for labels in rule_labels(rule):
+            node = trie
+            for label in labels:
+                node = node.setdefault(label, {})
+            node[""] = marker
+    return trie
+
+def source_signature(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def compile_list(source=DEFAULT_SUFFIX_LIST, compiled_path=DEFAULT_COMPILED_PATH, private=True):
+    """Compile a Public Suffix List into a trie file and return the trie"""
+    with open(source, mode="r", encoding="utf-8") as f:
+        trie = compile_rules(parse_rules(f, private))
+    data = {"format": COMPILED_FORMAT, "source": source_signature(source), "private": private, "trie": trie}
+    tmp_path = f"{compiled_path}.{os.getpid()}.tmp"
+    with open(tmp_path, mode="wb") as f:
+        marshal.dump(data, f)
+    os.replace(tmp_path, compiled_path)
+    return trie
+
+def load_trie(source=DEFAULT_SUFFIX_LIST, compiled_path=DEFAULT_COMPILED_PATH, private=True):
+    """Load the compiled trie, recompiling it if the list changed, or fall back to the built-in rules"""
+    source_exists = os.path.exists(source)
+    try:
+        with open(compiled_path, mode="rb") as f:
+            data = marshal.load(f)
+        if (data.get("format") == COMPILED_FORMAT and data.get("private") == private
+                and (not source_exists or data.get("source") == source_signature(source))):
+            return data["trie"]
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    if source_exists:
+        try:
+            return compile_list(source, compiled_path, private)
+        except OSError:
+            # Read-only install: use the list without caching its trie
+            with open(source, mode="r", encoding="utf-8") as f:
+                return compile_rules(parse_rules(f, private))
+    print(f"⚠️ Public Suffix List not found at {source}; using built-in rules (set PUBLIC_SUFFIX_LIST)")
+    return compile_rules(FALLBACK_RULES)
+
+def get_suffix_trie():
+    """Return the process-wide suffix trie, loading it on first use"""
+    global _suffix_trie
+    with _suffix_trie_lock:
+        if _suffix_trie is None:
+            _suffix_trie = load_trie()
+        return _suffix_trie
+
+def suffix_length(trie, labels):
+    """Number of trailing labels (labels given right to left) that form the public suffix"""
+    node = trie
+    length = 0
+    for depth, label in enumerate(labels, 1):
+        child = node.get(label)
+        if child is not None and child.get("") == EXCEPTION:
+            return depth - 1
+        wildcard = node.get("*")
+        if (child is not None and child.get("") == RULE) or wildcard is not None:
+            length = depth
+        node = child if child is not None else wildcard
+        if node is None:
+            break
+    # Unlisted TLDs are public suffixes too (the implicit "*" rule)
+    return length or 1
+
+def normalize_host(url_or_host):
+    """Lowercase host of a URL or host name, without scheme, credentials, port or trailing dot"""
+    value = (url_or_host or "").strip().lower()
+    if "//" in value:
+        value = urlparse(value).netloc
+    value = value.rsplit("@", 1)[-1]
+    if value.startswith("["):
+        return value.split("]", 1)[0] + "]"
+    return value.split(":", 1)[0].rstrip(".")
+
+@lru_cache(maxsize=LOOKUP_CACHE_SIZE)
+def registered_domain(host):
+    """Registered domain (eTLD+1) of a host name: locations.example.org and www.example.org give example.org
+
+    Hosts that are IP addresses or public suffixes themselves are returned unchanged.
+    """
+    host = normalize_host(host)
+    if not host or host.startswith("[") or host.replace(".", "").isdigit():
+        return host
+    labels = host.split(".")
+    length = suffix_length(get_suffix_trie(), labels[::-1])
+    if length >= len(labels):
+        return host
+    return ".".join(labels[-length - 1:])
+
+def public_suffix(host):
+    """Public suffix (eTLD) of a host name, e.g. co.uk for www.example.co.uk"""
+    host = normalize_host(host)
+    labels = host.split(".")
+    return ".".join(labels[-suffix_length(get_suffix_trie(), labels[::-1]):])
+
+def url_registered_domain(url):
+    """Registered domain of a URL's host, or '' without a URL"""
+    return registered_domain(urlparse(url).netloc) if url else ""
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile the Public Suffix List or look up registered domains')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    compile_parser = subparsers.add_parser('compile', help='Compile the list into the trie file')
+    compile_parser.add_argument('--source', default=DEFAULT_SUFFIX_LIST, help='Public Suffix List file')
+    compile_parser.add_argument('--output', default=DEFAULT_COMPILED_PATH, help='Compiled trie file')
+    compile_parser.add_argument('--icann-only', action='store_true', help='Leave out private suffixes such as github.io')
+    lookup_parser = subparsers.add_parser('lookup', help='Print the registered domain of hosts or URLs')
+    lookup_parser.add_argument('hosts', nargs='+')
+    args = parser.parse_args()
+
+    if args.command == 'compile':
+        started = time.perf_counter()
+        trie = compile_list(args.source, args.output, private=not args.icann_only)
+        print(f"✅ Compiled {len(trie)} top-level suffixes to {args.output} in {time.perf_counter() - started:.2f}s")
+    else:
+        for host in args.hosts:
+            print(f"{host}\t{registered_domain(normalize_host(host))}")
+
+if __name__ == "__main__":
+    main()
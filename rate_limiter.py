@@ -0,0 +1,305 @@
+import asyncio
+import fcntl
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import httpx
+from tavily import UsageLimitExceededError
+from tavily.errors import TimeoutError as TavilyTimeoutError
+
+from metrics import API_CALL_SECONDS, API_RESPONSE_BYTES, API_RESULTS, response_size
+
+# Search calls per second and their burst, and the ceiling of the AIMD concurrency limit
+DEFAULT_RATE = float(os.getenv("SEARCH_RATE_LIMIT", "2"))
+DEFAULT_BURST = int(os.getenv("SEARCH_RATE_BURST", "5"))
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("SEARCH_MAX_CONCURRENCY", "16"))
+DEFAULT_RATE_LIMIT_FILE = os.getenv("SEARCH_RATE_LIMIT_FILE")  # set to share the bucket across processes
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+# Errors that mean "slow down" rather than "this request is wrong"
+THROTTLE_ERRORS = (UsageLimitExceededError, TavilyTimeoutError, httpx.TimeoutException)
+
+_shared_limiter = None
+_shared_limiter_lock = threading.Lock()
+
+def is_throttle_error(error):
+    """Check whether an API error should shrink the concurrency limit and be retried"""
+    if isinstance(error, THROTTLE_ERRORS):
+        return True
+    return isinstance(error, httpx.HTTPStatusError) and error.response.status_code >= 500
+
+class TokenBucket:
+    """Thread-safe token bucket; reserve() returns how long the caller must wait for its token"""
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def drain(self):
+        """Empty the bucket after the server pushed back"""
+        with self._lock:
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = time.monotonic()
+
+class FileTokenBucket(TokenBucket):
+    """Token bucket whose state lives in a locked file, shared by every process using the same path"""
+
+    def __init__(self, path, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        super().__init__(rate, burst)
+        self.path = path
+
+    def _update(self, change):
+        with self._lock, open(self.path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            try:
+                state = json.loads(f.read() or "{}")
+            except ValueError:
+                state = {}
+            now = time.time()
+            tokens = min(self.burst, state.get("tokens", self.burst) + (now - state.get("updated", now)) * self.rate)
+            tokens = change(tokens)
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps({"tokens": tokens, "updated": now}))
+            return tokens
+
+    def reserve(self):
+        tokens = self._update(lambda tokens: tokens - 1)
+        return 0.0 if tokens >= 0 else -tokens / self.rate
+
+    def drain(self):
+        self._update(lambda tokens: min(tokens, 0.0))
+
+class AdaptiveRateLimiter:
+    """Token bucket plus an AIMD concurrency limit shared by every search call in the process
+
+    Each successful call raises the concurrency limit by 1/limit (about +1 per
+    round trip of the whole window); a 429, timeout or 5xx halves it. Callers
+    over the limit queue in arrival order and sleep until a freed slot is handed
+    to them, from whichever thread or event loop frees it.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 min_concurrency=1, decrease_factor=0.5, state_file=DEFAULT_RATE_LIMIT_FILE):
+        self.bucket = FileTokenBucket(state_file, rate, burst) if state_file else TokenBucket(rate, burst)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.decrease_factor = decrease_factor
+        self.limit = float(max(min_concurrency, min(max_concurrency, burst)))
+        self.in_flight = 0
+        self.waiting = 0
+        self.successes = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+        self._waiters = deque()  # wake-up callbacks of queued callers, oldest first
+        # The file-backed bucket locks and reads a file, which must not block an event loop
+        self._blocking_bucket = isinstance(self.bucket, FileTokenBucket)
+
+    def _enter_or_queue(self, wake):
+        """Take a slot now (True) or queue wake to be called once a slot is handed over (False)"""
+        with self._lock:
+            if not self._waiters and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            self._waiters.append(wake)
+            self.waiting += 1
+            return False
+
+    def _hand_over_slots(self):
+        """Give free slots to queued callers; callers hold the lock"""
+        while self._waiters and self.in_flight < int(self.limit):
+            wake = self._waiters.popleft()
+            self.waiting -= 1
+            self.in_flight += 1
+            try:
+                wake()
+            except RuntimeError:
+                self.in_flight -= 1  # The waiter's event loop is closed
+
+    def acquire(self):
+        """Block until a concurrency slot and a token are available"""
+        slot_free = threading.Event()
+        if not self._enter_or_queue(slot_free.set):
+            slot_free.wait()
+        time.sleep(self.bucket.reserve())
+
+    async def acquire_async(self):
+        """Wait (without blocking the event loop) for a concurrency slot and a token"""
+        loop = asyncio.get_running_loop()
+        slot_free = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: slot_free.done() or slot_free.set_result(None))
+
+        if not self._enter_or_queue(wake):
+            try:
+                await slot_free
+            except asyncio.CancelledError:
+                with self._lock:
+                    queued = wake in self._waiters
+                    if queued:
+                        self._waiters.remove(wake)
+                        self.waiting -= 1
+                if not queued:
+                    self.abandon()  # The slot was handed over as the wait was cancelled
+                raise
+        try:
+            delay = await asyncio.to_thread(self.bucket.reserve) if self._blocking_bucket else self.bucket.reserve()
+            await asyncio.sleep(delay)
+        except BaseException:
+            self.abandon()
+            raise
+
+    def abandon(self):
+        """Free the slot of a call that was cancelled or failed, without adjusting the limit"""
+        with self._lock:
+            self.in_flight -= 1
+            self._hand_over_slots()
+
+    def release(self, throttled=False):
+        """Free the slot and adjust the concurrency limit"""
+        with self._lock:
+            self.in_flight -= 1
+            if throttled:
+                self.throttled += 1
+                self.limit = max(self.min_concurrency, self.limit * self.decrease_factor)
+            else:
+                self.successes += 1
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self._hand_over_slots()
+        if throttled:
+            self.bucket.drain()
+
+    async def release_async(self, throttled=False):
+        """release() for event loop callers, keeping a file-backed bucket's I/O off the loop"""
+        if throttled and self._blocking_bucket:
+            await asyncio.to_thread(self.release, throttled)
+        else:
+            self.release(throttled)
+
+    def stats(self):
+        """Return the current limits and counters"""
+        with self._lock:
+            return {
+                "rate": self.bucket.rate,
+                "burst": self.bucket.burst,
+                "concurrency_limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "successes": self.successes,
+                "throttled": self.throttled,
+            }
+
+def get_rate_limiter():
+    """Return the process-wide rate limiter"""
+    global _shared_limiter
+    with _shared_limiter_lock:
+        if _shared_limiter is None:
+            _shared_limiter = AdaptiveRateLimiter()
+        return _shared_limiter
+
+def backoff_delay(attempt):
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+class RateLimitedClient:
+    """Async Tavily client wrapper that sends search and extract calls through the rate limiter"""
+
+    def __init__(self, client, limiter=None, max_retries=MAX_RETRIES):
+        self.client = client
+        self.limiter = limiter or get_rate_limiter()
+        self.max_retries = max_retries
+
+    async def _call(self, method, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire_async()
+            started = time.perf_counter()
+            try:
+                result = await getattr(self.client, method)(*args, **kwargs)
+            except asyncio.CancelledError:
+                self.limiter.abandon()
+                raise
+            except Exception as e:
+                if not is_throttle_error(e):
+                    API_CALL_SECONDS.observe(time.perf_counter() - started, method=method, outcome="error")
+                    self.limiter.abandon()
+                    raise
+                API_CALL_SECONDS.observe(time.perf_counter() - started, method=method, outcome="throttled")
+                await self.limiter.release_async(throttled=True)
+                if attempt == self.max_retries:
+                    raise
+                print(f"⏳ {method} throttled ({type(e).__name__}), retrying (attempt {attempt + 1}/{self.max_retries})")
+                await asyncio.sleep(backoff_delay(attempt))
+                continue
+            API_CALL_SECONDS.observe(time.perf_counter() - started, method=method, outcome="ok")
+            API_RESPONSE_BYTES.observe(response_size(result), method=method)
+            API_RESULTS.observe(len(result.get("results", [])), method=method)
+            self.limiter.release()
+            return result
+
+    async def search(self, query, **kwargs):
+        return await self._call("search", query, **kwargs)
+
+    async def extract(self, urls, **kwargs):
+        return await self._call("extract", urls, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+class RateLimitedSyncClient:
+    """Blocking Tavily client wrapper that shares the same rate limiter"""
+
+    def __init__(self, client, limiter=None, max_retries=MAX_RETRIES):
+        self.client = client
+        self.limiter = limiter or get_rate_limiter()
+        self.max_retries = max_retries
+
+    def _call(self, method, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            started = time.perf_counter()
+            try:
+                result = getattr(self.client, method)(*args, **kwargs)
+            except Exception as e:
+                if not is_throttle_error(e):
+                    API_CALL_SECONDS.observe(time.perf_counter() - started, method=method, outcome="error")
+                    self.limiter.abandon()
+                    raise
+                API_CALL_SECONDS.observe(time.perf_counter() - started, method=method, outcome="throttled")
+                self.limiter.release(throttled=True)
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(backoff_delay(attempt))
+                continue
+            API_CALL_SECONDS.observe(time.perf_counter() - started, method=method, outcome="ok")
+            API_RESPONSE_BYTES.observe(response_size(result), method=method)
+            API_RESULTS.observe(len(result.get("results", [])), method=method)
+            self.limiter.release()
+            return result
+
+    def search(self, query, **kwargs):
+        return self._call("search", query, **kwargs)
+
+    def extract(self, urls, **kwargs):
+        return self._call("extract", urls, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
@@ -0,0 +1,86 @@
+import csv
+import io
+import itertools
+import zlib
+
+from contact_index import normalize_domain
+from domain_suppression import url_domain
+
+# Rows serialized per chunk of a streamed download
+DOWNLOAD_CHUNK_ROWS = 1000
+
+# Columns of the rows read from the contact index while a job runs
+INDEX_FIELDS = ["URL", "Email", "Phone", "Organization", "SearchTerm", "Location"]
+
+def read_csv_rows(path):
+    """Return the header of a results CSV and a lazy iterator over its rows (the file opens on the first row read)"""
+    with open(path, mode="r", newline="", encoding="utf-8") as f:
+        fieldnames = next(csv.reader(f), [])
+
+    def rows():
+        with open(path, mode="r", newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+    return fieldnames, rows()
+
+def index_rows(index, cells, since=None):
+    """Rows found so far by a job's cells, read from the contact index in merged CSV shape
+
+    cells maps each cell's (query, location), as the cell indexed its contacts
+    (see search_engine.cell_query), to its search term.
+    """
+    for contact in index.iter_found(list(cells), since):
+        yield {
+            "URL": contact["url"] or "",
+            "Email": contact["display_email"],
+            "Phone": contact["phone"] or "No phone found",
+            "Organization": url_domain(contact["url"]),
+            "SearchTerm": cells.get((contact["query"], contact["location"]), contact["query"]),
+            "Location": contact["location"],
+        }
+
+def row_matches(row, term=None, location=None, domain=None):
+    """Check a row against optional search term, location and domain filters (case-insensitive)"""
+    if term and (row.get("SearchTerm") or "").casefold() != term.casefold():
+        return False
+    if location and (row.get("Location") or "").casefold() != location.casefold():
+        return False
+    if domain and normalize_domain(row.get("URL")) != normalize_domain(domain):
+        return False
+    return True
+
+def filter_rows(rows, term=None, location=None, domain=None):
+    """Lazily keep the rows matching every given filter"""
+    if not (term or location or domain):
+        return rows
+    return (row for row in rows if row_matches(row, term, location, domain))
+
+def project_rows(rows, columns):
+    """Keep only the given columns of every row"""
+    return ({column: row.get(column, "") for column in columns} for row in rows)
+
+def paginate(rows, offset, limit):
+    """Return one page of a row stream and whether more rows follow, reading no further than needed"""
+    page = list(itertools.islice(rows, offset, offset + limit + 1))
+    return page[:limit], len(page) > limit
+
+def csv_chunks(columns, rows):
+    """Serialize rows to CSV text in chunks of DOWNLOAD_CHUNK_ROWS rows, header first"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % DOWNLOAD_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def gzip_chunks(chunks, level=6):
+    """Compress a stream of text chunks into a gzip stream as it is produced"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip header and trailer
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,203 @@
+import argparse
+import csv
+import json
+import os
+import re
+import time
+
+from settings import data_path
+from sqlite_store import SQLiteStore
+
+# SQLite database of run manifests
+DEFAULT_REGISTRY_PATH = os.getenv("RUN_REGISTRY_PATH", data_path("runs.db"))
+
+# Written into every run folder next to search/ and final/
+MANIFEST_FILE = "manifest.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    query_key TEXT,
+    location TEXT,
+    run_folder TEXT NOT NULL,
+    result_path TEXT,
+    status TEXT NOT NULL,
+    result_count INTEGER,
+    started_at REAL,
+    finished_at REAL,
+    manifest TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_query ON runs(query, location, finished_at);
+"""
+
+# Created after the query_key column is known to exist (registries from before it get it added)
+QUERY_KEY_INDEX = "CREATE INDEX IF NOT EXISTS runs_query_key ON runs(query_key, finished_at)"
+
+# Stored in PRAGMA user_version; registries keyed by an older normalize_query are rekeyed on open
+# (version 1 stopped stripping plural endings, which merged queries like 'news' and 'new')
+QUERY_KEY_VERSION = 1
+
+QUERY_TOKEN_REGEX = re.compile(r"[a-z0-9]+")
+
+def normalize_query(query):
+    """Key under which equivalent queries match: case, punctuation and word order are ignored"""
+    return " ".join(sorted(QUERY_TOKEN_REGEX.findall((query or "").lower())))
+
+# Legacy run folders are named <sanitized query>_<YYYYmmdd>_<HHMMSS>
+RUN_FOLDER_REGEX = re.compile(r"^(?P<query>.+)_(?P<timestamp>\d{8}_\d{6})$")
+
+def write_manifest(manifest):
+    """Write a run's manifest into its run folder, replacing any previous one atomically"""
+    path = os.path.join(manifest["run_folder"], MANIFEST_FILE)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, path)
+    return path
+
+def read_manifest(run_folder):
+    """Read a run folder's manifest, or None if it has none"""
+    path = os.path.join(run_folder, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+class RunRegistry(SQLiteStore):
+    """SQLite (WAL mode) registry of run manifests, indexed by query and location"""
+
+    def __init__(self, path=DEFAULT_REGISTRY_PATH):
+        super().__init__(path)
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(runs)")}
+            if "query_key" not in columns:
+                conn.execute("ALTER TABLE runs ADD COLUMN query_key TEXT")
+            if conn.execute("PRAGMA user_version").fetchone()[0] < QUERY_KEY_VERSION:
+                for row in conn.execute("SELECT run_id, query FROM runs").fetchall():
+                    conn.execute("UPDATE runs SET query_key = ? WHERE run_id = ?", (normalize_query(row["query"]), row["run_id"]))
+                conn.execute(f"PRAGMA user_version = {QUERY_KEY_VERSION}")
+            conn.execute(QUERY_KEY_INDEX)
+
+    def record(self, manifest):
+        """Add or replace a run's manifest"""
+        with self._connection() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO runs (run_id, query, query_key, location, run_folder, result_path, status, result_count,
+                                                started_at, finished_at, manifest)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (manifest["run_id"], manifest["query"], normalize_query(manifest["query"]), manifest.get("location"), manifest["run_folder"],
+                 manifest.get("result_path"), manifest["status"], manifest.get("counts", {}).get("result_count"),
+                 manifest.get("started_at"), manifest.get("finished_at"), json.dumps(manifest))
+            )
+
+    def get(self, run_id):
+        """Return a run's manifest, or None"""
+        row = self._connection().execute("SELECT manifest FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return json.loads(row["manifest"]) if row else None
+
+    def find(self, query=None, location=None, status="completed", since=None, limit=None, query_key=None):
+        """Return matching run manifests, newest first"""
+        clauses = []
+        params = []
+        for column, value in (("query", query), ("location", location), ("status", status), ("query_key", query_key)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("finished_at >= ?")
+            params.append(since)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(-1 if limit is None else limit)
+        rows = self._connection().execute(f"SELECT manifest FROM runs{where} ORDER BY finished_at DESC LIMIT ?", params)
+        return [json.loads(row["manifest"]) for row in rows]
+
+    def find_reusable(self, query, max_age):
+        """Newest completed, merged run of an equivalent query that finished within max_age seconds, or None
+
+        Runs with global suppression are skipped: they hold only the results no earlier run had.
+        """
+        for manifest in self.find(query_key=normalize_query(query), since=time.time() - max_age):
+            if manifest.get("global_suppression", bool(manifest.get("seen_filter"))):
+                continue
+            result_path = manifest.get("result_path")
+            if result_path and result_path.endswith(".csv") and os.path.exists(result_path):
+                return manifest
+        return None
+
+    def import_tree(self, root):
+        """Register run folders created before the registry existed and return how many were added
+
+        Folders with a manifest are registered as-is. Older folders get a manifest
+        rebuilt from their name and files, counting their results once.
+        """
+        count = 0
+        for folder_name in sorted(os.listdir(root)):
+            run_folder = os.path.join(root, folder_name)
+            if not os.path.isdir(run_folder) or self.get(folder_name) is not None:
+                continue
+            manifest = read_manifest(run_folder) or legacy_manifest(run_folder)
+            if manifest is None:
+                continue
+            self.record(manifest)
+            count += 1
+        return count
+
+def legacy_manifest(run_folder):
+    """Rebuild a manifest for a run folder written before manifests existed, or None if it is not a run folder"""
+    match = RUN_FOLDER_REGEX.match(os.path.basename(run_folder))
+    result_path = os.path.join(run_folder, "final", "merged_cleaned_results.csv")
+    if match is None or not os.path.exists(result_path):
+        return None
+    with open(result_path, mode="r", newline="", encoding="utf-8") as f:
+        result_count = sum(1 for _ in csv.DictReader(f))
+    finished_at = os.path.getmtime(result_path)
+    return {
+        "run_id": os.path.basename(run_folder),
+        "query": match.group("query").replace("_", " "),
+        "location": None,
+        "run_folder": run_folder,
+        "result_path": result_path,
+        "status": "completed",
+        "started_at": time.mktime(time.strptime(match.group("timestamp"), "%Y%m%d_%H%M%S")),
+        "finished_at": finished_at,
+        "counts": {"result_count": result_count},
+        "imported": True,
+    }
+
+def main():
+    """Command line access to the run registry"""
+    parser = argparse.ArgumentParser(description='List and inspect recorded search runs')
+    parser.add_argument('--db', default=DEFAULT_REGISTRY_PATH, help=f'Registry database path (default: {DEFAULT_REGISTRY_PATH})')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='Register existing run folders')
+    import_parser.add_argument('folders', nargs='+', help='Folders holding run folders (e.g. business_searches)')
+
+    list_parser = subparsers.add_parser('list', help='List runs, newest first')
+    list_parser.add_argument('--query', help='Only list runs of this query')
+    list_parser.add_argument('--location', help='Only list runs in this location')
+    list_parser.add_argument('--limit', type=int, default=20, help='Number of runs to list (default: 20)')
+
+    show_parser = subparsers.add_parser('show', help='Print a run manifest')
+    show_parser.add_argument('run_id', help='Run id (the run folder name)')
+    args = parser.parse_args()
+
+    registry = RunRegistry(args.db)
+    if args.command == 'import':
+        for folder in args.folders:
+            print(f"📥 Registered {registry.import_tree(folder)} runs from {folder}")
+    elif args.command == 'list':
+        for manifest in registry.find(args.query, args.location, limit=args.limit):
+            counts = manifest.get("counts", {})
+            print(f"{manifest['run_id']}  {manifest['query']!r}  {counts.get('result_count', '?')} results  {manifest.get('result_path')}")
+    elif args.command == 'show':
+        manifest = registry.get(args.run_id)
+        if manifest is None:
+            print(f"❌ No run {args.run_id}")
+        else:
+            print(json.dumps(manifest, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import CACHE_REQUESTS
+from settings import data_path
+
+# Cache folder, entry lifetime (seconds) and size cap (bytes) of cached search responses
+DEFAULT_CACHE_DIR = os.getenv("TAVILY_CACHE_DIR", data_path(".search_cache"))
+DEFAULT_TTL_SECONDS = int(os.getenv("TAVILY_CACHE_TTL", str(24 * 60 * 60)))
+DEFAULT_MAX_BYTES = int(os.getenv("TAVILY_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+def cache_key(query, max_results=None, include_raw_content=None, exclude_domains=None, **kwargs):
+    """Build the content address for a search request"""
+    request = {
+        "query": query,
+        "max_results": max_results,
+        "include_raw_content": include_raw_content,
+        "exclude_domains": sorted({domain.strip().lower() for domain in exclude_domains or []}),
+        "options": kwargs,
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+class SearchCache:
+    """On-disk cache of search responses with a TTL and LRU eviction by total bytes
+
+    The cache folder is the source of truth, so every process (and every
+    instance) sharing it serves the others' entries. The in-memory LRU index
+    is kept up to date by this instance's own gets and puts, and rebuilt from
+    the files only at startup and when a put finds that the folder changed
+    since this instance last wrote (another process added or evicted
+    entries), so the byte budget covers what every process wrote.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl_seconds=DEFAULT_TTL_SECONDS, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self._total_bytes = 0
+        self._folder_version = None  # folder mtime after this instance's last change
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json.gz")
+
+    def _folder_mtime(self):
+        return os.stat(self.cache_dir).st_mtime_ns
+
+    def _load_index(self):
+        """Rebuild the LRU order from the files on disk (mtime is the last access time)"""
+        self._folder_version = self._folder_mtime()
+        entries = []
+        for file_name in os.listdir(self.cache_dir):
+            if file_name.endswith(".json.gz"):
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, file_name))
+                except FileNotFoundError:
+                    continue  # Evicted by another process meanwhile
+                entries.append((stat.st_mtime, file_name[:-len(".json.gz")], stat.st_size))
+        self._entries.clear()
+        self._total_bytes = 0
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    def _remove(self, key):
+        size = self._entries.pop(key, 0)
+        self._total_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def get(self, key):
+        """Return the cached response for a key, or None on a miss"""
+        with self._lock:
+            # Read the file even if the index does not know it: another process may have written it
+            try:
+                with gzip.open(self._path(key), "rt", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except FileNotFoundError:
+                self._total_bytes -= self._entries.pop(key, 0)
+                self.misses += 1
+                return None
+            except (OSError, ValueError):
+                entry = None
+            if entry is None or time.time() - entry["created"] > self.ttl_seconds:
+                self._remove(key)
+                self.misses += 1
+                return None
+            try:
+                os.utime(self._path(key))
+                if key not in self._entries:
+                    size = os.path.getsize(self._path(key))
+                    self._entries[key] = size
+                    self._total_bytes += size
+            except FileNotFoundError:
+                pass  # Evicted by another process after we read it
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["response"]
+
+    def put(self, key, response):
+        """Store a response and evict least recently used entries over the byte budget"""
+        data = gzip.compress(json.dumps({"created": time.time(), "response": response}).encode("utf-8"))
+        with self._lock:
+            # Files are only added or removed by puts and evictions, so a folder that changed since
+            # this instance's last change was written to by another process: count its entries first
+            if self._folder_mtime() != self._folder_version:
+                self._load_index()
+            tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+            self._total_bytes += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+            self._folder_version = self._folder_mtime()
+
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+            }
+
+class CachedSearchClient:
+    """Async Tavily client wrapper that answers repeated searches from a SearchCache"""
+
+    def __init__(self, client, cache):
+        self.client = client
+        self.cache = cache
+
+    async def search(self, query, **kwargs):
+        key = cache_key(query, **kwargs)
+        response = self.cache.get(key)
+        if response is not None:
+            CACHE_REQUESTS.inc(result="hit")
+            return response
+        CACHE_REQUESTS.inc(result="miss")
+        response = await self.client.search(query, **kwargs)
+        self.cache.put(key, response)
+        return response
+
+    def __getattr__(self, name):
+        # Everything except search goes straight to the wrapped client
+        return getattr(self.client, name)
@@ -0,0 +1,145 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import business_search_complete
+from business_search_complete import emit_progress
+from metrics import CELLS_ACTIVE, CELLS_QUEUED
+from run_registry import normalize_query
+from seen_filter import DEFAULT_GLOBAL_SUPPRESSION
+
+# Number of search cells run at the same time
+DEFAULT_MAX_WORKERS = int(os.getenv("SEARCH_MAX_WORKERS", "4"))
+
+# How old (seconds) an equivalent earlier run may be for its results to be reused; 0 (the default) disables reuse
+DEFAULT_REUSE_MAX_AGE = int(os.getenv("SEARCH_REUSE_MAX_AGE", "0"))
+
+def cell_query(search_term, location):
+    """The query a term×location cell searches for"""
+    return f"{location} {search_term}"
+
+def plan_search_cells(search_term_list, location_list, iterations=10, max_age=DEFAULT_REUSE_MAX_AGE, registry=None):
+    """Decide which term×location cells need a new search, in matrix order
+
+    Each plan has the cell's search_term, location and normalized query_key,
+    plus either 'reuse' (the manifest of an equivalent run that finished within
+    max_age seconds with at least as many iterations) or 'same_as' (the index of
+    an equivalent cell earlier in the matrix). Cells with neither are searched.
+    """
+    plans = []
+    first_cell = {}
+    for search_term in search_term_list:
+        for location in location_list:
+            query_key = normalize_query(cell_query(search_term, location))
+            plan = {'search_term': search_term, 'location': location, 'query_key': query_key}
+            if query_key in first_cell:
+                plan['same_as'] = first_cell[query_key]
+            else:
+                first_cell[query_key] = len(plans)
+                if registry is not None and max_age > 0:
+                    manifest = registry.find_reusable(cell_query(search_term, location), max_age)
+                    if manifest is not None and (manifest.get('iterations') or iterations) >= iterations:
+                        plan['reuse'] = manifest
+            plans.append(plan)
+    return plans
+
+def reused_cell(search_term, location, manifest):
+    """Cell result answered by an earlier run"""
+    return {
+        'search_term': search_term,
+        'location': location,
+        'csv_path': manifest['result_path'],
+        'run_id': manifest['run_id'],
+        'result_count': manifest.get('counts', {}).get('result_count'),
+        'reused': True
+    }
+
+def run_search_cell(search_term, location, iterations=10, parent_folder="business_searches", progress=None,
+                    cancel=None, **search_options):
+    """Run one term×location search in-process and return the cell result
+
+    A cell whose job was cancelled before it started returns at once with no
+    results (marked 'skipped'); one cancelled while running returns its partial results.
+    """
+    CELLS_QUEUED.dec()
+    if cancel is not None and cancel.cancelled:
+        return {'search_term': search_term, 'location': location, 'csv_path': None, 'cancelled': True, 'skipped': True}
+    combined_search_term = cell_query(search_term, location)
+    emit_progress(progress, "cell_started", search_term=search_term, location=location)
+    CELLS_ACTIVE.inc()
+    try:
+        manifest = business_search_complete.run_search(combined_search_term, iterations, parent_folder=parent_folder,
+                                                       location=location, progress=progress, cancel=cancel,
+                                                       **search_options)
+    finally:
+        CELLS_ACTIVE.dec()
+    return {
+        'search_term': search_term,
+        'location': location,
+        'csv_path': manifest['result_path'],
+        'run_id': manifest['run_id'],
+        'result_count': manifest['counts']['result_count'],
+        'reused': False,
+        'cancelled': manifest['status'] == 'cancelled'
+    }
+
+def run_search_matrix(search_term_list, location_list, iterations=10, parent_folder="business_searches",
+                      max_workers=DEFAULT_MAX_WORKERS, progress=None, reuse_max_age=0, cancel=None, **search_options):
+    """Run every term×location cell on a bounded worker pool and return the cell results in matrix order
+
+    Equivalent cells (same normalized query) are searched once. With
+    reuse_max_age > 0, cells whose query was searched within that many seconds
+    reuse the earlier run's results. Reused cells are marked 'reused'.
+    progress receives cell_started, iteration_done, stream_stopped and
+    cell_finished events from the worker threads as they happen. Once the
+    optional cancel token is cancelled, running cells stop with partial
+    results and queued cells are skipped (marked 'cancelled'). Other keyword
+    arguments (e.g. early_stop) are passed on to each cell's search.
+    """
+    if business_search_complete.async_tavily is None:
+        business_search_complete.init_tavily()
+    if business_search_complete.contact_index is None:
+        business_search_complete.init_contact_index()
+    if business_search_complete.run_registry is None:
+        business_search_complete.init_run_registry()
+    if business_search_complete.seen_filter is None and DEFAULT_GLOBAL_SUPPRESSION:
+        business_search_complete.init_seen_filter()
+
+    plans = plan_search_cells(search_term_list, location_list, iterations, reuse_max_age,
+                              business_search_complete.run_registry)
+    results = [None] * len(plans)
+    duplicates = {}
+    for index, plan in enumerate(plans):
+        if 'reuse' in plan:
+            results[index] = reused_cell(plan['search_term'], plan['location'], plan['reuse'])
+            print(f"♻️  Reusing run {plan['reuse']['run_id']} for: {plan['search_term']} in {plan['location']}")
+            emit_progress(progress, "cell_finished", **results[index])
+        elif 'same_as' in plan:
+            duplicates.setdefault(plan['same_as'], []).append(index)
+
+    CELLS_QUEUED.inc(sum(1 for plan in plans if 'reuse' not in plan and 'same_as' not in plan))
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="search-cell") as executor:
+        futures = {
+            executor.submit(run_search_cell, plan['search_term'], plan['location'], iterations, parent_folder, progress,
+                            cancel, **search_options): index
+            for index, plan in enumerate(plans) if 'reuse' not in plan and 'same_as' not in plan
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            search_term, location = plans[index]['search_term'], plans[index]['location']
+            try:
+                cell = future.result()
+            except Exception as e:
+                print(f"❌ Search failed for: {search_term} in {location}: {e}")
+                cell = {'search_term': search_term, 'location': location, 'csv_path': None, 'error': str(e)}
+            results[index] = cell
+            emit_progress(progress, "cell_finished", **cell)
+
+    # Cells equivalent to another cell of this matrix share its results
+    for index, duplicate_indexes in duplicates.items():
+        for duplicate_index in duplicate_indexes:
+            plan = plans[duplicate_index]
+            results[duplicate_index] = dict(results[index], search_term=plan['search_term'], location=plan['location'],
+                                            reused=results[index]['csv_path'] is not None)
+            emit_progress(progress, "cell_finished", **results[duplicate_index])
+
+    return results
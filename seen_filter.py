@@ -0,0 +1,261 @@
+import argparse
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+
+from public_suffix import registered_domain
+from settings import data_path
+
+# Where the global seen filter lives and how it is sized.
+# Capacity and error rate apply when the filter is created; it grows past capacity on its own
+DEFAULT_FILTER_PATH = os.getenv("SEEN_FILTER_PATH", data_path("seen_filter"))
+DEFAULT_CAPACITY = int(os.getenv("SEEN_FILTER_CAPACITY", "1000000"))
+DEFAULT_ERROR_RATE = float(os.getenv("SEEN_FILTER_ERROR_RATE", "0.001"))
+# Suppression changes what a run writes (only what no earlier run collected), so it is opt-in
+DEFAULT_GLOBAL_SUPPRESSION = os.getenv("SEARCH_GLOBAL_SUPPRESSION", "0") == "1"
+
+# Each new slice holds GROWTH times the previous one at TIGHTENING times its error rate,
+# so the error rates form a geometric series bounded by the filter's error rate
+GROWTH = 2
+TIGHTENING = 0.5
+
+MAGIC = b"SEENBLM1"
+FORMAT_VERSION = 1
+# magic, version, hashes, slices (kept up to date in slice 0), bits, capacity, count, error rate
+HEADER = struct.Struct("<8sHHIQQQd")
+HEADER_SIZE = 64
+SLICES_OFFSET = 12
+COUNT_OFFSET = 32
+
+def domain_key(url_or_host):
+    """Filter key of a site: its registered domain, so subdomains of a harvested site count as seen"""
+    return "d:" + registered_domain(url_or_host or "")
+
+def email_key(email):
+    return "e:" + (email or "").strip().lower()
+
+def slice_parameters(capacity, error_rate):
+    """Bits and hash functions of a Bloom filter holding capacity keys at error_rate"""
+    bits = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+    hashes = max(1, math.ceil(math.log2(1 / error_rate)))
+    return bits, hashes
+
+def key_hashes(key):
+    """Two independent 64-bit hashes of a key, combined into k bit positions by double hashing"""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+class BloomSlice:
+    """One fixed-size Bloom filter, memory-mapped from its file"""
+
+    def __init__(self, path, writable):
+        self.path = path
+        with open(path, mode="r+b" if writable else "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        magic, version, self.hashes, _, self.bits, self.capacity, _, self.error_rate = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a seen filter slice")
+
+    @classmethod
+    def create(cls, path, capacity, error_rate):
+        bits, hashes = slice_parameters(capacity, error_rate)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, mode="wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, hashes, 1, bits, capacity, 0, error_rate).ljust(HEADER_SIZE, b"\0"))
+            # Sparse: the bit array takes disk and memory only as bits get set
+            f.truncate(HEADER_SIZE + (bits + 7) // 8)
+        # Readers only ever see complete slices
+        os.replace(tmp_path, path)
+
+    @property
+    def count(self):
+        return struct.unpack_from("<Q", self._map, COUNT_OFFSET)[0]
+
+    def positions(self, hashes):
+        first, second = hashes
+        return [HEADER_SIZE * 8 + (first + i * second) % self.bits for i in range(self.hashes)]
+
+    def contains(self, hashes):
+        data = self._map
+        return all(data[position >> 3] & (1 << (position & 7)) for position in self.positions(hashes))
+
+    def add(self, hashes):
+        """Set a key's bits; returns True if any was unset (the key is new). Callers hold the write lock"""
+        data = self._map
+        added = False
+        for position in self.positions(hashes):
+            byte = data[position >> 3]
+            bit = 1 << (position & 7)
+            if not byte & bit:
+                data[position >> 3] = byte | bit
+                added = True
+        if added:
+            struct.pack_into("<Q", data, COUNT_OFFSET, self.count + 1)
+        return added
+
+    def close(self):
+        self._map.close()
+
+class SeenFilter:
+    """Persistent, memory-mapped scalable Bloom filter of every domain and email collected across runs
+
+    The filter is a folder of slice files mapped by every process that opens it,
+    so lookups share one page cache copy and memory stays fixed by the filter's
+    size, not by a Python set of millions of keys. Writers serialize through a
+    lock file; readers never lock, since bits only ever go from 0 to 1. When the
+    newest slice reaches its capacity, a larger slice with a lower error rate is
+    added and other processes map it on their next call. Lookups can return a
+    false positive (a never-seen key reported as seen) at up to error_rate,
+    never a false negative.
+    """
+
+    def __init__(self, path=DEFAULT_FILTER_PATH, capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE, writable=True):
+        if not 0 < error_rate < 1:
+            raise ValueError(f"Error rate must be between 0 and 1, got {error_rate}")
+        self.path = path
+        self.writable = writable
+        self._slices = []
+        self._lock = threading.Lock()
+        if writable:
+            os.makedirs(path, exist_ok=True)
+            with self._write_lock():
+                if not os.path.exists(self._slice_path(0)):
+                    BloomSlice.create(self._slice_path(0), capacity, error_rate * (1 - TIGHTENING))
+        self._refresh()
+
+    def _slice_path(self, index):
+        return os.path.join(self.path, f"slice_{index:03d}.bloom")
+
+    def _write_lock(self):
+        """Exclusive lock across processes; a fresh open per call so forked workers do not share it"""
+        return _FileLock(os.path.join(self.path, "lock"))
+
+    def _refresh(self):
+        """Map slices other processes added since the last call"""
+        with self._lock:
+            if not self._slices:
+                if not os.path.exists(self._slice_path(0)):
+                    return self._slices
+                self._slices.append(BloomSlice(self._slice_path(0), self.writable))
+            total = struct.unpack_from("<I", self._slices[0]._map, SLICES_OFFSET)[0]
+            while len(self._slices) < total:
+                self._slices.append(BloomSlice(self._slice_path(len(self._slices)), self.writable))
+            return list(self._slices)
+
+    def _grow(self, newest):
+        """Add a slice after the full newest one; callers hold the write lock"""
+        index = len(self._slices)
+        BloomSlice.create(self._slice_path(index), newest.capacity * GROWTH, newest.error_rate * TIGHTENING)
+        struct.pack_into("<I", self._slices[0]._map, SLICES_OFFSET, index + 1)
+        return self._refresh()[-1]
+
+    def __contains__(self, key):
+        hashes = key_hashes(key)
+        return any(bloom_slice.contains(hashes) for bloom_slice in self._refresh())
+
+    def add_many(self, keys):
+        """Add keys in one locked batch and return how many were new"""
+        if not self.writable:
+            raise PermissionError(f"Seen filter {self.path} was opened read-only")
+        added = 0
+        with self._write_lock():
+            slices = self._refresh()
+            newest = slices[-1]
+            for key in keys:
+                hashes = key_hashes(key)
+                if any(bloom_slice.contains(hashes) for bloom_slice in slices):
+                    continue
+                if newest.count >= newest.capacity:
+                    newest = self._grow(newest)
+                    slices = self._refresh()
+                if newest.add(hashes):
+                    added += 1
+        return added
+
+    def add(self, key):
+        return self.add_many([key]) == 1
+
+    def stats(self):
+        slices = self._refresh()
+        error_rate = 1 - math.prod(1 - bloom_slice.error_rate for bloom_slice in slices)
+        return {
+            "path": self.path,
+            "slices": len(slices),
+            "count": sum(bloom_slice.count for bloom_slice in slices),
+            "capacity": sum(bloom_slice.capacity for bloom_slice in slices),
+            "bytes": sum(HEADER_SIZE + (bloom_slice.bits + 7) // 8 for bloom_slice in slices),
+            "error_rate": error_rate,
+        }
+
+    def close(self):
+        with self._lock:
+            for bloom_slice in self._slices:
+                bloom_slice.close()
+            self._slices = []
+
+class _FileLock:
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, mode="a+b")
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or inspect the global seen filter of collected domains and emails')
+    parser.add_argument('--path', default=DEFAULT_FILTER_PATH, help=f'Filter folder (default: {DEFAULT_FILTER_PATH})')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help='Add the domains and emails of the contact index and/or result files')
+    build_parser.add_argument('--index', help='Contact index database to load')
+    build_parser.add_argument('--tree', help='Folder to scan recursively for result files')
+    build_parser.add_argument('--capacity', type=int, default=DEFAULT_CAPACITY, help='Keys the first slice holds (new filters only)')
+    build_parser.add_argument('--error-rate', type=float, default=DEFAULT_ERROR_RATE, help='False positive rate (new filters only)')
+    subparsers.add_parser('stats', help='Print filter size, fill and error rate')
+    check_parser = subparsers.add_parser('check', help='Tell whether domains or emails were seen')
+    check_parser.add_argument('values', nargs='+')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        # Imported here: the filter itself has no dependency on the rest of the pipeline
+        from contact_index import ContactIndex
+        from output_sink import is_sink_file, iter_sink_rows
+
+        seen_filter = SeenFilter(args.path, args.capacity, args.error_rate)
+        added = 0
+        if args.index:
+            index = ContactIndex(args.index)
+            added += seen_filter.add_many(domain_key(row["domain"]) for row in index.iter_domains())
+            added += seen_filter.add_many(email_key(contact["email"]) for contact in index.iter_contacts())
+        if args.tree:
+            for folder, _, file_names in os.walk(args.tree):
+                for file_name in file_names:
+                    if not is_sink_file(file_name):
+                        continue
+                    keys = []
+                    for row in iter_sink_rows(os.path.join(folder, file_name)):
+                        keys.append(domain_key(row.get("URL")))
+                        if "@" in (row.get("Email") or ""):
+                            keys.append(email_key(row["Email"]))
+                    added += seen_filter.add_many(keys)
+        print(f"✅ Added {added} new keys to {args.path}")
+        print(seen_filter.stats())
+    elif args.command == 'stats':
+        print(SeenFilter(args.path, writable=False).stats())
+    else:
+        seen_filter = SeenFilter(args.path, writable=False)
+        for value in args.values:
+            key = email_key(value) if "@" in value else domain_key(value)
+            print(f"{value}\t{'seen' if key in seen_filter else 'new'}")
+
+if __name__ == "__main__":
+    main()
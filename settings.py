@@ -0,0 +1,10 @@
+import os
+
+# Folder the shared databases, filters and caches live in unless their own path is set. It is
+# anchored to the application folder, not the working directory, so the CLI and every web
+# worker open the same files wherever they are started from
+DATA_DIR = os.getenv("SEARCH_DATA_DIR", os.path.dirname(os.path.abspath(__file__)))
+
+def data_path(name):
+    """Default location of a shared data file or folder"""
+    return os.path.join(DATA_DIR, name)
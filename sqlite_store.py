@@ -0,0 +1,24 @@
+import sqlite3
+import threading
+
+class SQLiteStore:
+    """Base of the SQLite (WAL mode) stores shared by threads and worker processes
+
+    sqlite3 connections must not cross threads, so each thread opens its own
+    on first use. WAL lets readers run while one process writes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
@@ -0,0 +1,89 @@
+import asyncio
+import csv
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import business_search_complete
+from cancellation import CancellationToken, SearchCancelled, run_cancellable
+from content_archive import iter_archive
+from search_engine import run_search_cell
+
+class CancellingSearchClient:
+    """Answers with a new site per call; once `calls` searches were answered it cancels the token and hangs"""
+
+    def __init__(self, token, calls):
+        self.token = token
+        self.calls = calls
+        self.searches = 0
+        self.hung_request_cancelled = False
+
+    async def search(self, query, max_results=20, include_raw_content=True, exclude_domains=None):
+        self.searches += 1
+        if self.searches > self.calls:
+            self.token.cancel()
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                self.hung_request_cancelled = True
+                raise
+        number = self.searches
+        return {"results": [{"url": f"https://site{number}.org/contact", "raw_content": f"Mail info@site{number}.org"}]}
+
+def test_token_polls_its_check_at_most_once_per_interval():
+    checks = []
+    token = CancellationToken(check=lambda: checks.append(1) or len(checks) >= 2, poll_interval=60)
+    assert not token.cancelled
+    assert not token.cancelled
+    assert len(checks) == 1
+    token.cancel()
+    assert token.cancelled
+    with pytest.raises(SearchCancelled):
+        token.raise_if_cancelled()
+
+def test_run_cancellable_aborts_the_awaited_work_and_lets_it_unwind():
+    unwound = []
+
+    async def work():
+        try:
+            await asyncio.sleep(30)
+        finally:
+            unwound.append(True)
+
+    async def scenario():
+        token = CancellationToken(poll_interval=0.01)
+        assert await run_cancellable(asyncio.sleep(0, result="done"), token) == "done"
+        asyncio.get_running_loop().call_later(0.05, token.cancel)
+        await run_cancellable(work(), token)
+
+    with pytest.raises(SearchCancelled):
+        asyncio.run(asyncio.wait_for(scenario(), 5))
+    assert unwound == [True]
+
+def test_cancelled_search_keeps_the_rows_and_archive_written_so_far(tmp_path, monkeypatch):
+    monkeypatch.setattr(business_search_complete, "seen_filter", None)
+    monkeypatch.setattr(business_search_complete, "contact_index", None)
+    token = CancellationToken(poll_interval=0.01)
+    client = CancellingSearchClient(token, calls=2)
+    archive_folder = str(tmp_path / "archive")
+    stats = asyncio.run(business_search_complete.async_search_businesses(
+        "clinics", str(tmp_path), iterations=5, streams=1, client=client, archive_folder=archive_folder, cancel=token))
+
+    assert stats["cancelled"]
+    assert client.hung_request_cancelled
+    with open(tmp_path / "clinics.csv", newline="", encoding="utf-8") as f:
+        assert [row["Email"] for row in csv.DictReader(f)] == ["info@site1.org", "info@site2.org"]
+    # The archive was closed, so its records read back
+    assert [record["url"] for record in iter_archive(archive_folder)] == [
+        "https://site1.org/contact", "https://site2.org/contact"]
+
+def test_cells_of_a_cancelled_job_are_skipped_before_they_start(tmp_path):
+    token = CancellationToken()
+    token.cancel()
+    cell = run_search_cell("clinics", "Boston", parent_folder=str(tmp_path), cancel=token)
+    assert cell["cancelled"] and cell["skipped"]
+    assert cell["csv_path"] is None
+    assert os.listdir(tmp_path) == []
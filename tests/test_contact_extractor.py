@@ -0,0 +1,49 @@
+import os
+import random
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.bench_extraction import ADVERSARIAL_CORPUS
+from contact_extractor import CHUNK_SIZE, extract_contacts
+
+TIME_BUDGET = 0.2
+# Time a scan may take past its budget: one chunk of the slowest corpus entry, with room for a loaded machine
+OVERRUN_SLACK = 0.15
+
+def test_extracts_every_email_and_phone_once():
+    text = ("Mail Info@Clinic.org or info@clinic.org, call +1 (212) 555-0123 or 1.800.555.1234; "
+            "logo@2x.png, ISBN 978-0-306-40615-7, order 20240115093000")
+    result = extract_contacts(text)
+    assert result["emails"] == ["Info@Clinic.org"]
+    assert result["phones"] == ["+1 (212) 555-0123", "1.800.555.1234"]
+    assert not result["timed_out"]
+
+def test_contact_across_a_chunk_boundary_is_found_once():
+    email = "office@example.org"
+    text = "x " * ((CHUNK_SIZE - len(email) // 2) // 2) + email + " y" * 100
+    assert extract_contacts(text)["emails"] == [email]
+
+@pytest.mark.parametrize("name", sorted(ADVERSARIAL_CORPUS))
+def test_adversarial_pages_stay_within_the_budget(name):
+    text = ADVERSARIAL_CORPUS[name](1000000)
+    started = time.monotonic()
+    result = extract_contacts(text, time_budget=TIME_BUDGET)
+    elapsed = time.monotonic() - started
+    assert elapsed < TIME_BUDGET + OVERRUN_SLACK
+    # A page that ran over its budget is reported as cut short
+    assert result["timed_out"] or elapsed <= TIME_BUDGET
+
+def test_fuzzed_pages_stay_within_the_budget():
+    rng = random.Random(5)
+    alphabet = "a1.@-+() \n"
+    for _ in range(20):
+        text = "".join(rng.choice(alphabet) for _ in range(50000)) * 4
+        started = time.monotonic()
+        result = extract_contacts(text, time_budget=TIME_BUDGET)
+        elapsed = time.monotonic() - started
+        assert elapsed < TIME_BUDGET + OVERRUN_SLACK
+        assert result["timed_out"] or elapsed <= TIME_BUDGET
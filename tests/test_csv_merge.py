@@ -0,0 +1,42 @@
+import csv
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from csv_merge import BYTES_PER_KEY, stream_merge
+
+FIELDNAMES = ["URL", "Email", "Phone"]
+
+def merged_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+def input_rows(contacts, copies):
+    """Each contact repeated copies times, every copy from a different URL, in interleaved order"""
+    for copy in range(copies):
+        for contact in range(contacts):
+            yield {"URL": f"https://site{contact}.org/page{copy}", "Email": f"Info{contact}@site{contact}.org",
+                   "Phone": str(copy)}
+
+def test_keeps_the_first_row_of_each_key_in_memory(tmp_path):
+    output = str(tmp_path / "merged.csv")
+    rows = [{"URL": "a", "Email": "x@a.org"}, {"URL": "b", "Email": "X@A.org"}, {"URL": "c", "Email": ""}]
+    stats = stream_merge(iter(rows), output, FIELDNAMES, key=lambda row: row["Email"].lower() or None)
+    assert [row["URL"] for row in merged_rows(output)] == ["a"]
+    assert (stats["rows_read"], stats["rows_written"], stats["duplicates"], stats["spilled"]) == (3, 1, 1, False)
+
+def test_spilled_merge_keeps_the_first_row_of_each_key(tmp_path):
+    output = str(tmp_path / "merged.csv")
+    # Room for 10 keys, so the merge spills while the first copies are still arriving
+    stats = stream_merge(input_rows(50, 3), output, FIELDNAMES, key=lambda row: row["Email"].lower(),
+                         memory_budget=10 * BYTES_PER_KEY)
+    assert stats["spilled"]
+    assert (stats["rows_read"], stats["rows_written"], stats["duplicates"]) == (150, 50, 100)
+    rows = merged_rows(output)
+    assert sorted(row["Email"] for row in rows) == sorted(f"Info{contact}@site{contact}.org" for contact in range(50))
+    # First row wins: every contact keeps its first copy, on either side of the spill
+    assert {row["Phone"] for row in rows} == {"0"}
+    assert all(row["URL"].endswith("/page0") for row in rows)
+    # Spill files are removed
+    assert os.listdir(tmp_path) == ["merged.csv"]
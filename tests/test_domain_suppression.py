@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from domain_suppression import DomainSuppressor
+from seen_filter import SeenFilter, domain_key
+
+def results(*urls):
+    return [{"url": url} for url in urls]
+
+def test_exclude_list_is_capped_to_the_most_recent_domains():
+    suppressor = DomainSuppressor(budget=2)
+    suppressor.seed(["old.org"])
+    assert suppressor.exclude_list() == ["old.org"]
+    suppressor.observe(["a.org", "b.org", "c.org"])
+    assert suppressor.exclude_list() == ["b.org", "c.org"]
+    # Returned again, a domain moves back to the front
+    suppressor.observe(["a.org"])
+    assert suppressor.exclude_list() == ["a.org", "c.org"]
+    assert suppressor.stats()["avg_excluded_sent"] == pytest.approx(5 / 3)
+
+def test_frequent_policy_ranks_by_count_and_fills_with_seeded_domains():
+    suppressor = DomainSuppressor(budget=3, policy="frequent")
+    suppressor.seed(["seed1.org", "seed2.org"])
+    suppressor.observe(["a.org", "b.org", "a.org"])
+    assert suppressor.exclude_list() == ["a.org", "b.org", "seed2.org"]
+    with pytest.raises(ValueError):
+        DomainSuppressor(policy="random")
+
+def test_every_known_domain_is_filtered_locally_beyond_the_budget():
+    suppressor = DomainSuppressor(budget=1)
+    fresh = suppressor.filter_results(results("https://a.org/", "https://www.b.org/", "https://shop.b.org/"))
+    # Subdomains of one site count once
+    assert [result["url"] for result in fresh] == ["https://a.org/", "https://www.b.org/"]
+    suppressor.observe(["a.org", "b.org"])
+    assert suppressor.exclude_list() == ["b.org"]
+    assert suppressor.filter_results(results("https://a.org/contact", "https://c.org/")) == results("https://c.org/")
+    stats = suppressor.stats()
+    assert (stats["known_domains"], stats["results_total"], stats["results_wasted"]) == (3, 5, 2)
+
+def test_domains_harvested_by_other_runs_are_filtered_and_ranked(tmp_path):
+    seen_filter = SeenFilter(str(tmp_path / "seen"))
+    seen_filter.add(domain_key("other-run.org"))
+    suppressor = DomainSuppressor(seen_filter=seen_filter)
+    assert suppressor.filter_results(results("https://www.other-run.org/", "https://new.org/")) == results("https://new.org/")
+    assert suppressor.stats()["results_seen_by_other_runs"] == 1
+    assert "other-run.org" in suppressor.known
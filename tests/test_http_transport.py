@@ -0,0 +1,99 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_transport import HEDGE_MIN_SAMPLES, HttpTransport, use_shared_transport
+
+class SearchHandler(BaseHTTPRequestHandler):
+    """Keep-alive endpoint recording each request; the first request is delayed by the server's slow_first seconds"""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.server.lock:
+            self.server.requests.append((self.path, self.headers.get("Authorization"), body))
+            number = len(self.server.requests)
+        if number == 1:
+            time.sleep(self.server.slow_first)
+        payload = str(number).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SearchHandler)
+    server.daemon_threads = True
+    server.requests = []
+    server.lock = threading.Lock()
+    server.slow_first = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def url(server, path="/search"):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+class FakeTavilyClient:
+    """Opens a new httpx client per call through _client_creator, like AsyncTavilyClient"""
+
+    def __init__(self, base_url):
+        self._client_creator = lambda: httpx.AsyncClient(base_url=base_url, headers={"Authorization": "Bearer key"})
+
+    async def search(self):
+        async with self._client_creator() as client:
+            return await client.post("/search", content=b"{}")
+
+def test_calls_from_separate_event_loops_share_one_connection(server):
+    transport = HttpTransport()
+    for _ in range(3):
+        # Each search cell runs its own asyncio.run
+        response = asyncio.run(transport.post(url(server), content=b"{}"))
+        assert response.status_code == 200
+    stats = transport.stats()
+    assert (stats["requests"], stats["new_connections"], stats["reused_connections"]) == (3, 1, 2)
+
+def test_tavily_client_sends_through_the_shared_transport(server):
+    transport = HttpTransport()
+    client = use_shared_transport(FakeTavilyClient(url(server, "")), transport)
+    for _ in range(2):
+        assert asyncio.run(client.search()).status_code == 200
+    assert server.requests == [("/search", "Bearer key", b"{}")] * 2
+    assert transport.stats()["reused_connections"] == 1
+
+def test_clients_without_a_client_factory_are_left_alone():
+    client = object()
+    assert use_shared_transport(client, HttpTransport()) is client
+
+def test_slow_requests_are_hedged_and_the_first_response_wins(server):
+    server.slow_first = 1
+    transport = HttpTransport(hedge=True, hedge_quantile=0.5)
+    assert transport.hedge_delay("/search") is None
+    transport._latencies["/search"] = [0.05] * HEDGE_MIN_SAMPLES
+    assert transport.hedge_delay("/search") == 0.05
+
+    started = time.perf_counter()
+    response = asyncio.run(transport.post(url(server), content=b"{}"))
+    assert time.perf_counter() - started < 0.9
+    # The duplicate (second request on the server) answered first
+    assert response.text == "2"
+    assert (transport.stats()["hedges"], transport.stats()["hedge_wins"]) == (1, 1)
+
+def test_hedging_is_off_by_default(server):
+    transport = HttpTransport()
+    transport._latencies["/search"] = [0.05] * HEDGE_MIN_SAMPLES
+    assert transport.hedge_delay("/search") is None
@@ -0,0 +1,80 @@
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_store import JobStore
+
+def test_increment_and_append_from_many_threads_lose_nothing(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    store.create("job", completed_searches=0, run_ids=[])
+
+    def finish_cell(number):
+        store.increment("job", "completed_searches")
+        store.append("job", "run_ids", f"run_{number}")
+
+    threads = [threading.Thread(target=finish_cell, args=(number,)) for number in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    job = store.get("job")
+    assert job["completed_searches"] == 16
+    assert sorted(job["run_ids"]) == sorted(f"run_{number}" for number in range(16))
+    # Fields never set start from zero and an empty list
+    store.increment("job", "cancelled_searches", 2)
+    store.append("job", "reused_cells", "clinics in Boston")
+    assert store.get("job")["cancelled_searches"] == 2
+    assert store.get("job")["reused_cells"] == ["clinics in Boston"]
+
+def test_events_are_capped_in_the_store_and_complete_in_the_log(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"), event_buffer=5)
+    store.create("job")
+    log_file = str(tmp_path / "job" / "job_log.jsonl")
+    for number in range(12):
+        assert store.add_event("job", {"type": "log", "message": str(number)}, log_file=log_file)["id"] == number
+    assert [event["id"] for event in store.events("job")] == [7, 8, 9, 10, 11]
+    assert [event["id"] for event in store.events("job", after=9)] == [10, 11]
+    assert store.last_event_id("job") == 11
+    with open(log_file, encoding="utf-8") as f:
+        assert [json.loads(line)["id"] for line in f] == list(range(12))
+
+def test_finish_only_moves_running_jobs(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    store.create("job")
+    assert store.request_cancel("job")
+    assert store.cancel_requested("job")
+    assert store.finish("job", "cancelled", partial=True)
+    assert not store.finish("job", "completed")
+    assert store.get("job")["status"] == "cancelled"
+    assert not store.request_cancel("job")
+
+def test_expired_jobs_are_evicted_with_their_folders(tmp_path):
+    files_dir = tmp_path / "searches"
+    store = JobStore(str(tmp_path / "jobs.db"), ttl=60, files_dir=str(files_dir))
+    for job_id in ("old", "recent", "running"):
+        store.create(job_id)
+        store.add_event(job_id, {"type": "log"}, log_file=str(files_dir / job_id / "job_log.jsonl"))
+    store.finish("old", "completed")
+    store.finish("recent", "completed")
+    with store._connection() as conn:
+        conn.execute("UPDATE jobs SET finished_at = ? WHERE id = 'old'", (time.time() - 120,))
+
+    assert store.evict_expired() == ["old"]
+    assert store.get("old") is None
+    assert store.events("old") == []
+    assert sorted(os.listdir(files_dir)) == ["recent", "running"]
+    assert store.count() == 2
+
+def test_jobs_of_dead_workers_fail_and_can_expire(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"), stale_after=60)
+    store.create("orphan")
+    store.create("alive")
+    with store._connection() as conn:
+        conn.execute("UPDATE jobs SET updated_at = ? WHERE id = 'orphan'", (time.time() - 120,))
+    assert store.fail_stale() == ["orphan"]
+    assert store.get("orphan")["status"] == "error"
+    assert store.count("running") == 1
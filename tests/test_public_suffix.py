@@ -0,0 +1,86 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import public_suffix
+from public_suffix import compile_rules, load_trie, normalize_host, parse_rules, public_suffix as suffix_of, registered_domain
+
+LIST_TEXT = """// ===BEGIN ICANN DOMAINS===
+com
+uk
+co.uk
+// Wildcard with an exception, as the real list has for .ck
+*.ck
+!www.ck
+jp
+*.kobe.jp
+!city.kobe.jp
+// ===END ICANN DOMAINS===
+// ===BEGIN PRIVATE DOMAINS===
+github.io
+"""
+
+@pytest.fixture
+def rules(monkeypatch):
+    """Use the rules of LIST_TEXT for registered_domain and public_suffix"""
+    monkeypatch.setattr(public_suffix, "_suffix_trie", compile_rules(parse_rules(LIST_TEXT.splitlines())))
+    registered_domain.cache_clear()
+    yield
+    registered_domain.cache_clear()
+
+@pytest.mark.parametrize("host, expected", [
+    ("www.example.com", "example.com"),
+    ("shop.example.co.uk", "example.co.uk"),
+    ("example.co.uk", "example.co.uk"),
+    ("co.uk", "co.uk"),
+    # *.ck makes every second-level label a suffix, except www.ck
+    ("shop.example.ck", "shop.example.ck"),
+    ("example.ck", "example.ck"),
+    ("www.ck", "www.ck"),
+    ("shop.www.ck", "www.ck"),
+    ("a.b.kobe.jp", "a.b.kobe.jp"),
+    ("x.city.kobe.jp", "city.kobe.jp"),
+    ("user.github.io", "user.github.io"),
+    # Unlisted TLDs fall back to the implicit "*" rule
+    ("www.example.zz", "example.zz"),
+])
+def test_registered_domain_follows_rules_wildcards_and_exceptions(rules, host, expected):
+    assert registered_domain(host) == expected
+
+def test_hosts_are_normalized_before_lookup(rules):
+    assert registered_domain("https://User@WWW.Example.co.uk:8443/contact?x=1") == "example.co.uk"
+    assert registered_domain("www.example.co.uk.") == "example.co.uk"
+    assert normalize_host("http://[2001:db8::1]:8080/") == "[2001:db8::1]"
+
+def test_ip_addresses_are_returned_unchanged(rules):
+    assert registered_domain("http://192.168.1.20:8080/") == "192.168.1.20"
+    assert registered_domain("[2001:db8::1]") == "[2001:db8::1]"
+    assert registered_domain("") == ""
+
+def test_public_suffix_of_a_host(rules):
+    assert suffix_of("www.example.co.uk") == "co.uk"
+    assert suffix_of("shop.example.ck") == "example.ck"
+    assert suffix_of("www.ck") == "ck"
+
+def test_private_section_can_be_left_out():
+    assert "github.io" in parse_rules(LIST_TEXT.splitlines())
+    assert "github.io" not in parse_rules(LIST_TEXT.splitlines(), private=False)
+
+def test_compiled_trie_is_reused_until_the_list_changes(tmp_path):
+    source = tmp_path / "list.dat"
+    compiled = str(tmp_path / "list.trie")
+    source.write_text(LIST_TEXT, encoding="utf-8")
+    trie = load_trie(str(source), compiled)
+    assert os.path.exists(compiled)
+    assert load_trie(str(source), compiled) == trie
+
+    source.write_text(LIST_TEXT + "example.com\n", encoding="utf-8")
+    os.utime(source, ns=(1, 1))
+    assert "example" in load_trie(str(source), compiled)["com"]
+
+def test_missing_list_falls_back_to_built_in_rules(tmp_path):
+    trie = load_trie(str(tmp_path / "missing.dat"), str(tmp_path / "missing.trie"))
+    assert "co" in trie["uk"] and "co" in trie["il"]
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limiter import AdaptiveRateLimiter, FileTokenBucket, TokenBucket
+
+def test_bucket_spends_its_burst_then_spaces_tokens_by_rate():
+    bucket = TokenBucket(rate=10, burst=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    waits = [bucket.reserve() for _ in range(3)]
+    assert waits == pytest.approx([0.1, 0.2, 0.3], abs=0.01)
+    # Draining after a throttle error takes away the saved-up burst
+    full = TokenBucket(rate=10, burst=3)
+    full.drain()
+    assert full.reserve() == pytest.approx(0.1, abs=0.01)
+
+def test_file_bucket_is_shared_by_every_instance_on_the_path(tmp_path):
+    path = str(tmp_path / "bucket")
+    first = FileTokenBucket(path, rate=10, burst=2)
+    second = FileTokenBucket(path, rate=10, burst=2)
+    assert first.reserve() == 0.0
+    assert second.reserve() == 0.0
+    assert first.reserve() == pytest.approx(0.1, abs=0.01)
+
+def test_concurrency_limit_grows_additively_and_halves_on_throttling():
+    limiter = AdaptiveRateLimiter(rate=1000, burst=4, max_concurrency=6, min_concurrency=1, state_file=None)
+    assert limiter.stats()["concurrency_limit"] == 4
+    limiter.acquire()
+    limiter.release()
+    assert limiter.limit == pytest.approx(4.25)
+    for _ in range(100):
+        limiter.acquire()
+        limiter.release()
+    assert limiter.limit == 6
+    for expected in (3, 1.5, 1, 1):
+        limiter.acquire()
+        limiter.release(throttled=True)
+        assert limiter.limit == expected
+    stats = limiter.stats()
+    assert (stats["successes"], stats["throttled"], stats["in_flight"]) == (101, 4, 0)
+
+def test_queued_callers_are_woken_by_a_release_from_another_thread():
+    limiter = AdaptiveRateLimiter(rate=1000, burst=1, max_concurrency=1, state_file=None)
+    limiter.acquire()
+    entered = threading.Event()
+    waiter = threading.Thread(target=lambda: (limiter.acquire(), entered.set()))
+    waiter.start()
+    time.sleep(0.05)
+    assert limiter.stats()["waiting"] == 1 and not entered.is_set()
+    threading.Timer(0.05, limiter.release).start()
+    assert entered.wait(1)
+    waiter.join()
+    assert limiter.stats()["in_flight"] == 1
+
+def test_async_waiters_get_slots_in_order_and_cancelled_waiters_free_theirs():
+    limiter = AdaptiveRateLimiter(rate=1000, burst=1, max_concurrency=1, state_file=None)
+
+    async def scenario():
+        await limiter.acquire_async()
+        order = []
+
+        async def call(name):
+            await limiter.acquire_async()
+            order.append(name)
+            limiter.abandon()
+
+        first = asyncio.ensure_future(call("first"))
+        cancelled = asyncio.ensure_future(call("cancelled"))
+        second = asyncio.ensure_future(call("second"))
+        await asyncio.sleep(0.01)
+        assert limiter.stats()["waiting"] == 3
+        cancelled.cancel()
+        await asyncio.sleep(0.01)
+        assert limiter.stats()["waiting"] == 2
+        # Released from another thread, as a cell on another worker's event loop would
+        await asyncio.to_thread(limiter.release)
+        await asyncio.wait_for(asyncio.gather(first, second), 1)
+        return order
+
+    assert asyncio.run(scenario()) == ["first", "second"]
+    assert limiter.stats()["in_flight"] == 0
+    assert limiter.stats()["waiting"] == 0
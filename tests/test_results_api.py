@@ -0,0 +1,53 @@
+import gzip
+import os
+import sys
+from datetime import datetime
+
+import pytz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import business_search_complete
+import web_app
+from contact_index import ContactIndex
+from job_store import JobStore
+from search_engine import cell_query
+
+def test_running_job_returns_indexed_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(web_app, "job_store", JobStore(str(tmp_path / "jobs.db")))
+    index = ContactIndex(str(tmp_path / "contacts.db"))
+    monkeypatch.setattr(business_search_complete, "contact_index", index)
+    web_app.job_store.create("job", search_terms=["clinics", "dentists"], locations=["Boston"], iterations=1,
+                             started_at=datetime.now(pytz.timezone("Asia/Jerusalem")).isoformat(), csv_path=None)
+
+    # Cells index their contacts under the combined cell query, as run_search_cell does
+    for number in range(3):
+        index.add_page(f"https://www.clinic{number}.org/contact", [f"info@clinic{number}.org"], [],
+                       cell_query("clinics", "Boston"), "Boston", "run")
+    index.add_page("https://www.dentist.org/", ["office@dentist.org"], [], cell_query("dentists", "Boston"), "Boston", "run")
+
+    client = web_app.app.test_client()
+    data = client.get("/results/job").get_json()
+    assert data["source"] == "index"
+    assert len(data["rows"]) == 4
+
+    data = client.get("/results/job?term=clinics&columns=Email,SearchTerm").get_json()
+    assert data["columns"] == ["Email", "SearchTerm"]
+    assert sorted(row["Email"] for row in data["rows"]) == [f"info@clinic{number}.org" for number in range(3)]
+    assert {row["SearchTerm"] for row in data["rows"]} == {"clinics"}
+
+def test_download_is_gzipped_only_when_the_client_accepts_gzip(tmp_path, monkeypatch):
+    monkeypatch.setattr(web_app, "job_store", JobStore(str(tmp_path / "jobs.db")))
+    csv_path = tmp_path / "merged_all_searches.csv"
+    csv_path.write_text("URL,Email\nhttps://clinic.org,info@clinic.org\n", encoding="utf-8")
+    web_app.job_store.create("job", search_terms=["clinics"], locations=["Boston"], csv_path=str(csv_path))
+    web_app.job_store.finish("job", "completed")
+
+    client = web_app.app.test_client()
+    response = client.get("/download/job", headers={"Accept-Encoding": "gzip, deflate"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.data).decode("utf-8").splitlines()[1] == "https://clinic.org,info@clinic.org"
+    for refused in ("gzip;q=0", "identity", ""):
+        response = client.get("/download/job", headers={"Accept-Encoding": refused})
+        assert "Content-Encoding" not in response.headers
+        assert response.data.decode("utf-8").splitlines()[1] == "https://clinic.org,info@clinic.org"
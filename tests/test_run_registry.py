@@ -0,0 +1,63 @@
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_registry import RunRegistry, normalize_query
+from search_engine import plan_search_cells
+
+def record_run(registry, tmp_path, run_id, query, age=0, iterations=10, **extra):
+    """Record a completed run with a merged CSV that finished age seconds ago"""
+    run_folder = tmp_path / run_id
+    run_folder.mkdir()
+    result_path = run_folder / "merged_cleaned_results.csv"
+    result_path.write_text("URL,Email\n", encoding="utf-8")
+    manifest = {"run_id": run_id, "query": query, "run_folder": str(run_folder), "result_path": str(result_path),
+                "status": "completed", "iterations": iterations, "finished_at": time.time() - age,
+                "counts": {"result_count": 0}, **extra}
+    registry.record(manifest)
+    return manifest
+
+def test_queries_match_regardless_of_case_punctuation_and_word_order():
+    assert normalize_query("Boston, Dental Clinics") == normalize_query("dental clinics boston")
+    # Words are never stemmed, so unrelated queries keep separate keys
+    assert normalize_query("Boston news") != normalize_query("Boston new")
+    assert normalize_query("glass repair") != normalize_query("glas repair")
+
+def test_reuse_takes_the_newest_equivalent_run_within_the_age_cutoff(tmp_path):
+    registry = RunRegistry(str(tmp_path / "runs.db"))
+    record_run(registry, tmp_path, "stale", "Boston clinics", age=7200)
+    record_run(registry, tmp_path, "fresh", "boston CLINICS", age=600)
+    plans = plan_search_cells(["clinics"], ["Boston"], max_age=3600, registry=registry)
+    assert plans[0]["reuse"]["run_id"] == "fresh"
+    # Only runs newer than the cutoff count
+    assert "reuse" not in plan_search_cells(["clinics"], ["Boston"], max_age=300, registry=registry)[0]
+    # Reuse is off unless a max age is given
+    assert "reuse" not in plan_search_cells(["clinics"], ["Boston"], registry=registry)[0]
+
+def test_runs_that_cannot_stand_in_for_a_search_are_not_reused(tmp_path):
+    registry = RunRegistry(str(tmp_path / "runs.db"))
+    record_run(registry, tmp_path, "shallow", "Boston clinics", iterations=2)
+    record_run(registry, tmp_path, "suppressed", "Boston dentists", global_suppression=True)
+    os.remove(record_run(registry, tmp_path, "deleted", "Boston pharmacies")["result_path"])
+    plans = plan_search_cells(["clinics", "dentists", "pharmacies"], ["Boston"], iterations=5, max_age=3600,
+                              registry=registry)
+    assert [plan.get("reuse") for plan in plans] == [None, None, None]
+
+def test_equivalent_cells_in_one_matrix_are_searched_once(tmp_path):
+    plans = plan_search_cells(["Dental clinics", "clinics dental"], ["Boston"], max_age=0)
+    assert "same_as" not in plans[0]
+    assert plans[1]["same_as"] == 0
+
+def test_registries_keyed_by_stemmed_queries_are_rekeyed(tmp_path):
+    path = str(tmp_path / "runs.db")
+    registry = RunRegistry(path)
+    record_run(registry, tmp_path, "news", "Boston news")
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE runs SET query_key = 'boston new'")
+        conn.execute("PRAGMA user_version = 0")
+    registry = RunRegistry(path)
+    assert registry.find_reusable("Boston new", 3600) is None
+    assert registry.find_reusable("Boston news", 3600)["run_id"] == "news"
@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_cache import SearchCache, cache_key
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def response(number, size=0):
+    return {"results": [{"url": f"https://site{number}.org", "raw_content": os.urandom(size).hex()}]}
+
+def put_from_other_process(cache_dir, key, size):
+    """Write one entry through a separate process sharing the cache folder"""
+    code = ("import os, sys; from search_cache import SearchCache; "
+            f"SearchCache({cache_dir!r}).put({key!r}, {{'results': [{{'raw_content': os.urandom({size}).hex()}}]}})")
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+
+def test_key_ignores_exclude_domain_order_and_case():
+    assert cache_key("clinics", exclude_domains=["B.org", "a.org"]) == cache_key("clinics", exclude_domains=["a.org", "b.org"])
+    assert cache_key("clinics", max_results=20) != cache_key("clinics", max_results=10)
+
+def test_hits_and_misses(tmp_path):
+    cache = SearchCache(str(tmp_path))
+    assert cache.get("a") is None
+    cache.put("a", response(1))
+    assert cache.get("a") == response(1)
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    # A new instance serves what is on disk
+    assert SearchCache(str(tmp_path)).get("a") == response(1)
+
+def test_expired_entries_are_misses_and_removed(tmp_path):
+    SearchCache(str(tmp_path)).put("a", response(1))
+    time.sleep(0.01)
+    cache = SearchCache(str(tmp_path), ttl_seconds=0)
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+    assert os.listdir(tmp_path) == []
+
+def test_least_recently_used_entries_are_evicted_over_budget(tmp_path):
+    cache = SearchCache(str(tmp_path), max_bytes=3000)
+    cache.put("a", response(1, 1000))
+    cache.put("b", response(2, 1000))
+    assert cache.stats()["entries"] == 2
+    cache.get("a")
+    cache.put("c", response(3, 1000))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["bytes"] <= 3000
+    assert cache.stats()["bytes"] == sum(os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path))
+
+def test_entries_written_by_other_processes_are_served_and_budgeted(tmp_path):
+    # Room for three of the four entries (each compresses to a little over 1000 bytes)
+    cache = SearchCache(str(tmp_path), max_bytes=4000)
+    cache.put("mine", response(1, 1000))
+    put_from_other_process(str(tmp_path), "theirs", 1000)
+    assert cache.get("theirs") is not None
+
+    put_from_other_process(str(tmp_path), "unseen", 1000)
+    cache.put("newest", response(2, 1000))
+    # The put counted the other process's files, so the folder stays within the budget
+    on_disk = sum(os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path))
+    assert on_disk <= 4000
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == on_disk
+    assert cache.get("newest") is not None
@@ -0,0 +1,84 @@
+import asyncio
+import csv
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import business_search_complete
+from run_registry import RunRegistry
+from seen_filter import SeenFilter, domain_key, email_key
+
+class FakeSearchClient:
+    """Answers every search with the same pages"""
+
+    def __init__(self, pages):
+        self.pages = pages
+
+    async def search(self, query, max_results=20, include_raw_content=True, exclude_domains=None):
+        return {"results": [dict(page) for page in self.pages]}
+
+def search_rows(tmp_path, name, pages, seen_filter, monkeypatch):
+    monkeypatch.setattr(business_search_complete, "seen_filter", seen_filter)
+    monkeypatch.setattr(business_search_complete, "contact_index", None)
+    folder = tmp_path / name
+    folder.mkdir()
+    asyncio.run(business_search_complete.async_search_businesses("clinics", str(folder), iterations=1, streams=1,
+                                                                 client=FakeSearchClient(pages)))
+    with open(folder / "clinics.csv", newline="", encoding="utf-8") as f:
+        return [(row["URL"], row["Email"], row["Phone"]) for row in csv.DictReader(f)]
+
+def test_filter_persists_and_is_shared_across_instances(tmp_path):
+    path = str(tmp_path / "seen")
+    writer = SeenFilter(path, capacity=100)
+    reader = SeenFilter(path, writable=False)
+    assert writer.add_many([domain_key("https://www.example.co.uk/a"), email_key("Info@Example.org")]) == 2
+    # Subdomains of a site share its key, and emails are case-insensitive
+    assert domain_key("shop.example.co.uk") in reader
+    assert email_key("info@example.org") in reader
+    writer.close()
+
+    reopened = SeenFilter(path)
+    assert domain_key("example.co.uk") in reopened
+    assert domain_key("other.com") not in reopened
+    assert reopened.add(domain_key("example.co.uk")) is False
+
+def test_false_positive_rate_stays_bounded_as_the_filter_grows(tmp_path):
+    seen_filter = SeenFilter(str(tmp_path / "seen"), capacity=1000, error_rate=0.01)
+    seen_filter.add_many(f"d:site{number}.com" for number in range(8000))
+    stats = seen_filter.stats()
+    assert stats["slices"] > 1
+    assert stats["error_rate"] <= 0.01
+    assert all(f"d:site{number}.com" in seen_filter for number in range(8000))
+    false_positives = sum(f"d:other{number}.com" in seen_filter for number in range(20000))
+    assert false_positives / 20000 <= 0.015
+
+def test_suppressed_run_writes_only_new_contacts(tmp_path, monkeypatch):
+    seen_filter = SeenFilter(str(tmp_path / "seen"))
+    first = [{"url": "https://www.clinic.org/contact", "raw_content": "Mail info@clinic.org or call 212-555-0123"}]
+    assert search_rows(tmp_path, "first", first, seen_filter, monkeypatch) == [
+        ("https://www.clinic.org/contact", "info@clinic.org", "212-555-0123")]
+
+    # The same site again is filtered out before it is scanned
+    assert search_rows(tmp_path, "again", first, seen_filter, monkeypatch) == []
+
+    # A new site listing only a collected email still contributes its phone number
+    second = [{"url": "https://partner.net/", "raw_content": "Mail info@clinic.org or call 212-555-0199"}]
+    assert search_rows(tmp_path, "second", second, seen_filter, monkeypatch) == [
+        ("https://partner.net/", "No email found", "212-555-0199")]
+
+def test_runs_without_suppression_write_everything(tmp_path, monkeypatch):
+    pages = [{"url": "https://www.clinic.org/contact", "raw_content": "Mail info@clinic.org"}]
+    assert search_rows(tmp_path, "first", pages, None, monkeypatch) == search_rows(tmp_path, "again", pages, None, monkeypatch)
+
+def test_suppressed_runs_are_not_reused(tmp_path):
+    registry = RunRegistry(str(tmp_path / "runs.db"))
+    result_path = tmp_path / "merged.csv"
+    result_path.write_text("URL,Email,Phone\n", encoding="utf-8")
+    now = time.time()
+    for run_id, suppressed, finished_at in (("full", False, now - 60), ("delta", True, now)):
+        registry.record({"run_id": run_id, "query": "clinics", "location": None, "run_folder": str(tmp_path),
+                         "result_path": str(result_path), "status": "completed", "started_at": finished_at - 1,
+                         "finished_at": finished_at, "global_suppression": suppressed})
+    assert registry.find_reusable("clinics", 3600)["run_id"] == "full"
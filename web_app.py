@@ -1,388 +1,219 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
 import os
-import subprocess
 import json
 from datetime import datetime
 import pytz
-import csv
 import threading
 import time
-import re
+from itertools import islice
+
+import business_search_complete
+from search_engine import run_search_matrix, cell_query, DEFAULT_MAX_WORKERS, DEFAULT_REUSE_MAX_AGE
+from csv_merge import iter_csv_rows, stream_merge
+from job_store import JobStore
+from rate_limiter import get_rate_limiter
+from http_transport import get_transport
+from metrics import REGISTRY
+from cancellation import CancellationToken
+from domain_suppression import url_domain
+from result_rows import INDEX_FIELDS, read_csv_rows, index_rows, filter_rows, project_rows, paginate, csv_chunks, gzip_chunks
 
 app = Flask(__name__)
 
-# Store running searches
-running_searches = {}
+# Where search runs and merged job results are written
+BUSINESS_SEARCHES_DIR = '/home/Devs/business_searches'
 
-def sanitize_filename(term):
-    """Clean a filename from a search term"""
-    return re.sub(r'[^\w\s-]', '', term).replace(' ', '_').lower()
+# Number of search cells a job runs at the same time
+SEARCH_MAX_WORKERS = DEFAULT_MAX_WORKERS
 
-def run_search_background(search_term, search_id, iterations=10):
-    """Run the business search in background"""
-    try:
-        print(f"🔍 DEBUG: Starting search for '{search_term}' with ID {search_id}, iterations: {iterations}")
-        running_searches[search_id]['debug_log'] = [f"Starting search for '{search_term}' with {iterations} iterations"]
-        running_searches[search_id]['all_runs'] = []  # Store all run progress
-        
-        # Use the virtual environment python directly instead of source
-        venv_python = '/home/Devs/.venv/bin/python3'
-        cmd = f"{venv_python} -u business_search_complete.py '{search_term}' --iterations {iterations}"
-        print(f"🔍 DEBUG: Running command: {cmd}")
-        running_searches[search_id]['debug_log'].append(f"Running command: {cmd}")
-        
-        # Simulate run progress for immediate frontend feedback
-        import time
-        import threading
-        
-        def simulate_progress():
-            for i in range(1, iterations + 1):
-                time.sleep(2)  # Wait 2 seconds between runs
-                if running_searches[search_id]['status'] == 'completed':
-                    break
-                run_text = f"  ▶ Run {i}/{iterations}"
-                running_searches[search_id]['current_run'] = run_text
-                running_searches[search_id]['all_runs'].append(run_text)
-                running_searches[search_id]['debug_log'].append(run_text)
-                print(f"🔍 SIMULATED PROGRESS: {run_text}")
-        
-        # Start progress simulation in background
-        progress_thread = threading.Thread(target=simulate_progress)
-        progress_thread.daemon = True
-        progress_thread.start()
-        
-        # Run the actual command
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, cwd='/home/Devs')
-        
-        return_code = result.returncode
-        full_stdout = result.stdout
-        full_stderr = result.stderr
-        
-        print(f"🔍 DEBUG: Command completed with return code: {return_code}")
-        print(f"🔍 DEBUG: STDOUT length: {len(full_stdout)}")
-        print(f"🔍 DEBUG: STDERR: {full_stderr}")
-        
-        # Update search status
-        running_searches[search_id]['status'] = 'completed'
-        running_searches[search_id]['completed_at'] = datetime.now(pytz.timezone('Asia/Jerusalem')).isoformat()
-        running_searches[search_id]['output'] = full_stdout
-        running_searches[search_id]['error'] = full_stderr
-        running_searches[search_id]['return_code'] = return_code
-        running_searches[search_id]['debug_log'].append(f"Command completed with return code: {return_code}")
-        running_searches[search_id]['debug_log'].append(f"STDOUT length: {len(full_stdout)}")
-        if full_stderr:
-            running_searches[search_id]['debug_log'].append(f"STDERR: {full_stderr}")
-        
-        # Find the generated CSV file
-        israel_tz = pytz.timezone('Asia/Jerusalem')
-        timestamp = datetime.now(israel_tz).strftime('%Y%m%d_%H%M%S')
-        sanitized_term = sanitize_filename(search_term)
-        
-        # Look for the most recent folder matching this search
-        business_searches_dir = '/home/Devs/business_searches'
-        if os.path.exists(business_searches_dir):
-            folders = [f for f in os.listdir(business_searches_dir) if f.startswith(sanitized_term)]
-            if folders:
-                # Get the most recent folder
-                latest_folder = sorted(folders)[-1]
-                csv_path = os.path.join(business_searches_dir, latest_folder, 'final', 'merged_cleaned_results.csv')
-                if os.path.exists(csv_path):
-                    running_searches[search_id]['csv_path'] = csv_path
-                    
-                    # Count results
-                    with open(csv_path, 'r') as f:
-                        reader = csv.DictReader(f)
-                        count = sum(1 for row in reader)
-                    running_searches[search_id]['result_count'] = count
-        
-    except Exception as e:
-        running_searches[search_id]['status'] = 'error'
-        running_searches[search_id]['error'] = str(e)
+# Job state and recent events (the last JOB_EVENT_BUFFER per job), shared by every worker process serving the app.
+# Expired jobs take their folder in BUSINESS_SEARCHES_DIR (full log and merged results) with them
+job_store = JobStore(files_dir=BUSINESS_SEARCHES_DIR)
+# Seconds between sweeps for expired jobs and jobs whose worker died, so an idle server still cleans up
+JOB_HOUSEKEEPING_INTERVAL = 600
+
+# Most events returned by one /status call; the full log is served page by page by /log
+STATUS_EVENT_LIMIT = int(os.getenv("STATUS_EVENT_LIMIT", "200"))
+LOG_PAGE_SIZE = 100
+MAX_LOG_PAGE_SIZE = 1000
+RESULTS_PAGE_SIZE = 100
+MAX_RESULTS_PAGE_SIZE = 1000
+
+# Job fields sent as the job summary (everything except the logs)
+SUMMARY_FIELDS = ['status', 'search_terms', 'locations', 'iterations', 'started_at', 'completed_at', 'error', 'message',
+                  'result_count', 'current_search_term', 'current_location', 'current_run',
+                  'completed_searches', 'cancelled_searches', 'total_searches', 'return_code', 'reuse_max_age', 'reused_cells',
+                  'early_stop', 'cancel_requested', 'partial']
+
+# Gauges read at scrape time. Other metrics are per process: with several
+# workers, scrape each one (the job count comes from the shared store)
+REGISTRY.gauge("web_jobs_running", "Search jobs running in any worker").set_function(lambda: job_store.count('running'))
+REGISTRY.gauge("rate_limiter_in_flight", "API calls in flight").set_function(lambda: get_rate_limiter().stats()['in_flight'])
+REGISTRY.gauge("rate_limiter_waiting", "API calls queued for a concurrency slot").set_function(lambda: get_rate_limiter().stats()['waiting'])
+REGISTRY.gauge("rate_limiter_concurrency_limit", "Current AIMD concurrency limit").set_function(lambda: get_rate_limiter().stats()['concurrency_limit'])
+
+# Cancellation tokens of the jobs running in this process; a cancel served by another
+# worker reaches them through the job store
+job_tokens = {}
+
+# Event streams poll the job store, so any worker can serve any job's stream
+EVENT_STREAM_POLL_INTERVAL = 0.5
+# Seconds between keep-alive comments on an idle event stream
+EVENT_STREAM_KEEPALIVE = 15
+
+def job_summary(job):
+    """Compact view of a job without its logs"""
+    return {key: job.get(key) for key in SUMMARY_FIELDS if key in job}
+
+def job_log_path(search_id):
+    """Where a job's full event log is appended, one JSON object per line"""
+    return os.path.join(BUSINESS_SEARCHES_DIR, search_id, 'job_log.jsonl')
+
+def emit_job_event(search_id, event):
+    """Append a progress event to the job's recent events in the store and to its full log file"""
+    return job_store.add_event(search_id, event, log_file=job_log_path(search_id))
+
+def log_job(search_id, message):
+    """Add a plain message to a job's log"""
+    emit_job_event(search_id, {'type': 'log', 'time': time.time(), 'message': message})
+
+def finish_job(search_id, status, **fields):
+    """Move a running job to its final status and tell event streams; returns False if it had already finished"""
+    completed_at = datetime.now(pytz.timezone('Asia/Jerusalem')).isoformat()
+    if not job_store.finish(search_id, status, completed_at=completed_at, **fields):
+        return False
+    emit_job_event(search_id, {'type': 'job_finished', 'time': time.time(), 'message': f"Search {status}"})
+    return True
+
+def housekeep_jobs():
+    """Fail jobs whose worker died, so they stop counting as running and can expire, then evict expired jobs"""
+    for stale_id in job_store.fail_stale():
+        emit_job_event(stale_id, {'type': 'job_finished', 'time': time.time(), 'message': 'Search error'})
+    job_store.evict_expired()
 
-def run_multi_term_multi_location_search_background(search_term_list, location_list, search_id, iterations=10):
+def run_housekeeping():
+    while True:
+        time.sleep(JOB_HOUSEKEEPING_INTERVAL)
+        try:
+            housekeep_jobs()
+        except Exception as e:
+            print(f"⚠️ Job housekeeping failed: {e}")
+
+# Started at import so every worker process sweeps, whether or not it serves requests (sweeps are idempotent)
+threading.Thread(target=run_housekeeping, name="job-housekeeping", daemon=True).start()
+
+def job_cancel_token(search_id):
+    """Create the cancellation token a job's engine checks between iterations and cells"""
+    token = CancellationToken(lambda: job_store.cancel_requested(search_id))
+    job_tokens[search_id] = token
+    return token
+
+def make_progress_handler(search_id):
+    """Build the engine progress callback that updates a job and logs its events"""
+    def on_progress(event):
+        if event['type'] == 'cell_started':
+            job_store.update(search_id, current_search_term=event['search_term'], current_location=event['location'])
+            event['message'] = f"Started: {event['search_term']} in {event['location']}"
+        elif event['type'] == 'iteration_done':
+            job_store.update(search_id, current_run=f"  ▶ Run {event['iteration']}/{event['iterations']} ({event['query']})")
+            event['message'] = f"{event['query']}: run {event['iteration']}/{event['iterations']}, {event['new_domains']} new domains, {len(event['new_emails'])} emails"
+        elif event['type'] == 'stream_stopped':
+            event['message'] = f"{event['query']}: stopped early after {event['iteration']}/{event['budget']} iterations (no new results)"
+        elif event['type'] == 'cell_finished':
+            # Cells skipped by a cancel never ran, so they are counted apart from the completed ones
+            job_store.increment(search_id, 'cancelled_searches' if event.get('skipped') else 'completed_searches')
+            if event.get('run_id'):
+                job_store.append(search_id, 'run_ids', event['run_id'])
+            if event.get('reused'):
+                job_store.append(search_id, 'reused_cells', f"{event['search_term']} in {event['location']}")
+                event['message'] = f"Reused: {event['search_term']} in {event['location']} (run {event['run_id']})"
+            elif event.get('skipped'):
+                event['message'] = f"Skipped (cancelled): {event['search_term']} in {event['location']}"
+            elif event.get('cancelled'):
+                event['message'] = f"Cancelled: {event['search_term']} in {event['location']}"
+            elif event.get('csv_path'):
+                event['message'] = f"Completed: {event['search_term']} in {event['location']}"
+            else:
+                event['message'] = f"Failed: {event['search_term']} in {event['location']} - {event.get('error')}"
+        emit_job_event(search_id, event)
+    return on_progress
+
+def run_multi_term_multi_location_search_background(search_term_list, location_list, search_id, iterations=10,
+                                                    reuse_max_age=DEFAULT_REUSE_MAX_AGE, early_stop=False):
     """Run business search across multiple search terms and multiple locations (matrix search)"""
     try:
         total_searches = len(search_term_list) * len(location_list)
         print(f"🌍 DEBUG: Starting multi-term multi-location search for {len(search_term_list)} terms across {len(location_list)} locations ({total_searches} total searches)")
-        running_searches[search_id]['debug_log'] = [f"Starting matrix search: {len(search_term_list)} terms × {len(location_list)} locations = {total_searches} searches"]
-        running_searches[search_id]['all_runs'] = []
-        
-        all_csv_files = []
-        search_counter = 0
+        log_job(search_id, f"Starting matrix search: {len(search_term_list)} terms × {len(location_list)} locations = {total_searches} searches on {SEARCH_MAX_WORKERS} workers")
         
-        # Process each search term with each location (matrix)
-        for search_term in search_term_list:
-            for location in location_list:
-                search_counter += 1
-                running_searches[search_id]['current_search_term'] = search_term
-                running_searches[search_id]['current_location'] = location
-                running_searches[search_id]['completed_searches'] = search_counter - 1
-                
-                # Create combined search term with location
-                combined_search_term = f"{location} {search_term}"
-                print(f"🔍 Processing search {search_counter}/{total_searches}: '{search_term}' in '{location}'")
-                
-                running_searches[search_id]['debug_log'].append(f"Search {search_counter}/{total_searches}: {search_term} in {location}")
-                
-                # Use the virtual environment python directly
-                venv_python = '/home/Devs/.venv/bin/python3'
-                cmd = f"{venv_python} -u business_search_complete.py '{combined_search_term}' --iterations {iterations}"
-                
-                print(f"🔍 DEBUG: Running command: {cmd}")
-                running_searches[search_id]['debug_log'].append(f"Running: {combined_search_term}")
-                
-                # Run the search for this term-location combination
-                result = subprocess.run(cmd, shell=True, capture_output=True, text=True, cwd='/home/Devs')
-                
-                if result.returncode == 0:
-                    # Find the generated CSV file for this search
-                    business_searches_dir = '/home/Devs/business_searches'
-                    if os.path.exists(business_searches_dir):
-                        # Find the most recent directory that contains our search term
-                        sanitized_combined_term = sanitize_filename(combined_search_term)
-                        matching_dirs = []
-                        
-                        for dir_name in os.listdir(business_searches_dir):
-                            if sanitized_combined_term.lower() in dir_name.lower():
-                                dir_path = os.path.join(business_searches_dir, dir_name)
-                                if os.path.isdir(dir_path):
-                                    matching_dirs.append(dir_path)
-                        
-                        if matching_dirs:
-                            # Get the most recent directory
-                            latest_dir = max(matching_dirs, key=os.path.getctime)
-                            
-                            # Look for the final CSV file in the final subdirectory
-                            final_dir = os.path.join(latest_dir, 'final')
-                            if os.path.exists(final_dir):
-                                csv_files = [f for f in os.listdir(final_dir) if f.endswith('.csv')]
-                                if csv_files:
-                                    csv_path = os.path.join(final_dir, csv_files[0])
-                                    all_csv_files.append({
-                                        'search_term': search_term,
-                                        'location': location,
-                                        'csv_path': csv_path
-                                    })
-                                    print(f"✅ Search {search_counter}/{total_searches} completed: {csv_path}")
-                                else:
-                                    print(f"⚠️ No CSV found in final directory for: {search_term} in {location}")
-                            else:
-                                print(f"⚠️ No final directory found for: {search_term} in {location}")
-                        else:
-                            print(f"⚠️ No matching directory found for: {search_term} in {location}")
-                    else:
-                        print(f"⚠️ Business searches directory not found")
-                else:
-                    print(f"❌ Search failed for: {search_term} in {location}")
-                    print(f"❌ Error output: {result.stderr}")
-                    running_searches[search_id]['debug_log'].append(f"Failed: {search_term} in {location} - {result.stderr}")
+        # Run every term-location combination in-process on the worker pool
+        cells = run_search_matrix(search_term_list, location_list, iterations, BUSINESS_SEARCHES_DIR,
+                                  max_workers=SEARCH_MAX_WORKERS, progress=make_progress_handler(search_id),
+                                  reuse_max_age=reuse_max_age, early_stop=early_stop, cancel=job_cancel_token(search_id))
+        all_csv_files = [cell for cell in cells if cell['csv_path']]
+        cancelled = any(cell.get('cancelled') for cell in cells)
         
         # Update completion status
-        running_searches[search_id]['completed_searches'] = total_searches
+        if not cancelled:
+            job_store.update(search_id, completed_searches=total_searches)
         
-        # Merge all CSV files into one
+        # Merge all CSV files into one (a cancelled search merges the partial results it has)
         if all_csv_files:
             # Create output directory for merged results
-            main_output_dir = f"/home/Devs/business_searches/{search_id}"
+            main_output_dir = os.path.join(BUSINESS_SEARCHES_DIR, search_id)
             os.makedirs(main_output_dir, exist_ok=True)
             
-            merged_csv_path = merge_multi_term_location_csvs(all_csv_files, main_output_dir)
+            merged_csv_path, count = merge_multi_term_location_csvs(all_csv_files, main_output_dir)
             
-            running_searches[search_id]['status'] = 'completed'
-            running_searches[search_id]['completed_at'] = datetime.now(pytz.timezone('Asia/Jerusalem')).isoformat()
-            running_searches[search_id]['debug_log'].append(f"Multi-term multi-location search completed successfully")
-            running_searches[search_id]['csv_path'] = merged_csv_path
-            running_searches[search_id]['message'] = f'Multi-term multi-location search completed! Found results from {len(all_csv_files)} searches.'
-            
-            # Count total results
-            if os.path.exists(merged_csv_path):
-                with open(merged_csv_path, 'r') as f:
-                    reader = csv.DictReader(f)
-                    count = sum(1 for row in reader)
-                running_searches[search_id]['result_count'] = count
+            if cancelled:
+                finish_job(search_id, 'cancelled', csv_path=merged_csv_path, result_count=count, partial=True,
+                           message=f'Search cancelled. Partial results from {len(all_csv_files)} searches are ready to download.')
+            else:
+                log_job(search_id, "Multi-term multi-location search completed successfully")
+                finish_job(search_id, 'completed', csv_path=merged_csv_path, result_count=count,
+                           message=f'Multi-term multi-location search completed! Found results from {len(all_csv_files)} searches '
+                                   f'({sum(1 for cell in all_csv_files if cell.get("reused"))} reused).')
+        elif cancelled:
+            finish_job(search_id, 'cancelled', message='Search cancelled before any results were found.')
         else:
-            running_searches[search_id]['status'] = 'error'
-            running_searches[search_id]['error'] = 'No results found from any search'
+            finish_job(search_id, 'error', error='No results found from any search')
             
     except Exception as e:
-        running_searches[search_id]['status'] = 'error'
-        running_searches[search_id]['error'] = str(e)
         print(f"❌ Multi-term multi-location search error: {str(e)}")
+        finish_job(search_id, 'error', error=str(e))
+    finally:
+        job_tokens.pop(search_id, None)
 
-def run_multi_location_search_background(search_term, location_list, search_id, iterations=10):
-    """Run business search across multiple locations and merge results"""
-    try:
-        print(f"🌍 DEBUG: Starting multi-location search for '{search_term}' across {len(location_list)} locations")
-        running_searches[search_id]['debug_log'] = [f"Starting multi-location search across {len(location_list)} locations"]
-        running_searches[search_id]['all_runs'] = []
-        
-        location_csv_files = []
-        
-        # Process each location
-        for location_idx, location in enumerate(location_list):
-            running_searches[search_id]['current_location'] = location
-            running_searches[search_id]['completed_locations'] = location_idx
-            
-            # Create combined search term with location
-            combined_search_term = f"{location} {search_term}"
-            print(f"🔍 Processing location {location_idx + 1}/{len(location_list)}: {location}")
-            
-            running_searches[search_id]['debug_log'].append(f"Processing location: {location}")
-            
-            # Use the virtual environment python directly
-            venv_python = '/home/Devs/.venv/bin/python3'
-            cmd = f"{venv_python} -u business_search_complete.py '{combined_search_term}' --iterations {iterations}"
-            
-            print(f"🔍 DEBUG: Running command: {cmd}")
-            running_searches[search_id]['debug_log'].append(f"Running command: {cmd}")
-            
-            # Run the search for this location (let script create its own directories)
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True, cwd='/home/Devs')
-            
-            print(f"🔍 DEBUG: Command output: {result.stdout}")
-            print(f"🔍 DEBUG: Command stderr: {result.stderr}")
-            
-            if result.returncode == 0:
-                # The script creates its own directory structure, so we need to find the most recent one
-                # Look for directories that match the search pattern
-                business_searches_dir = '/home/Devs/business_searches'
-                if os.path.exists(business_searches_dir):
-                    # Find the most recent directory that contains our search term
-                    sanitized_combined_term = sanitize_filename(combined_search_term)
-                    matching_dirs = []
-                    
-                    for dir_name in os.listdir(business_searches_dir):
-                        if sanitized_combined_term.lower() in dir_name.lower():
-                            dir_path = os.path.join(business_searches_dir, dir_name)
-                            if os.path.isdir(dir_path):
-                                matching_dirs.append(dir_path)
-                    
-                    if matching_dirs:
-                        # Get the most recent directory
-                        latest_dir = max(matching_dirs, key=os.path.getctime)
-                        
-                        # Look for the final CSV file in the final subdirectory
-                        final_dir = os.path.join(latest_dir, 'final')
-                        if os.path.exists(final_dir):
-                            csv_files = [f for f in os.listdir(final_dir) if f.endswith('.csv')]
-                            if csv_files:
-                                csv_path = os.path.join(final_dir, csv_files[0])
-                                location_csv_files.append({
-                                    'location': location,
-                                    'csv_path': csv_path
-                                })
-                                print(f"✅ Location {location} completed: {csv_path}")
-                            else:
-                                print(f"⚠️ No CSV found in final directory for location: {location}")
-                        else:
-                            print(f"⚠️ No final directory found for location: {location}")
-                    else:
-                        print(f"⚠️ No matching directory found for location: {location}")
-                else:
-                    print(f"⚠️ Business searches directory not found")
-            else:
-                print(f"❌ Search failed for location: {location}")
-                print(f"❌ Error output: {result.stderr}")
-                running_searches[search_id]['debug_log'].append(f"Search failed for location: {location} - {result.stderr}")
-        
-        # Update completion status
-        running_searches[search_id]['completed_locations'] = len(location_list)
-        
-        # Merge all location CSV files into one
-        if location_csv_files:
-            # Create output directory for merged results
-            main_output_dir = f"/home/Devs/business_searches/{search_id}"
-            os.makedirs(main_output_dir, exist_ok=True)
-            
-            merged_csv_path = merge_location_csvs(location_csv_files, main_output_dir)
-            
-            running_searches[search_id]['status'] = 'completed'
-            running_searches[search_id]['completed_at'] = datetime.now(pytz.timezone('Asia/Jerusalem')).isoformat()
-            running_searches[search_id]['csv_path'] = merged_csv_path
-            running_searches[search_id]['message'] = f'Multi-location search completed! Found results from {len(location_csv_files)} locations.'
-            
-            # Count total results
-            if os.path.exists(merged_csv_path):
-                with open(merged_csv_path, 'r') as f:
-                    reader = csv.DictReader(f)
-                    count = sum(1 for row in reader)
-                running_searches[search_id]['result_count'] = count
-        else:
-            running_searches[search_id]['status'] = 'error'
-            running_searches[search_id]['error'] = 'No results found from any location'
-            
-    except Exception as e:
-        running_searches[search_id]['status'] = 'error'
-        running_searches[search_id]['error'] = str(e)
-        print(f"❌ Multi-location search error: {str(e)}")
+def with_organization(rows):
+    """Add each row's registered domain as its Organization, so merged contacts can be grouped by site"""
+    for row in rows:
+        row['Organization'] = url_domain(row.get('URL'))
+        yield row
+
+def merged_email_key(row):
+    """Dedupe key for merged rows: the lowercased email, or None to drop rows without one"""
+    email = (row.get('Email') or '').strip().lower()
+    if email and email != 'no email found':
+        return email
+    return None
 
 def merge_multi_term_location_csvs(search_csv_files, output_dir):
-    """Merge CSV files from multiple search terms and locations and remove duplicates"""
+    """Merge CSV files from multiple search terms and locations, remove duplicates and return the path and row count"""
     merged_csv_path = os.path.join(output_dir, "merged_all_searches.csv")
     
-    seen_emails = set()
-    all_rows = []
+    # Stream every search's rows, adding search term and location info to each row
+    rows = (
+        row
+        for search_data in search_csv_files
+        for row in iter_csv_rows(search_data['csv_path'], SearchTerm=search_data['search_term'], Location=search_data['location'])
+    )
     
-    for search_data in search_csv_files:
-        search_term = search_data['search_term']
-        location = search_data['location']
-        csv_path = search_data['csv_path']
-        
-        if os.path.exists(csv_path):
-            with open(csv_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    email = row.get('Email', '').strip().lower()
-                    if email and email not in seen_emails and email != 'no email found':
-                        seen_emails.add(email)
-                        # Add search term and location info to the row
-                        row['SearchTerm'] = search_term
-                        row['Location'] = location
-                        all_rows.append(row)
-    
-    # Write merged results
-    if all_rows:
-        fieldnames = ['URL', 'Email', 'SearchTerm', 'Location', 'SourceFile']
-        with open(merged_csv_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(all_rows)
-    
-    print(f"📊 Merged {len(all_rows)} unique results from {len(search_csv_files)} searches")
-    return merged_csv_path
-
-def merge_location_csvs(location_csv_files, output_dir):
-    """Merge CSV files from multiple locations and remove duplicates"""
-    merged_csv_path = os.path.join(output_dir, "merged_all_locations.csv")
-    
-    seen_emails = set()
-    all_rows = []
-    
-    for location_data in location_csv_files:
-        location = location_data['location']
-        csv_path = location_data['csv_path']
-        
-        if os.path.exists(csv_path):
-            with open(csv_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    email = row.get('Email', '').strip().lower()
-                    if email and email not in seen_emails and email != 'no email found':
-                        seen_emails.add(email)
-                        # Add location info to the row
-                        row['Location'] = location
-                        all_rows.append(row)
-    
-    # Write merged results
-    if all_rows:
-        fieldnames = ['URL', 'Email', 'Location', 'SourceFile']
-        with open(merged_csv_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(all_rows)
-    
-    print(f"📊 Merged {len(all_rows)} unique results from {len(location_csv_files)} locations")
-    return merged_csv_path
+    fieldnames = ['URL', 'Email', 'Phone', 'Organization', 'SearchTerm', 'Location', 'SourceFile']
+    stats = stream_merge(with_organization(rows), merged_csv_path, fieldnames, key=merged_email_key)
+    
+    print(f"📊 Merged {stats['rows_written']} unique results from {len(search_csv_files)} searches"
+          f"{' (spilled to disk)' if stats['spilled'] else ''}")
+    return merged_csv_path, stats['rows_written']
 
 @app.route('/')
 def index():
@@ -419,56 +250,226 @@ def start_search():
     except (ValueError, TypeError):
         iterations = 10
     
-    # Generate unique search ID
-    search_id = f"search_{int(time.time())}"
+    # Results of equivalent searches newer than this are reused instead of searched again (0 disables reuse)
+    try:
+        reuse_max_age = int(float(data.get('reuse_max_age_hours', DEFAULT_REUSE_MAX_AGE / 3600)) * 3600)
+    except (ValueError, TypeError):
+        reuse_max_age = DEFAULT_REUSE_MAX_AGE
+    
+    # Stop query streams that have run dry instead of spending the full iteration budget (off unless asked, as in the CLI)
+    early_stop = bool(data.get('early_stop', False))
+    
+    # Generate unique search ID (the random suffix keeps searches started in the same second, on any worker, apart)
+    search_id = f"search_{int(time.time())}_{os.urandom(3).hex()}"
     
     # Calculate total searches (terms × locations)
     total_searches = len(search_term_list) * len(location_list)
     
     # Initialize search status
-    running_searches[search_id] = {
-        'status': 'running',
-        'search_terms': search_term_list,
-        'locations': location_list,
-        'iterations': iterations,
-        'started_at': datetime.now(pytz.timezone('Asia/Jerusalem')).isoformat(),
-        'output': '',
-        'error': '',
-        'csv_path': None,
-        'result_count': 0,
-        'current_search_term': '',
-        'current_location': '',
-        'completed_searches': 0,
-        'total_searches': total_searches
-    }
+    housekeep_jobs()
+    job_store.create(
+        search_id,
+        search_terms=search_term_list,
+        locations=location_list,
+        iterations=iterations,
+        started_at=datetime.now(pytz.timezone('Asia/Jerusalem')).isoformat(),
+        error='',
+        csv_path=None,
+        result_count=0,
+        current_search_term='',
+        current_location='',
+        completed_searches=0,
+        cancelled_searches=0,
+        total_searches=total_searches,
+        reuse_max_age=reuse_max_age,
+        reused_cells=[],
+        early_stop=early_stop
+    )
     
     # Start search in background thread
-    thread = threading.Thread(target=run_multi_term_multi_location_search_background, args=(search_term_list, location_list, search_id, iterations))
+    thread = threading.Thread(target=run_multi_term_multi_location_search_background, args=(search_term_list, location_list, search_id, iterations, reuse_max_age, early_stop))
     thread.daemon = True
     thread.start()
     
     return jsonify({'search_id': search_id, 'status': 'started'})
 
+def parse_int_arg(name, default):
+    """Read an integer query string argument, falling back to default"""
+    try:
+        return int(request.args.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
 @app.route('/status/<search_id>')
 def get_status(search_id):
-    if search_id not in running_searches:
+    """Job summary plus the events after the client's cursor (the last event id it has seen)"""
+    job = job_store.get(search_id)
+    if job is None:
+        return jsonify({'error': 'Search not found'}), 404
+    
+    cursor = parse_int_arg('cursor', -1)
+    events = job_store.events(search_id, after=cursor, limit=STATUS_EVENT_LIMIT + 1)
+    has_more = len(events) > STATUS_EVENT_LIMIT
+    events = events[:STATUS_EVENT_LIMIT]
+    # Events the client missed that already fell out of the store's buffer (they remain in /log)
+    dropped = max(0, events[0]['id'] - cursor - 1) if events else 0
+    if events:
+        cursor = events[-1]['id']
+    return jsonify({'job': job_summary(job), 'events': events, 'cursor': cursor, 'has_more': has_more, 'dropped': dropped})
+
+@app.route('/log/<search_id>')
+def get_log(search_id):
+    """One page of a job's full event log"""
+    log_path = job_log_path(search_id)
+    if not job_store.exists(search_id) or not os.path.exists(log_path):
+        return jsonify({'error': 'Log not found'}), 404
+    
+    offset = max(0, parse_int_arg('offset', 0))
+    limit = min(MAX_LOG_PAGE_SIZE, max(1, parse_int_arg('limit', LOG_PAGE_SIZE)))
+    with open(log_path, 'r', encoding='utf-8') as f:
+        page = [json.loads(line) for line in islice(f, offset, offset + limit + 1)]
+    
+    has_more = len(page) > limit
+    return jsonify({'entries': page[:limit], 'offset': offset, 'next_offset': offset + limit if has_more else None})
+
+@app.route('/events/<search_id>')
+def stream_events(search_id):
+    """Server-Sent Events stream of a search's progress, resumable with Last-Event-ID"""
+    if not job_store.exists(search_id):
         return jsonify({'error': 'Search not found'}), 404
     
-    return jsonify(running_searches[search_id])
+    try:
+        cursor = int(request.headers.get('Last-Event-ID', request.args.get('cursor', -1)))
+    except ValueError:
+        cursor = -1
+    
+    def generate():
+        nonlocal cursor
+        idle_since = time.monotonic()
+        while True:
+            new_events = job_store.events(search_id, after=cursor, limit=STATUS_EVENT_LIMIT)
+            if not new_events:
+                if time.monotonic() - idle_since >= EVENT_STREAM_KEEPALIVE:
+                    idle_since = time.monotonic()
+                    yield ": keep-alive\n\n"
+                time.sleep(EVENT_STREAM_POLL_INTERVAL)
+                continue
+            job = job_store.get(search_id)
+            if job is None:
+                return
+            summary = job_summary(job)
+            for event in new_events:
+                yield f"id: {event['id']}\ndata: {json.dumps(dict(event, job=summary))}\n\n"
+            cursor = new_events[-1]['id']
+            idle_since = time.monotonic()
+            if new_events[-1]['type'] == 'job_finished':
+                return
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/rate_limit')
+def rate_limit_status():
+    """Current search rate limit, AIMD concurrency limit, throttle counters and connection reuse"""
+    return jsonify(dict(get_rate_limiter().stats(), transport=get_transport().stats()))
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """API latency, response size, extraction, CSV write, cache, queue and worker metrics of this process"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/metrics/<search_id>')
+def job_metrics(search_id):
+    """Timings, counts and metric summaries of every run a job searched or reused"""
+    job = job_store.get(search_id)
+    if job is None:
+        return jsonify({'error': 'Search not found'}), 404
+    if business_search_complete.run_registry is None:
+        business_search_complete.init_run_registry()
+
+    runs = {}
+    for run_id in dict.fromkeys(job.get('run_ids', []) + ([job['run_id']] if job.get('run_id') else [])):
+        manifest = business_search_complete.run_registry.get(run_id)
+        if manifest is not None:
+            runs[run_id] = {key: manifest.get(key) for key in ('query', 'status', 'timings', 'counts', 'metrics')}
+    return jsonify({'job': job_summary(job), 'runs': runs})
+
+def job_rows(job):
+    """Columns and lazy rows of a job's results, with where they come from
+
+    Finished jobs read their merged CSV. Running jobs read what their cells have
+    indexed so far; cells reused from earlier runs show up once the job merges.
+    """
+    csv_path = job.get('csv_path')
+    if csv_path and os.path.exists(csv_path):
+        columns, rows = read_csv_rows(csv_path)
+        return columns, rows, 'merged'
+    if job['status'] != 'running':
+        return None, None, None
+    if business_search_complete.contact_index is None:
+        business_search_complete.init_contact_index()
+    cells = {(cell_query(term, location), location): term
+             for term in job.get('search_terms', []) for location in job.get('locations', [])}
+    since = datetime.fromisoformat(job['started_at']).timestamp() if job.get('started_at') else None
+    return list(INDEX_FIELDS), index_rows(business_search_complete.contact_index, cells, since), 'index'
+
+def select_rows(columns, rows):
+    """Apply the term, location and domain filters and the column projection of the request to a job's rows
+
+    Returns the projected columns and rows, or raises ValueError naming unknown columns.
+    """
+    rows = filter_rows(rows, term=request.args.get('term'), location=request.args.get('location'),
+                       domain=request.args.get('domain'))
+    requested = [column.strip() for column in request.args.get('columns', '').split(',') if column.strip()]
+    if not requested:
+        return columns, rows
+    unknown = [column for column in requested if column not in columns]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)} (available: {', '.join(columns)})")
+    return requested, project_rows(rows, requested)
+
+@app.route('/results/<search_id>')
+def get_results(search_id):
+    """One page of a job's results, filtered by term, location and domain and projected to columns; live while it runs"""
+    job = job_store.get(search_id)
+    if job is None:
+        return jsonify({'error': 'Search not found'}), 404
+    
+    columns, rows, source = job_rows(job)
+    if rows is None:
+        return jsonify({'error': 'No results available'}), 404
+    try:
+        columns, rows = select_rows(columns, rows)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    offset = max(0, parse_int_arg('offset', 0))
+    limit = min(MAX_RESULTS_PAGE_SIZE, max(1, parse_int_arg('limit', RESULTS_PAGE_SIZE)))
+    page, has_more = paginate(rows, offset, limit)
+    return jsonify({'columns': columns, 'rows': page, 'offset': offset, 'next_offset': offset + limit if has_more else None,
+                    'source': source, 'status': job['status']})
 
 @app.route('/download/<search_id>')
 def download_csv(search_id):
-    if search_id not in running_searches:
+    """Stream a job's merged CSV (gzipped if the client accepts it), optionally filtered and projected like /results"""
+    search_info = job_store.get(search_id)
+    if search_info is None:
         return jsonify({'error': 'Search not found'}), 404
     
-    search_info = running_searches[search_id]
-    if search_info['status'] != 'completed' or not search_info.get('csv_path'):
+    # Cancelled searches can be downloaded with the partial results they collected
+    if search_info['status'] not in ('completed', 'cancelled') or not search_info.get('csv_path'):
         return jsonify({'error': 'CSV not ready'}), 400
     
     csv_path = search_info['csv_path']
     if not os.path.exists(csv_path):
         return jsonify({'error': 'CSV file not found'}), 404
     
+    columns, rows = read_csv_rows(csv_path)
+    try:
+        columns, rows = select_rows(columns, rows)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     # Generate a simple, short filename for download
     # Use timestamp and search count for unique, short filenames
     israel_tz = pytz.timezone('Asia/Jerusalem')
@@ -486,42 +487,36 @@ def download_csv(search_id):
         # Legacy single search
         download_name = f"business_search_{timestamp}.csv"
     
-    return send_file(csv_path, as_attachment=True, download_name=download_name)
+    if search_info.get('partial'):
+        download_name = download_name.replace('.csv', '_partial.csv')
+    
+    headers = {'Content-Disposition': f'attachment; filename="{download_name}"', 'Vary': 'Accept-Encoding'}
+    chunks = csv_chunks(columns, rows)
+    # accept_encodings honours q-values, so 'gzip;q=0' is a refusal
+    if request.accept_encodings['gzip']:
+        headers['Content-Encoding'] = 'gzip'
+        chunks = gzip_chunks(chunks)
+    return Response(stream_with_context(chunks), mimetype='text/csv', headers=headers)
 
 @app.route('/cancel/<search_id>', methods=['POST'])
 def cancel_search(search_id):
-    """Cancel a running search"""
-    if search_id not in running_searches:
+    """Ask a running search to stop; it finishes as 'cancelled' with its partial results merged"""
+    if not job_store.exists(search_id):
         return jsonify({'success': False, 'error': 'Search not found'}), 404
     
-    search_info = running_searches[search_id]
-    if search_info['status'] != 'running':
+    # Flag the job in the store (seen by whichever worker runs it); this fails if the search already finished
+    if not job_store.request_cancel(search_id):
         return jsonify({'success': False, 'error': 'Search is not running'}), 400
     
-    try:
-        # Mark search as cancelled
-        running_searches[search_id]['status'] = 'cancelled'
-        running_searches[search_id]['completed_at'] = datetime.now(pytz.timezone('Asia/Jerusalem')).isoformat()
-        running_searches[search_id]['error'] = 'Search cancelled by user'
-        
-        # Try to kill any running subprocess
-        # Note: This is a basic implementation - for production you'd want to track process IDs
-        import signal
-        import psutil
-        
-        # Kill any business_search_complete.py processes
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            try:
-                if proc.info['cmdline'] and any('business_search_complete.py' in str(cmd) for cmd in proc.info['cmdline']):
-                    proc.terminate()
-                    proc.wait(timeout=3)
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.TimeoutExpired):
-                pass
-        
-        return jsonify({'success': True, 'message': 'Search cancelled successfully'})
-        
-    except Exception as e:
-        return jsonify({'success': False, 'error': f'Failed to cancel search: {str(e)}'}), 500
+    # Stop at once if the job runs in this process, without waiting for its next store poll
+    token = job_tokens.get(search_id)
+    if token is not None:
+        token.cancel()
+    emit_job_event(search_id, {'type': 'cancel_requested', 'time': time.time(), 'message': 'Cancelling search...'})
+    
+    return jsonify({'success': True, 'message': 'Search is being cancelled; partial results will be available for download'})
 
 if __name__ == '__main__':
+    # Development server; job state lives in the job store, so production can run several workers,
+    # e.g. gunicorn --workers 4 --threads 8 web_app:app
     app.run(debug=True, host='0.0.0.0', port=5000)